@@ -1,118 +1,411 @@
 import datetime
-import requests
-from bs4 import BeautifulSoup
 import json
-import csv
-from uuid import uuid4
 import os
 import logging
-import schedule
 import time
 import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from playwright.async_api import async_playwright
+from http_cache import ResponseCache
+from menu_history import MenuHistory
+from menu_search import SearchIndex
+from menu_model import MenuIndex, menu_from_json, menu_to_json
+from menu_normalizer import ItemNormalizer, transform_api_data
+from parse_pool import ParsePool
+from refresh_schedule import RefreshPlanner, RefreshScheduler, cache_ttl, parse_tiers
+from resilience import Resilience, UnavailableError
+from venues import VENUES_FILE, VenueRegistry
+from bulk_writer import BulkWriter
+from metrics import Metrics
+from label_index import LabelBits, collect_labels
+from menu_backup import StreamingBackupWriter, backup_timestamp, latest_backup, load_backup
+from menu_rows import build_menu_documents, build_menu_rows, weekday_name
+from menu_sync import VersionBuild, compute_menu_diff
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('menu_updater.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 # Supabase configuration
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    logger.error("Missing Supabase configuration. Please check your .env file.")
-    exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# Dining halls configuration for new website structure
-DINING_HALLS = [
-    {
-        "id": "parkside",
-        "name": "Parkside",
-        "data_value": "parkside"
-    },
-    {
-        "id": "village",
-        "name": "USC Village", 
-        "data_value": "university-village"
-    },
-    {
-        "id": "evk",
-        "name": "Everybody's Kitchen",
-        "data_value": "evk"
-    }
-]
+# Created on first use by get_supabase(); importing this module never connects
+supabase = None
+
+
+def get_supabase():
+    """The shared Supabase client, created on first use"""
+    global supabase
+    if supabase is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise RuntimeError("Missing Supabase configuration. Please check your .env file.")
+        from supabase import create_client
+
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return supabase
+
+
+def configure_logging():
+    """Log to menu_updater.log and the console; entry points call this, importing does not"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('menu_updater.log', delay=True),
+            logging.StreamHandler()
+        ]
+    )
+
+# Venues (dining halls, cafes, trucks) and the API sources serving them
+VENUES = VenueRegistry.load(os.getenv('MENU_VENUES_FILE', VENUES_FILE))
+DINING_HALLS = VENUES.venues
 
 BASE_URL = "https://hospitality.usc.edu/dining-hall-menus/"
 API_BASE_URL = os.getenv('MENU_API_URL')
 
-weekday_strs = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Concurrency limits for the menu API fetcher
+API_MAX_CONCURRENCY = int(os.getenv('MENU_API_MAX_CONCURRENCY', '8'))
+API_MAX_PER_HOST = int(os.getenv('MENU_API_MAX_PER_HOST', '4'))
+
+# Retries of failed API requests and page loads, with jittered exponential backoff
+FETCH_MAX_RETRIES = int(os.getenv('MENU_FETCH_MAX_RETRIES', '3'))
+FETCH_BACKOFF_SECONDS = float(os.getenv('MENU_FETCH_BACKOFF_SECONDS', '0.5'))
+# Consecutive failures that open a host's circuit breaker, and how long before it is probed again
+BREAKER_FAILURES = int(os.getenv('MENU_BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('MENU_BREAKER_RESET_SECONDS', '30'))
+# Time budget for one run's fetching; no request or retry starts after it runs out
+RUN_DEADLINE_SECONDS = float(os.getenv('MENU_RUN_DEADLINE_MINUTES', '10')) * 60
+# Send a duplicate API request once one runs past this percentile of recent latencies (0 disables hedging)
+HEDGE_PERCENTILE = float(os.getenv('MENU_HEDGE_PERCENTILE', '95'))
+
+# On-disk cache of API responses, revalidated with ETag / Last-Modified; its
+# lifetime follows the refresh tiers (CACHE_TTL_SECONDS below)
+CACHE_DIR = os.getenv('MENU_CACHE_DIR', '.menu_cache')
+CACHE_MAX_BYTES = int(os.getenv('MENU_CACHE_MAX_MB', '50')) * 1024 * 1024
+# State kept between runs that must not be expired or evicted with the response cache
+STATE_DIR = os.getenv('MENU_STATE_DIR', '.menu_state')
+
+# Playwright scraper: isolated browser contexts scraping at once, and how long
+# the DOM must stay unchanged before a page counts as loaded
+SCRAPER_MAX_CONTEXTS = int(os.getenv('SCRAPER_MAX_CONTEXTS', '3'))
+SCRAPER_SETTLE_MS = int(os.getenv('SCRAPER_SETTLE_MS', '300'))
+
+# "network" reads the menu JSON the page fetches and only parses the DOM if none
+# was captured; "dom" always parses the rendered page
+SCRAPER_MODE = os.getenv('SCRAPER_MODE', 'network')
+# HTML parser backend for the DOM fallback ("lxml" or "bs4"); empty picks the fastest installed
+SCRAPER_HTML_PARSER = os.getenv('SCRAPER_HTML_PARSER') or None
+# Worker processes parsing scraped HTML and large API bodies off the event loop (0 parses inline)
+PARSE_WORKERS = int(os.getenv('MENU_PARSE_WORKERS', str(os.cpu_count() or 1)))
+# API bodies smaller than this are transformed inline; shipping them to a worker costs more
+PARSE_POOL_MIN_BYTES = int(os.getenv('MENU_PARSE_POOL_MIN_KB', '256')) * 1024
+BLOCKED_RESOURCE_TYPES = {"image", "font", "stylesheet", "media"}
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "nr-data.net",
+)
+
+# Number of Supabase write batches allowed in flight at once
+UPLOAD_MAX_WORKERS = int(os.getenv('SUPABASE_UPLOAD_WORKERS', '4'))
+
+# How menus are written: versioned (see sql/001_menu_versions.sql) or full
+UPLOAD_MODE = os.getenv('MENU_UPLOAD_MODE', 'versioned')
+# Menu versions kept after a publish: the live one plus the previous one for in-flight reads
+KEEP_MENU_VERSIONS = 2
+# menu_items columns read back to compare against what a run wants to publish
+MENU_ITEM_COLUMNS = 'menu_item_uuid,name,image_url,category,featured,labels,label_mask'
+# A version still 'building' this long after it was started belongs to a run that died; GC removes it
+ABANDONED_BUILD_SECONDS = int(os.getenv('MENU_ABANDONED_BUILD_MINUTES', '120')) * 60
+
+# Where compressed backups and their manifests are written, and restored from
+BACKUP_DIR = os.getenv('MENU_BACKUP_DIR', 'backups')
+
+# Local date-keyed history of every fetched menu (see menu_history.py)
+HISTORY_DB = os.getenv('MENU_HISTORY_DB', 'menu_history.sqlite3')
+
+# Where each run's metrics summary (menu_metrics.json / menu_metrics.prom) is written
+METRICS_DIR = os.getenv('MENU_METRICS_DIR', '.')
+
+# Bounded queue size between the fetch, transform, backup and upload stages
+PIPELINE_QUEUE_SIZE = int(os.getenv('MENU_PIPELINE_QUEUE_SIZE', '4'))
+
+# Days of menus fetched and published, starting today
+DAYS_TO_FETCH = 7
+# Scheduler freshness tiers as days_ahead:minutes pairs: today every 3 hours,
+# tomorrow every 12 hours, the rest of the week every 2 days (see refresh_schedule.py)
+REFRESH_TIERS = parse_tiers(os.getenv('MENU_REFRESH_TIERS', '0:180,1:720,6:2880'))
+# Response cache lifetime; at least twice the longest tier interval, so a slice's
+# entry is still there to revalidate or fall back to when the slice falls due
+CACHE_TTL_SECONDS = cache_ttl(REFRESH_TIERS, int(os.getenv('MENU_CACHE_TTL_HOURS', '48')) * 3600)
+# Random delay added to each scheduler wake-up, and how far ahead a job picks up
+# slices that are about to fall due
+REFRESH_JITTER_SECONDS = int(os.getenv('MENU_REFRESH_JITTER_MINUTES', '10')) * 60
+REFRESH_COALESCE_SECONDS = int(os.getenv('MENU_REFRESH_COALESCE_MINUTES', '30')) * 60
+
+# Installed in every scraper page; counts DOM changes and records when the last one happened
+DOM_MUTATION_TRACKER_JS = """
+window.__dineonLastMutation = performance.now();
+window.__dineonMutations = 0;
+new MutationObserver(() => { window.__dineonLastMutation = performance.now(); window.__dineonMutations++; })
+    .observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+"""
+
+
+class _NetworkTracker:
+    """Tracks a page's fetch/XHR requests.
+
+    ``idle`` is set when none are pending, ``started`` counts every request
+    sent and ``activity`` is set whenever one starts.
+    """
+
+    def __init__(self, page):
+        self.pending = set()
+        self.started = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.activity = asyncio.Event()
+        page.on("request", self._started)
+        page.on("requestfinished", self._finished)
+        page.on("requestfailed", self._finished)
+
+    def _started(self, request):
+        if request.resource_type in ("fetch", "xhr"):
+            self.pending.add(request)
+            self.started += 1
+            self.idle.clear()
+            self.activity.set()
+
+    def _finished(self, request):
+        self.pending.discard(request)
+        if not self.pending:
+            self.idle.set()
+
+
+class _MenuPayloadCapture:
+    """Collects the raw bodies of the JSON menu payloads (objects with ``meals``) a page loads"""
+
+    def __init__(self, page):
+        self.payloads = []
+        self._reads = set()
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        content_type = response.headers.get("content-type", "")
+        if response.request.resource_type in ("fetch", "xhr") and "json" in content_type:
+            read = asyncio.ensure_future(self._read(response))
+            self._reads.add(read)
+            read.add_done_callback(self._reads.discard)
+
+    async def _read(self, response):
+        try:
+            body = await response.body()
+        except Exception:
+            return
+        # Decoding waits for the parse pool; a substring test keeps other JSON out
+        if b'"meals"' in body:
+            self.payloads.append((response.url, body))
+
+    def mark(self):
+        """Position to pass as ``since`` to only consider payloads captured after now"""
+        return len(self.payloads)
+
+    async def payload_for(self, target_date, since=0):
+        """The captured payload for ``target_date``, or the latest one captured after ``since``"""
+        if self._reads:
+            await asyncio.gather(*self._reads, return_exceptions=True)
+        for url, body in reversed(self.payloads):
+            if _url_matches_date(url, target_date):
+                return body
+        later = self.payloads[since:]
+        return later[-1][1] if later else None
+
+
+def _url_matches_date(url, target_date):
+    query = parse_qs(urlsplit(url).query)
+    try:
+        if {"y", "m", "d"} <= query.keys():
+            return datetime.date(int(query["y"][0]), int(query["m"][0]), int(query["d"][0])) == target_date
+    except ValueError:
+        return False
+    return target_date.strftime("%Y-%m-%d") in url
+
+
+def menu_api_url(hall, date):
+    """The menu API URL for one dining hall and date; also the response cache key"""
+    base_url = VENUES.sources.get(hall.get("source"), {}).get("url") or API_BASE_URL
+    return f"{base_url}{hall['data_value']}?y={date:%Y}&m={date:%m}&d={date:%d}"
+
+
+async def _block_heavy_assets(route):
+    """Abort images, fonts, stylesheets, media and analytics; let everything else through"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
 
 class MenuUpdater:
     def __init__(self):
         self.logger = logger
+        self.response_cache = ResponseCache(CACHE_DIR, CACHE_TTL_SECONDS, CACHE_MAX_BYTES)
+        self.item_normalizer = ItemNormalizer(os.path.join(STATE_DIR, "normalized_items.json"))
+        self.metrics = Metrics()
+        self.venues = VENUES
+        self.resilience = Resilience(
+            FETCH_MAX_RETRIES, FETCH_BACKOFF_SECONDS,
+            failure_threshold=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS,
+            hedge_percentile=HEDGE_PERCENTILE, logger=logger, metrics=self.metrics,
+        )
+        self._bulk_writer = None
+        self._gc_thread = None
+        self.label_bits = None
+        self.search_index = None
+        self._menu_parser = None
+        self.parse_pool = ParsePool(
+            PARSE_WORKERS, SCRAPER_HTML_PARSER, os.path.join(STATE_DIR, "normalized_items.json")
+        )
     
+    @property
+    def bulk_writer(self):
+        """Batched Supabase writer, created (with the client) on first write"""
+        if self._bulk_writer is None:
+            self._bulk_writer = BulkWriter(
+                get_supabase(), max_workers=UPLOAD_MAX_WORKERS, logger=logger, metrics=self.metrics
+            )
+        return self._bulk_writer
+
+    @property
+    def menu_parser(self):
+        """HTML parser for the scraper's DOM fallback; imports lxml or bs4 on first use"""
+        if self._menu_parser is None:
+            from menu_parser import get_menu_parser
+
+            self._menu_parser = get_menu_parser(SCRAPER_HTML_PARSER)
+        return self._menu_parser
+
+    async def _settle_mark(self, page, network):
+        """Request and DOM mutation counts to pass to ``_wait_until_settled``, taken before an action"""
+        return network.started, await page.evaluate("window.__dineonMutations || 0")
+
+    async def _wait_for_activity(self, page, network, mark, timeout):
+        """Wait until a fetch/XHR starts or the DOM changes after ``mark``"""
+        requests, mutations = mark
+
+        async def request_started():
+            while network.started <= requests:
+                network.activity.clear()
+                await network.activity.wait()
+
+        waits = {
+            asyncio.ensure_future(request_started()),
+            asyncio.ensure_future(page.wait_for_function(
+                "since => (window.__dineonMutations || 0) > since", arg=mutations, timeout=max(1, timeout * 1000)
+            )),
+        }
+        try:
+            done, _ = await asyncio.wait(waits, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for wait in waits:
+                wait.cancel()
+        if not done:
+            raise asyncio.TimeoutError
+        for wait in done:
+            wait.result()
+
+    async def _wait_until_settled(self, page, network, mark=None, timeout=15000):
+        """Wait until the page has reacted to an action and settled.
+
+        With a ``mark`` from ``_settle_mark`` taken before the action, first
+        waits for a fetch/XHR or DOM change after it, so a page that has not
+        started loading yet is not taken for a settled one. Then waits until
+        no fetch/XHR is pending and the DOM has been quiet for
+        SCRAPER_SETTLE_MS, starting over if a request was sent meanwhile.
+        """
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        deadline = time.monotonic() + timeout / 1000
+        try:
+            if mark is not None:
+                await self._wait_for_activity(page, network, mark, deadline - time.monotonic())
+            while True:
+                await asyncio.wait_for(network.idle.wait(), max(0, deadline - time.monotonic()))
+                started = network.started
+                await page.wait_for_function(
+                    "quietMs => performance.now() - (window.__dineonLastMutation || 0) >= quietMs",
+                    arg=SCRAPER_SETTLE_MS,
+                    # Playwright treats 0 as no timeout
+                    timeout=max(1, (deadline - time.monotonic()) * 1000),
+                )
+                if network.idle.is_set() and network.started == started:
+                    return
+        except (asyncio.TimeoutError, PlaywrightTimeoutError):
+            self.logger.warning("Page did not settle in time, continuing")
+
     async def scrape_menu_with_playwright(self, page, dining_hall_id, data_value, target_date):
         """Scrape a single dining hall's menu using Playwright for dynamic content"""
         menu_data = {dining_hall_id: {}}
+        network = _NetworkTracker(page)
+        capture = _MenuPayloadCapture(page)
         
         try:
-            # Navigate to the main menu page with retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    await page.goto(BASE_URL, timeout=60000, wait_until='domcontentloaded')
-                    break
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        self.logger.warning(f"Navigation attempt {attempt + 1} failed, retrying: {e}")
-                        await asyncio.sleep(5)  # Wait before retry
-                    else:
-                        raise e
-            
-            # Wait for the page to fully load
-            await page.wait_for_timeout(3000)
+            # Navigate to the main menu page, retrying with backoff while the site's circuit is closed
+            await self.resilience.call(
+                urlsplit(BASE_URL).netloc,
+                lambda: page.goto(BASE_URL, timeout=60000, wait_until='domcontentloaded'),
+                f"Loading the menu page for {dining_hall_id}",
+            )
             
-            # Click the venue button using the data-value attribute
+            # Click the venue button using the data-value attribute, as soon as it is rendered
             venue_button_selector = f'button[data-value="{data_value}"]'
             try:
-                venue_button = page.locator(venue_button_selector)
-                if await venue_button.count() > 0:
-                    await venue_button.click()
-                    self.logger.info(f"Successfully clicked venue button for {dining_hall_id}")
-                    await page.wait_for_timeout(1000)  # Wait for venue to load
-                else:
+                try:
+                    await page.wait_for_selector(venue_button_selector, state='visible', timeout=15000)
+                except Exception:
                     self.logger.error(f"Could not find venue button with selector: {venue_button_selector}")
                     return menu_data
+                mark = await self._settle_mark(page, network)
+                await page.locator(venue_button_selector).click()
+                self.logger.info(f"Successfully clicked venue button for {dining_hall_id}")
+                await self._wait_until_settled(page, network, mark)  # Wait for venue to load
             except Exception as e:
                 self.logger.error(f"Error clicking venue button: {e}")
                 return menu_data
             
             # Set the date using the date input
             date_str = target_date.strftime("%Y-%m-%d")
+            captured_before_date_change = capture.mark()
             try:
                 date_input = page.locator('#date')
+                # Setting the date the page already shows loads nothing new, so there is nothing to wait for
+                mark = await self._settle_mark(page, network) if await date_input.input_value() != date_str else None
                 await date_input.fill(date_str)
                 self.logger.info(f"Successfully set date to {date_str}")
                 
                 # Trigger change event to load new content
                 await date_input.evaluate('el => el.dispatchEvent(new Event("change", { bubbles: true }))')
-                await page.wait_for_timeout(2000)  # Wait for date change to load content
+                await self._wait_until_settled(page, network, mark)  # Wait for date change to load content
             except Exception as e:
                 self.logger.error(f"Error setting date: {e}")
+
+            # Prefer the menu JSON the page itself loaded over rendering and parsing the DOM
+            if SCRAPER_MODE == "network":
+                api_body = await capture.payload_for(target_date, since=captured_before_date_change)
+                transformed_data = await self._transform_body(api_body) if api_body is not None else None
+                if transformed_data:
+                    self.logger.info(f"Captured menu JSON for {dining_hall_id}, skipping DOM parsing")
+                    menu_data[dining_hall_id] = transformed_data
+                    return menu_data
+                self.logger.info(f"No menu JSON captured for {dining_hall_id}, falling back to DOM parsing")
             
             # Try different meal types to get all menu content
             meal_options = ['', 'breakfast', 'lunch', 'dinner', 'brunch']
@@ -121,11 +414,15 @@ class MenuUpdater:
                 try:
                     # Set the meal selector
                     meal_selector = page.locator('#meal')
+                    mark = (
+                        await self._settle_mark(page, network)
+                        if await meal_selector.input_value() != meal_option else None
+                    )
                     await meal_selector.select_option(meal_option)
                     self.logger.info(f"Selected meal: {meal_option if meal_option else 'All Menus'}")
                     
                     # Wait for results to load
-                    await page.wait_for_timeout(3000)
+                    await self._wait_until_settled(page, network, mark)
                     
                     # Wait for the results div to have content
                     try:
@@ -138,125 +435,15 @@ class MenuUpdater:
                         self.logger.warning(f"No results loaded for {meal_option if meal_option else 'All Menus'}")
                         continue
                     
-                    # Get the current page content
-                    content = await page.content()
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    # Find the results div
-                    results_div = soup.find('div', class_='results')
-                    if not results_div:
+                    # Pull only the results subtree out of the page instead of the whole document
+                    results_html = await page.locator('div.results').first.evaluate('el => el.outerHTML')
+                    parsed_menu = await self._parse_results_html(results_html, meal_option if meal_option else "menu")
+                    if parsed_menu is None:
                         self.logger.warning(f"No results div found for {meal_option if meal_option else 'All Menus'}")
                         continue
-                    
-                    # Parse the actual menu structure based on the website HTML
-                    meal_containers = results_div.find_all('div', class_='meal-container')
-                    
-                    for meal_container in meal_containers:
-                        # Get the meal type from data-meal attribute or from the header
-                        meal_type = meal_container.get('data-meal', '')
-                        if not meal_type:
-                            # Try to find meal type from h4 header
-                            meal_header = meal_container.find('p', class_='h4')
-                            if meal_header:
-                                meal_type = meal_header.get_text().strip().lower()
-                        
-                        if not meal_type:
-                            meal_type = meal_option if meal_option else "menu"
-                        
-                        # Initialize meal type in menu_data if not exists
-                        if meal_type not in menu_data[dining_hall_id]:
-                            menu_data[dining_hall_id][meal_type] = []
-                        
-                        # Find all stations within this meal
-                        stations_div = meal_container.find('div', class_='stations')
-                        if stations_div:
-                            stations = stations_div.find_all('div', class_='station')
-                            
-                            for station in stations:
-                                # Get station/section name
-                                station_title = station.find('p', class_='title')
-                                section_name = station_title.get_text().strip() if station_title else "Main"
-                                
-                                # Find all menu items in this station
-                                menu_items_ul = station.find('ul')
-                                if menu_items_ul:
-                                    menu_items = menu_items_ul.find_all('li', class_='js-menu-item')
-                                    
-                                    for item_li in menu_items:
-                                        # Extract item name (first text node)
-                                        item_name = ""
-                                        for content in item_li.contents:
-                                            if isinstance(content, str):
-                                                item_name = content.strip()
-                                                break
-                                        
-                                        if not item_name:
-                                            # Fallback: get all text and try to extract item name
-                                            full_text = item_li.get_text().strip()
-                                            # Remove price if present (usually at the end like "== $0")
-                                            if " == $" in full_text:
-                                                item_name = full_text.split(" == $")[0].strip()
-                                            else:
-                                                item_name = full_text
-                                        
-                                        if item_name and len(item_name) > 1:
-                                            # Extract allergen information from data attributes
-                                            allergens = []
-                                            
-                                            # Get allergens from data-allergens attribute
-                                            allergens_data = item_li.get('data-allergens')
-                                            if allergens_data:
-                                                try:
-                                                    # Parse the JSON-like allergens data
-                                                    allergens_list = json.loads(allergens_data)
-                                                    allergens.extend(allergens_list)
-                                                except:
-                                                    pass
-                                            
-                                            # Also look for allergen icons
-                                            allergen_imgs = item_li.find_all('img', class_='icon')
-                                            for img in allergen_imgs:
-                                                alt_text = img.get('alt', '').strip()
-                                                if alt_text and alt_text not in allergens:
-                                                    allergens.append(alt_text.title())
-                                            
-                                            # Clean up item name
-                                            item_name = item_name.replace('"', '').strip()
-                                            
-                                            menu_item = {
-                                                "name": item_name,
-                                                "labels": allergens,
-                                                "image_url": "",
-                                                "category": section_name,
-                                                "featured": False
-                                            }
-                                            
-                                            menu_data[dining_hall_id][meal_type].append(menu_item)
-                    
-                    # If no meal containers found, try the old parsing method as fallback
-                    if not meal_containers:
-                        self.logger.warning("No meal containers found, trying fallback parsing...")
-                        # Look for any li elements with menu items
-                        all_menu_items = results_div.find_all('li', class_='js-menu-item')
-                        current_meal_type = meal_option if meal_option else "menu"
-                        
-                        if current_meal_type not in menu_data[dining_hall_id]:
-                            menu_data[dining_hall_id][current_meal_type] = []
-                        
-                        for item_li in all_menu_items:
-                            item_name = item_li.get_text().strip()
-                            if " == $" in item_name:
-                                item_name = item_name.split(" == $")[0].strip()
-                            
-                            if item_name and len(item_name) > 1:
-                                menu_item = {
-                                    "name": item_name,
-                                    "labels": [],
-                                    "image_url": "",
-                                    "category": "Main",
-                                    "featured": False
-                                }
-                                menu_data[dining_hall_id][current_meal_type].append(menu_item)
+
+                    for meal_type, meal_items in parsed_menu.items():
+                        menu_data[dining_hall_id].setdefault(meal_type, []).extend(meal_items)
                     
                 except Exception as e:
                     self.logger.error(f"Error processing meal option {meal_option}: {e}")
@@ -276,45 +463,52 @@ class MenuUpdater:
     async def scrape_multiple_days_async(self, days_to_scrape=3):
         """Scrape all dining halls for multiple days using Playwright"""
         all_data = {}
-        
+        start_date = datetime.date.today()
+        jobs = []
+
+        for i in range(days_to_scrape):
+            date = start_date + datetime.timedelta(days=i)
+            all_data.setdefault(date.weekday(), {})
+            for hall in DINING_HALLS:
+                jobs.append((date, hall))
+
+        from playwright.async_api import async_playwright
+
+        self.resilience.start_run(RUN_DEADLINE_SECONDS)
+
         async with async_playwright() as p:
             # Launch browser with debugging options
             browser = await p.chromium.launch(
                 headless=True,  # Run headless for production
                 args=['--no-sandbox', '--disable-web-security']
             )
-            page = await browser.new_page()
-            
-            # Set viewport size
-            await page.set_viewport_size({"width": 1280, "height": 720})
-            
-            # Set user agent to avoid bot detection
-            await page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
-            
-            start_date = datetime.date.today()
-            
-            for i in range(days_to_scrape):
-                date = start_date + datetime.timedelta(days=i)
-                day_of_week = date.weekday()
-                self.logger.info(f"Scraping menus for {date.strftime('%Y-%m-%d')}")
-                
-                for hall in DINING_HALLS:
-                    dining_hall_id = hall["id"]
-                    data_value = hall["data_value"]
-                    
-                    self.logger.info(f"Scraping {hall['name']} for {date.strftime('%Y-%m-%d')}...")
-                    menu_data = await self.scrape_menu_with_playwright(page, dining_hall_id, data_value, date)
-                    
-                    # Store the data by date
-                    if day_of_week not in all_data:
-                        all_data[day_of_week] = {}
-                    
-                    all_data[day_of_week].update(menu_data)
-            
+            contexts = asyncio.Semaphore(SCRAPER_MAX_CONTEXTS)
+
+            async def scrape_job(date, hall):
+                # Each (hall, date) gets its own isolated context so pages never share state
+                async with contexts:
+                    context = await browser.new_context(
+                        viewport={"width": 1280, "height": 720},
+                        # Set user agent to avoid bot detection
+                        user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    )
+                    try:
+                        await context.add_init_script(DOM_MUTATION_TRACKER_JS)
+                        await context.route("**/*", _block_heavy_assets)
+                        page = await context.new_page()
+                        self.logger.info(f"Scraping {hall['name']} for {date.strftime('%Y-%m-%d')}...")
+                        with self.metrics.timer("scrape", hall=hall["id"], date=date.isoformat()):
+                            return await self.scrape_menu_with_playwright(page, hall["id"], hall["data_value"], date)
+                    finally:
+                        await context.close()
+
+            results = await asyncio.gather(*(scrape_job(date, hall) for date, hall in jobs))
             await browser.close()
-        
+
+        # Store the data by date, in job order so the result does not depend on timing
+        for (date, hall), menu_data in zip(jobs, results):
+            all_data[date.weekday()].update(menu_data)
+
         return all_data
     
     def scrape_multiple_days(self, days_to_scrape=3):
@@ -357,183 +551,666 @@ class MenuUpdater:
 
         return all_data
 
-    def clear_existing_data(self):
-        """Clear existing menu data from Supabase tables"""
-        try:
-            # Clear dining_option_menu_items first (foreign key constraint)
-            self.logger.info("Clearing existing dining_option_menu_items...")
-            # Use bulk delete with gte condition to delete all rows (all days >= Monday)
-            result = supabase.table('dining_option_menu_items').delete().gte('day_of_week', 'Monday').execute()
-            self.logger.info(f"Cleared {len(result.data) if result.data else 0} dining_option_menu_items")
-            
-            # Clear menu_items
-            self.logger.info("Clearing existing menu_items...")
-            # Use bulk delete with neq condition on UUID (UUIDs are never empty)
-            result = supabase.table('menu_items').delete().neq('menu_item_uuid', '00000000-0000-0000-0000-000000000000').execute()
-            self.logger.info(f"Cleared {len(result.data) if result.data else 0} menu_items")
-            
-            self.logger.info("Successfully cleared existing data")
-        except Exception as e:
-            self.logger.error(f"Error clearing existing data: {str(e)}")
-            raise
-
     def _transform_api_data(self, api_data):
         """
         Transforms the raw API JSON into the format required by the Supabase uploader.
         It specifically handles 'Brunch' by copying its items to both 'Breakfast' and 'Lunch'.
         """
-        formatted_menu = {}
-        if "meals" not in api_data or not isinstance(api_data["meals"], list):
-            self.logger.warning("API data does not contain a 'meals' list. Skipping.")
-            return formatted_menu
+        return transform_api_data(api_data, self.item_normalizer)
 
-        for meal in api_data["meals"]:
-            meal_name = meal.get("name", "").lower()
-            
-            if "stations" not in meal or not meal["stations"]:
-                continue
+    async def _transform_body(self, body):
+        """Decode and transform an API response body; large ones go to the parse pool"""
+        if self.parse_pool.enabled and len(body) >= PARSE_POOL_MIN_BYTES:
+            return await self.parse_pool.transform(body)
+        return self._transform_api_data(json.loads(body))
 
-            # Process all items for the current meal into a temporary list
-            current_meal_items = []
-            for station in meal.get("stations", []):
-                station_name = station.get("station", "General")
-                
-                for item in station.get("menu", []):
-                    item_name = item.get("item", "").strip()
-                    
-                    if not item_name or (item_name.isupper() and len(item_name.split()) <= 4):
-                        continue
+    async def _parse_results_html(self, html, default_meal_type):
+        """Parse a scraped ``.results`` subtree, in the parse pool when it is enabled"""
+        if self.parse_pool.enabled:
+            return await self.parse_pool.parse_html(html, default_meal_type)
+        return self.menu_parser.parse(html, default_meal_type)
 
-                    labels = set()
-                    for pref in item.get("preferences", []):
-                        formatted_pref = pref.replace('-', ' ').title()
-                        labels.add(formatted_pref)
-                    for allergen in item.get("allergens", []):
-                        labels.add(allergen.capitalize())
-                    
-                    formatted_item = {
-                        "name": item_name,
-                        "labels": sorted(list(labels)),
-                        "image_url": "",
-                        "category": station_name,
-                        "featured": False
-                    }
-                    current_meal_items.append(formatted_item)
-
-            # If we found items, distribute them according to the new logic
-            if not current_meal_items:
-                continue
-
-            if meal_name == "brunch":
-                self.logger.info("Found 'Brunch' menu. Copying items to 'Breakfast' and 'Lunch'.")
-                # Use setdefault to safely create list if not exists, then extend
-                formatted_menu.setdefault("breakfast", []).extend(current_meal_items)
-                formatted_menu.setdefault("lunch", []).extend(current_meal_items)
-            else:
-                # For all other meals (dinner, etc.), add them normally.
-                # This also correctly handles if the API provides a separate "Breakfast" or "Lunch".
-                formatted_menu.setdefault(meal_name, []).extend(current_meal_items)
+    def _menu_fetcher(self):
+        """A pooled HTTP client for the menu API; httpx is imported on first use"""
+        from menu_fetcher import MenuFetcher
 
-        return formatted_menu
+        host_limits = {}
+        for source in self.venues.sources.values():
+            base_url = source["url"] or API_BASE_URL
+            if base_url:
+                host_limits[urlsplit(base_url).netloc] = source
+        return MenuFetcher(
+            API_MAX_CONCURRENCY, API_MAX_PER_HOST, resilience=self.resilience, host_limits=host_limits
+        )
 
-    def fetch_data_from_api(self, days_to_fetch=3):
-        """Fetches menu data for all dining halls from the new API for a specified number of days."""
-        all_data = {}
+    async def _fetch_hall_payload(self, fetcher, hall, date):
+        """Fetch one dining hall's menu for one date.
+
+        Returns a dict holding either the raw ``body`` of a new response or,
+        when the cache shows the menu is unchanged, the cached
+        ``transformed`` menu. If the request fails for good, the cached menu
+        is served stale rather than dropping the (date, hall) from the
+        update; without one, returns None. A 404 means no menu is published
+        for that day and also returns None.
+        """
+        import httpx
+
+        url = menu_api_url(hall, date)
+        self.logger.info(f"Requesting data for {hall['name']} from {url}")
+
+        response = None
+        cached = self.response_cache.get(url)
+        try:
+            with self.metrics.timer("fetch", hall=hall["id"], date=date.isoformat()):
+                response = await fetcher.get(url, headers=ResponseCache.conditional_headers(cached))
+            self.metrics.inc("api_requests", hall=hall["id"], status=response.status_code)
+            self.metrics.inc("api_bytes", len(response.content), hall=hall["id"])
+
+            if response.status_code == 304 and cached:
+                self.logger.info(f"{hall['name']} on {date} not modified, reusing cached menu")
+                self.metrics.inc("cache_hits", kind="not_modified")
+                self.response_cache.refresh(url, cached, response.headers)
+                return {"transformed": menu_from_json(cached["transformed"])}
+
+            if response.status_code == 404:
+                # No menu for this day, e.g. the hall is closed; cached as empty so the
+                # scheduler counts it as refreshed and waits for its tier interval
+                self.logger.info(f"No menu published for {hall['name']} on {date}")
+                self.response_cache.put(url, response.headers, None, {})
+                return None
+
+            response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
+
+            body_hash = ResponseCache.hash_body(response.content)
+            if cached and cached["body_hash"] == body_hash:
+                self.logger.info(f"{hall['name']} on {date} unchanged, reusing cached menu")
+                self.metrics.inc("cache_hits", kind="same_body")
+                self.response_cache.refresh(url, cached, response.headers)
+                return {"transformed": menu_from_json(cached["transformed"])}
+
+            return {
+                "url": url,
+                "body": response.content,
+                "headers": response.headers,
+                "body_hash": body_hash,
+            }
+
+        except (httpx.HTTPError, UnavailableError) as e:
+            self.logger.error(f"Failed to fetch data for {hall['name']} on {date}: {e}")
+            self.metrics.inc("api_errors", hall=hall["id"])
+            if cached:
+                self.logger.warning(f"Keeping the cached menu for {hall['name']} on {date}")
+                self.metrics.inc("stale_menus_served", hall=hall["id"])
+                return {"transformed": menu_from_json(cached["transformed"])}
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred for {hall['name']} on {date}: {e}")
+
+        return None
+
+    async def _fetch_due_payload(self, fetcher, hall, date, due=None):
+        """Like _fetch_hall_payload, but a slice not in ``due`` is served from the cache.
+
+        ``due`` is a set of ``(date, hall_id)``; None fetches everything. A
+        slice that is not due but has no cached menu is fetched anyway, so
+        the published menu stays complete.
+        """
+        if due is not None and (date, hall["id"]) not in due:
+            cached = self.response_cache.get(menu_api_url(hall, date))
+            if cached:
+                self.metrics.inc("cache_hits", kind="not_due")
+                return {"transformed": menu_from_json(cached["transformed"])}
+        return await self._fetch_hall_payload(fetcher, hall, date)
+
+    async def _transform_payload(self, hall, date, payload):
+        """Turn a fetched payload into our menu format, caching new transforms"""
+        if payload is None:
+            return None
+
+        try:
+            transformed_data = payload.get("transformed")
+            if "body" in payload:
+                # Transform the raw data to our internal format
+                with self.metrics.timer("transform", hall=hall["id"]):
+                    transformed_data = await self._transform_body(payload["body"])
+                self.response_cache.put(
+                    payload["url"], payload["headers"], payload["body_hash"], menu_to_json(transformed_data)
+                )
+
+            if transformed_data:
+                self.metrics.inc("items", sum(len(items) for items in transformed_data.values()), hall=hall["id"])
+                return transformed_data
+            self.logger.warning(f"No valid menu data returned for {hall['name']} on {date}")
+        except json.JSONDecodeError:
+            self.logger.error(f"Failed to parse JSON for {hall['name']} on {date}. Response was: {payload['body'][:200]!r}")
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred for {hall['name']} on {date}: {e}")
+
+        return None
+
+    async def _fetch_hall_menu(self, fetcher, hall, date, due=None):
+        """Fetch and transform one dining hall's menu for one date"""
+        payload = await self._fetch_due_payload(fetcher, hall, date, due)
+        return await self._transform_payload(hall, date, payload)
+
+    def _save_fetch_caches(self):
+        removed = self.response_cache.evict()
+        if removed:
+            self.logger.info(f"Evicted {removed} entries from the response cache")
+
+        normalizer = self.item_normalizer
+        self.metrics.inc("normalizer_hits", normalizer.hits)
+        self.metrics.inc("normalizer_misses", normalizer.misses)
+        normalizer.hits = normalizer.misses = 0
+        try:
+            normalizer.save()
+        except OSError as e:
+            self.logger.warning(f"Could not save the item normalizer cache: {e}")
+
+    def _open_history(self, source="api"):
+        """Open the local menu history for this run, or None if it is unavailable"""
+        try:
+            history = MenuHistory(HISTORY_DB)
+            history.begin_run(source)
+            return history
+        except Exception as e:
+            self.logger.warning(f"Menu history disabled for this run: {e}")
+            return None
+
+    def _record_history(self, history, date, hall_id, menu):
+        """Append one (date, hall) menu to the history; failures never stop an update"""
+        if history is None:
+            return
+        try:
+            with self.metrics.timer("history", hall=hall_id):
+                added, removed = history.record_menu(date, hall_id, menu)
+            self.metrics.inc("history_listings_added", added)
+            self.metrics.inc("history_listings_removed", removed)
+        except Exception as e:
+            self.logger.warning(f"Could not record {hall_id} on {date} in the menu history: {e}")
+
+    def _begin_search_index(self):
+        """The search index, loaded from the state directory on first use, ready for this run's menus"""
+        if self.search_index is None:
+            self.search_index = SearchIndex.load(os.path.join(STATE_DIR, "search_index.json"))
+        self.search_index.begin_run()
+        return self.search_index
+
+    def _rebuild_search_index(self, data):
+        """Index every menu of ``data`` as one run"""
+        search_index = self._begin_search_index()
+        for weekday, locations in data.items():
+            for location, menu in locations.items():
+                search_index.add_menu(weekday, location, menu)
+        self._finish_search_index()
+
+    def _finish_search_index(self):
+        """Drop items no longer served and save the index for the next run"""
+        added, removed = self.search_index.finish_run()
+        self.metrics.inc("search_items_added", added)
+        self.metrics.inc("search_items_removed", removed)
+        self.metrics.set("search_items", len(self.search_index))
+        self.logger.info(f"Search index: {added} items added, {removed} removed, {len(self.search_index)} total")
+        try:
+            self.search_index.save(os.path.join(STATE_DIR, "search_index.json"))
+        except OSError as e:
+            self.logger.warning(f"Could not save the search index: {e}")
+
+    async def fetch_menus_async(self, jobs, due=None, deadline_seconds=None):
+        """Fetch and transform the menu of each ``(date, hall)`` in ``jobs`` concurrently.
+
+        Returns the menus (None where none was found) in job order, so the
+        output does not depend on completion order. ``deadline_seconds``
+        bounds the whole fetch; None means no deadline.
+        """
+        self.resilience.start_run(deadline_seconds)
+        async with self._menu_fetcher() as fetcher:
+            return await asyncio.gather(
+                *(self._fetch_hall_menu(fetcher, hall, date, due) for date, hall in jobs)
+            )
+
+    async def fetch_data_from_api_async(self, days_to_fetch=3, due=None):
+        """Fetch every (day, hall) menu concurrently over one pooled connection set.
+
+        Returns a :class:`MenuIndex`, read like ``data[weekday][hall][meal_type]``.
+        With ``due``, only those (date, hall) slices are requested; the rest
+        come from the response cache.
+        """
+        all_data = MenuIndex()
         start_date = datetime.date.today()
+        jobs = []
 
         for i in range(days_to_fetch):
             date = start_date + datetime.timedelta(days=i)
-            day_of_week = date.weekday()
-            
-            # Format date for the API URL
-            year = date.strftime("%Y")
-            month = date.strftime("%m")
-            day = date.strftime("%d")
-            
             self.logger.info(f"Fetching menus from API for {date.strftime('%Y-%m-%d')}")
-
-            if day_of_week not in all_data:
-                all_data[day_of_week] = {}
-            
             for hall in DINING_HALLS:
-                hall_id = hall["id"]
-                api_hall_name = hall["data_value"]
-                
-                # Construct the full API URL
-                url = f"{API_BASE_URL}{api_hall_name}?y={year}&m={month}&d={day}"
-                self.logger.info(f"Requesting data for {hall['name']} from {url}")
-                
-                try:
-                    response = requests.get(url, timeout=15)
-                    response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-                    
-                    api_json = response.json()
+                jobs.append((date, hall))
 
-                    # Transform the raw data to our internal format
-                    transformed_data = self._transform_api_data(api_json)
-                    
-                    if transformed_data:
-                         all_data[day_of_week][hall_id] = transformed_data
-                    else:
-                        self.logger.warning(f"No valid menu data returned for {hall['name']} on {date}")
-
-                except requests.exceptions.RequestException as e:
-                    self.logger.error(f"Failed to fetch data for {hall['name']} on {date}: {e}")
-                except json.JSONDecodeError:
-                    self.logger.error(f"Failed to parse JSON for {hall['name']} on {date}. Response was: {response.text}")
-                except Exception as e:
-                    self.logger.error(f"An unexpected error occurred for {hall['name']} on {date}: {e}")
+        results = await self.fetch_menus_async(jobs, due, RUN_DEADLINE_SECONDS)
+        self._save_fetch_caches()
+
+        # Assemble in request order so the output does not depend on completion order
+        history = self._open_history()
+        try:
+            for (date, hall), transformed_data in zip(jobs, results):
+                if transformed_data:
+                    all_data.add_menu(date.weekday(), hall["id"], transformed_data)
+                    self._record_history(history, date, hall["id"], transformed_data)
+        finally:
+            if history:
+                history.close()
 
         return all_data
 
-    def upload_to_supabase(self, data):
-        """Upload menu data directly to Supabase"""
+    def fetch_data_from_api(self, days_to_fetch=3, due=None):
+        """Fetches menu data for all dining halls from the new API for a specified number of days."""
+        return asyncio.run(self.fetch_data_from_api_async(days_to_fetch, due))
+
+    async def _fetch_shard(self, jobs):
+        """Fetch one backfill shard of ``(date_iso, venue_id)`` jobs.
+
+        Returns ``(date_iso, venue_id, menu_json)`` rows, ``menu_json`` being
+        None where no menu was found. Backfills have no run deadline.
+        """
+        venues = {venue["id"]: venue for venue in self.venues.venues}
+        menus = await self.fetch_menus_async(
+            [(datetime.date.fromisoformat(date), venues[venue_id]) for date, venue_id in jobs]
+        )
+        return [
+            (date, venue_id, menu_to_json(menu) if menu else None)
+            for (date, venue_id), menu in zip(jobs, menus)
+        ]
+
+    def backfill(self, start_date, days, venue_ids=None, workers=1):
+        """Fetch ``days`` days of menus from ``start_date`` into the local menu history.
+
+        Each source's (date, venue) jobs are dealt round-robin to
+        ``workers`` processes, each with a ``1 / workers`` share of every
+        source's rate and concurrency limits, so more workers spread the
+        transforms over more cores without sending the upstream more
+        requests. The results are merged in sorted order and this process
+        alone writes the history, so the outcome does not depend on
+        ``workers``. Supabase is not touched: published menus only cover the
+        coming week. Returns the number of menus recorded.
+        """
+        venues = self.venues.select(venue_ids)
+        jobs = sorted(
+            ((start_date + datetime.timedelta(days=i)).isoformat(), venue["id"])
+            for i in range(days)
+            for venue in venues
+        )
+        workers = max(1, min(workers, len(jobs)))
+        self.logger.info(f"Backfilling {len(jobs)} menus from {start_date} over {workers} worker(s)")
+
         try:
-            # Clear existing data first
-            self.clear_existing_data()
-            
-            menu_items = []
-            dining_option_menu_items = []
-
-            for weekday, locations in data.items():
-                for location, meals in locations.items():
-                    for meal_type, meal_items in meals.items():
-                        for item in meal_items:
-                            menu_item_uuid = str(uuid4())
-
-                            menu_items.append({
-                                "menu_item_uuid": menu_item_uuid,
-                                "name": item.get("name", ""),
-                                "image_url": item.get("image_url", ""),
-                                "category": item.get("category", ""),
-                                "featured": item.get("featured", False),
-                                "labels": item.get("labels", []),  # Keep as proper array
-                            })
-
-                            # Capitalize meal type to match app expectations
-                            capitalized_meal_type = meal_type.capitalize()
-                            
-                            dining_option_menu_items.append({
-                                "day_of_week": weekday_strs[int(weekday)],
-                                "dining_option_string_id": location,
-                                "menu_item_uuid": menu_item_uuid,
-                                "meal_type": capitalized_meal_type,
-                            })
-
-            # Upload menu items in batches
-            self.logger.info(f"Uploading {len(menu_items)} menu items...")
-            batch_size = 100
-            for i in range(0, len(menu_items), batch_size):
-                batch = menu_items[i:i + batch_size]
-                result = supabase.table('menu_items').insert(batch).execute()
-                self.logger.info(f"Uploaded batch {i//batch_size + 1}/{(len(menu_items) + batch_size - 1)//batch_size}")
-
-            # Upload dining option menu items in batches
-            self.logger.info(f"Uploading {len(dining_option_menu_items)} dining option menu items...")
-            for i in range(0, len(dining_option_menu_items), batch_size):
-                batch = dining_option_menu_items[i:i + batch_size]
-                result = supabase.table('dining_option_menu_items').insert(batch).execute()
-                self.logger.info(f"Uploaded batch {i//batch_size + 1}/{(len(dining_option_menu_items) + batch_size - 1)//batch_size}")
+            with self.metrics.stage("backfill"):
+                if workers == 1:
+                    rows = asyncio.run(self._fetch_shard(jobs))
+                else:
+                    # Shard per source, so each worker's jobs match its share of every source's limits
+                    by_source = {}
+                    for job in jobs:
+                        by_source.setdefault(self.venues.source_of(job[1]), []).append(job)
+                    shards = [
+                        sorted(job for source_jobs in by_source.values() for job in source_jobs[i::workers])
+                        for i in range(workers)
+                    ]
+                    shares = self.venues.split(workers)
+                    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                        results = pool.map(_backfill_shard, shards, [shares] * workers)
+                        rows = sorted(row for shard in results for row in shard)
+            self._save_fetch_caches()
+
+            recorded = 0
+            history = self._open_history("backfill")
+            try:
+                for date, venue_id, menu in rows:
+                    if menu is None:
+                        self.logger.warning(f"No menu found for {venue_id} on {date}")
+                        continue
+                    self._record_history(history, datetime.date.fromisoformat(date), venue_id, menu_from_json(menu))
+                    recorded += 1
+            finally:
+                if history:
+                    history.close()
+            self.metrics.set("backfill_menus", recorded)
+            self.logger.info(f"Backfill recorded {recorded} of {len(jobs)} menus in {HISTORY_DB}")
+            return recorded
+        finally:
+            self.parse_pool.close()
+            self.export_metrics()
+
+    def _fetch_all_rows(self, table, columns, order_by, filters=None, page_size=1000):
+        """Read every row of ``table`` matching ``filters``, paging past the API's per-request row limit.
+
+        A filter value that is a list matches any of its values.
+        """
+        rows = []
+        start = 0
+        while True:
+            query = get_supabase().table(table).select(columns)
+            for column, value in (filters or {}).items():
+                query = query.in_(column, value) if isinstance(value, list) else query.eq(column, value)
+            for column in order_by:
+                query = query.order(column)
+            batch = query.range(start, start + page_size - 1).execute().data or []
+            rows.extend(batch)
+            if len(batch) < page_size:
+                return rows
+            start += page_size
+
+    def fetch_server_state(self, menu_version=None, slices=None):
+        """Read menu_items and the dining_option_menu_items rows (of one version, if given).
+
+        With ``slices``, a set of ``(day_of_week, hall_id)``, only those
+        slices' links are read, and only the menu_items they reference.
+        """
+        filters = {} if menu_version is None else {'menu_version': menu_version}
+        if slices is not None:
+            if not slices:
+                return [], []
+            filters['day_of_week'] = sorted({day for day, _ in slices})
+            filters['dining_option_string_id'] = sorted({hall_id for _, hall_id in slices})
+        links = self._fetch_all_rows(
+            'dining_option_menu_items',
+            'day_of_week,dining_option_string_id,menu_item_uuid,meal_type',
+            ['day_of_week', 'dining_option_string_id', 'meal_type', 'menu_item_uuid'],
+            filters=filters,
+        )
+        if slices is None:
+            items = self._fetch_all_rows('menu_items', MENU_ITEM_COLUMNS, ['menu_item_uuid'])
+        else:
+            # The day and hall filters also match other pairings of the same days and halls
+            links = [link for link in links if (link['day_of_week'], link['dining_option_string_id']) in slices]
+            uuids = sorted({link['menu_item_uuid'] for link in links})
+            items = [
+                row
+                for i in range(0, len(uuids), 100)
+                for row in self._fetch_all_rows(
+                    'menu_items', MENU_ITEM_COLUMNS, ['menu_item_uuid'],
+                    filters={'menu_item_uuid': uuids[i:i + 100]},
+                )
+            ]
+        self.logger.info(f"Read {len(items)} menu_items and {len(links)} dining_option_menu_items from Supabase")
+        return items, links
+
+    def _label_bits_for(self, data):
+        """The stable label bit assignments, extended with a bit for every new label in ``data``"""
+        if self.label_bits is None:
+            self.label_bits = LabelBits(self._fetch_all_rows('menu_labels', 'label,bit', ['bit']))
+        new_labels = self.label_bits.assign(collect_labels(data))
+        if new_labels:
+            try:
+                self.bulk_writer.write('menu_labels', new_labels)
+            except Exception:
+                self.label_bits = None  # re-read the assignments that did land
+                raise
+            assigned = ", ".join(f"{row['label']}={row['bit']}" for row in new_labels)
+            self.logger.info(f"Assigned label bits: {assigned}")
+        return self.label_bits
+
+    def _delete_items(self, uuids, batch_size=100):
+        """Delete menu_items rows by uuid"""
+        self.bulk_writer.run([
+            get_supabase().table('menu_items').delete().in_('menu_item_uuid', uuids[i:i + batch_size]).execute
+            for i in range(0, len(uuids), batch_size)
+        ])
+
+    def full_reload_to_supabase(self, data):
+        """Rewrite every row of ``data`` as a new menu version and make it live.
+
+        Unlike ``publish_versioned`` nothing is diffed against the live
+        version: every menu item is upserted and every link and document is
+        written afresh, so rows a diff would trust are repaired too. Older
+        versions are left to the garbage collector.
+        """
+        live_version = self._live_version()
+        label_bits = self._label_bits_for(data)
+        menu_items, dining_option_menu_items = build_menu_rows(data, label_bits)
+        self._rebuild_search_index(data)
+
+        version = self._start_version(live_version)
+        try:
+            self.logger.info(
+                f"Uploading {len(menu_items)} menu items and {len(dining_option_menu_items)} dining option menu items..."
+            )
+            self._write_version_rows(
+                version, menu_items, [], dining_option_menu_items, build_menu_documents(data, label_bits),
+                item_method="upsert",
+            )
+            self._publish_search_index(version)
+            self._activate_version(version, live_version)
+        except Exception:
+            self._fail_version(version, live_version)
+            raise
+
+    def _live_version(self):
+        result = get_supabase().table('menu_current_version').select('version').limit(1).execute()
+        return result.data[0]['version'] if result.data else None
+
+    def _next_version(self):
+        result = get_supabase().table('menu_versions').select('version').order('version', desc=True).limit(1).execute()
+        return result.data[0]['version'] + 1 if result.data else 1
+
+    def _has_menu_documents(self, version):
+        result = get_supabase().table('menu_documents').select('menu_key').eq('menu_version', version).limit(1).execute()
+        return bool(result.data)
+
+    def _has_search_index(self, version):
+        result = get_supabase().table('menu_search_indexes').select('menu_version').eq('menu_version', version).execute()
+        return bool(result.data)
+
+    def _publish_search_index(self, version):
+        with self.metrics.timer("upload_search_index"):
+            self.bulk_writer.write('menu_search_indexes', [
+                {"menu_version": version, "search_index": self.search_index.to_json()}
+            ])
+
+    def _start_version(self, live_version):
+        """Register a new menu version in the 'building' state and return its number"""
+        version = self._next_version()
+        get_supabase().table('menu_versions').insert({"version": version, "status": "building"}).execute()
+        self.logger.info(f"Building menu version {version} beside live version {live_version}...")
+        return version
+
+    def _write_version_rows(self, version, items_to_insert, items_to_upsert, links, documents,
+                            item_method="insert"):
+        """Write one version's rows; links follow the items they reference"""
+        self.bulk_writer.write_dependent(
+            'menu_items', items_to_insert,
+            'dining_option_menu_items', [{**link, "menu_version": version} for link in links],
+            'menu_item_uuid', parent_method=item_method,
+        )
+        self.bulk_writer.write('menu_items', items_to_upsert, method="upsert")
+        self.bulk_writer.write('menu_documents', [
+            {**document, "menu_version": version} for document in documents
+        ])
+
+    def _fail_version(self, version, live_version):
+        self.logger.error(f"Failed to build menu version {version}; version {live_version} stays live")
+        try:
+            get_supabase().table('menu_versions').update({"status": "failed"}).eq('version', version).execute()
+        except Exception as e:
+            self.logger.error(f"Could not mark menu version {version} as failed: {e}")
+
+    def _activate_version(self, version, live_version):
+        """Point readers at ``version`` and garbage-collect old versions in the background"""
+        if not self._has_menu_documents(version):
+            # The app reads only current_menu_documents, so this version would serve no menus
+            raise RuntimeError(f"Menu version {version} has no menu documents")
+        # Single-row update: readers switch from the old version to the new one atomically
+        get_supabase().table('menu_current_version').upsert({"id": True, "version": version}).execute()
+        get_supabase().table('menu_versions').update({"status": "live"}).eq('version', version).execute()
+        if live_version is not None:
+            get_supabase().table('menu_versions').update({"status": "retired"}).eq('version', live_version).execute()
+        self.logger.info(f"Menu version {version} is now live (was {live_version})")
+
+        self._gc_thread = threading.Thread(
+            target=self.collect_old_versions, args=(version,), name="menu-version-gc"
+        )
+        self._gc_thread.start()
+
+    def publish_versioned(self, data, force=False):
+        """Write ``data`` as a new menu version beside the live one, then switch to it.
+
+        Each version also gets one menu_documents row per (day, hall, meal).
+        Readers go through the current_* views and never see a half-written
+        menu. If any write fails the pointer is not moved and the
+        previous version stays live. Nothing is written when the live version
+        already matches ``data`` unless ``force`` is set.
+        """
+        live_version = self._live_version()
+        server_items, live_links = self.fetch_server_state(menu_version=live_version)
+        label_bits = self._label_bits_for(data)
+        diff = compute_menu_diff(data, server_items, live_links, label_bits)
+        self.logger.info(f"Menu diff against live version {live_version}: {diff.summary()}")
+
+        self._rebuild_search_index(data)
+
+        # Items not used by the live version may still belong to older versions; GC handles them
+        if not force and diff.is_empty() \
+                and self._has_menu_documents(live_version) and self._has_search_index(live_version):
+            self.logger.info(f"Live menu version {live_version} is already up to date")
+            return
+
+        version = self._start_version(live_version)
+        try:
+            self._write_version_rows(
+                version, diff.items_to_insert, diff.items_to_upsert,
+                diff.desired_links, build_menu_documents(data, label_bits),
+            )
+            self._publish_search_index(version)
+            self._activate_version(version, live_version)
+        except Exception:
+            self._fail_version(version, live_version)
+            raise
+
+    def begin_streaming_publish(self, scope=None):
+        """Read the live version once and return the state for publish_slice.
+
+        ``scope`` limits the read to those ``(day_of_week, hall_id)`` slices;
+        the others are published as they are carried over.
+        """
+        live_version = self._live_version()
+        server_items, live_links = self.fetch_server_state(menu_version=live_version, slices=scope)
+        build = VersionBuild(live_version, server_items, live_links, scope)
+        if not (self._has_menu_documents(live_version) and self._has_search_index(live_version)):
+            # Live version predates menu documents or search indexes; republish everything
+            build.version = self._start_version(live_version)
+        return build
+
+    def _write_slice(self, build, weekday, location, menu):
+        menu_items, dining_option_menu_items = build_menu_rows({weekday: {location: menu}}, self.label_bits)
+        items_to_insert, items_to_upsert = build.split_items(menu_items)
+        self._write_version_rows(
+            build.version, items_to_insert, items_to_upsert,
+            dining_option_menu_items, build_menu_documents({weekday: {location: menu}}, self.label_bits),
+            item_method=build.new_item_method,
+        )
+        build.links_written += len(dining_option_menu_items)
+
+    def publish_slice(self, build, backup, weekday, location, menu, backup_offset):
+        """Upload stage: add one (day, hall) menu to the version being built.
+
+        Unchanged slices are held back as backup offsets until the first
+        changed slice appears; they are then re-read from the backup and
+        written, so memory does not grow with the number of slices.
+        """
+        slice_data = {weekday: {location: menu}}
+        menu_items, dining_option_menu_items = build_menu_rows(slice_data, self._label_bits_for(slice_data))
+        changed = build.slice_changed(menu_items, dining_option_menu_items, weekday_name(weekday), location)
+
+        if build.version is None:
+            if not changed:
+                build.pending.append(backup_offset)
+                return
+            build.version = self._start_version(build.live_version)
+            self._flush_pending_slices(build, backup)
+
+        self._write_slice(build, weekday, location, menu)
+
+    def _flush_pending_slices(self, build, backup):
+        for offset in build.pending:
+            self._write_slice(build, *backup.read_slice(offset))
+        build.pending = []
+
+    def finish_streaming_publish(self, build, backup):
+        """Make the streamed version live, or do nothing if the menu did not change"""
+        dropped = build.dropped_slices()
+        if build.version is None:
+            if not dropped:
+                self.logger.info(f"Live menu version {build.live_version} is already up to date")
+                return
+            build.version = self._start_version(build.live_version)
+            self._flush_pending_slices(build, backup)
+        self._publish_search_index(build.version)
+
+        if dropped:
+            self.logger.info(f"{len(dropped)} (day, hall) menus from the live version are no longer served")
+        self.logger.info(f"Menu version {build.version} holds {build.links_written} dining option menu items")
+        self._activate_version(build.version, build.live_version)
+
+    def collect_old_versions(self, live_version, keep=KEEP_MENU_VERSIONS):
+        """Delete versions older than the newest ``keep`` ones and the items only they used.
+
+        Failed versions go too, and so do versions left 'building' for
+        ABANDONED_BUILD_SECONDS by a run that never finished them.
+        """
+        try:
+            result = get_supabase().table('menu_versions').select(
+                'version,status,created_at'
+            ).order('version', desc=True).execute()
+            rows = result.data or []
+            abandoned_before = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+                seconds=ABANDONED_BUILD_SECONDS
+            )
+            dead = {
+                row['version'] for row in rows
+                if row['version'] != live_version and (
+                    row['status'] == 'failed'
+                    or row['status'] == 'building' and row.get('created_at') is not None
+                    and datetime.datetime.fromisoformat(row['created_at']) < abandoned_before
+                )
+            }
+            versions = [row['version'] for row in rows if row['version'] not in dead]
+            recent = [v for v in versions if v <= live_version][:keep]
+            # Otherwise only versions strictly older than the live one; a newer one may be mid-build
+            stale = sorted(dead | {v for v in versions if v < live_version and v not in recent}, reverse=True)
+            if not stale:
+                return
+
+            for version in stale:
+                get_supabase().table('menu_documents').delete().eq('menu_version', version).execute()
+                get_supabase().table('menu_search_indexes').delete().eq('menu_version', version).execute()
+                get_supabase().table('dining_option_menu_items').delete().eq('menu_version', version).execute()
+                get_supabase().table('menu_versions').delete().eq('version', version).execute()
+            self.logger.info(f"Garbage-collected menu versions {stale}")
+
+            server_items, server_links = self.fetch_server_state()
+            referenced = {link['menu_item_uuid'] for link in server_links}
+            orphans = [row['menu_item_uuid'] for row in server_items if row['menu_item_uuid'] not in referenced]
+            if orphans:
+                self._delete_items(orphans)
+                self.logger.info(f"Deleted {len(orphans)} menu_items no longer used by any version")
+        except Exception as e:
+            self.logger.error(f"Error garbage-collecting old menu versions: {e}")
+
+    def upload_to_supabase(self, data, mode=None):
+        """Upload menu data to Supabase.
+
+        ``mode`` is ``versioned`` (write the changes as a new version and
+        swap it in) or ``full`` (rewrite every row as a new version). It
+        defaults to ``MENU_UPLOAD_MODE``. Both write the version's menu
+        documents, which is all the app reads.
+        """
+        mode = mode or UPLOAD_MODE
+        try:
+            with self.metrics.stage("upload", mode=mode):
+                if mode == "full":
+                    self.full_reload_to_supabase(data)
+                elif mode == "versioned":
+                    self.publish_versioned(data)
+                else:
+                    raise ValueError(f"Unknown upload mode {mode!r}; use versioned or full")
 
             self.logger.info("Successfully uploaded all data to Supabase")
             return True
@@ -543,83 +1220,221 @@ class MenuUpdater:
             return False
 
     def save_backup_files(self, data):
-        """Save backup JSON and CSV files"""
+        """Save compressed backup JSON-lines and CSV files with a manifest"""
         try:
-            # Save JSON backup
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            json_filename = f"usc_dining_menus_{timestamp}.json"
-            
-            with open(json_filename, "w") as f:
-                json.dump(data, f, indent=4)
-            self.logger.info(f"Saved backup JSON: {json_filename}")
-
-            # Generate CSV files for backup
-            menu_items = []
-            dining_option_menu_items = []
-
-            for weekday, locations in data.items():
-                for location, meals in locations.items():
-                    for meal_type, meal_items in meals.items():
-                        for item in meal_items:
-                            menu_item_uuid = str(uuid4())
-
-                            menu_items.append([
-                                menu_item_uuid,
-                                item.get("name", ""),
-                                item.get("image_url", ""),
-                                item.get("category", ""),
-                                item.get("featured", False),
-                                json.dumps(item.get("labels", [])),  # Convert to JSON string for CSV
-                            ])
-
-                            # Capitalize meal type to match app expectations
-                            capitalized_meal_type = meal_type.capitalize()
-                            
-                            dining_option_menu_items.append([
-                                weekday_strs[int(weekday)],
-                                location,
-                                menu_item_uuid,
-                                capitalized_meal_type,
-                            ])
-
-            # Save CSV backups
-            menu_csv = f"menu_items_{timestamp}.csv"
-            with open(menu_csv, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["menu_item_uuid", "name", "image_url", "category", "featured", "labels"])
-                writer.writerows(menu_items)
-            self.logger.info(f"Saved backup CSV: {menu_csv}")
-
-            dining_csv = f"dining_option_menu_items_{timestamp}.csv"
-            with open(dining_csv, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["day_of_week", "dining_option_string_id", "menu_item_uuid", "meal_type"])
-                writer.writerows(dining_option_menu_items)
-            self.logger.info(f"Saved backup CSV: {dining_csv}")
+            backup = StreamingBackupWriter(backup_timestamp(), BACKUP_DIR)
+            try:
+                for weekday, locations in data.items():
+                    for location, menu in locations.items():
+                        with self.metrics.timer("backup", hall=location):
+                            backup.write_slice(weekday, location, menu)
+                backup.complete = True
+            finally:
+                saved = backup.close()
+            if saved:
+                self.logger.info(f"Saved backup {backup.manifest_path}")
 
         except Exception as e:
             self.logger.error(f"Error saving backup files: {str(e)}")
 
-    def run_update(self):
-        """Run the complete menu update process"""
+    async def stream_update(self, days_to_fetch=DAYS_TO_FETCH, due=None):
+        """Fetch, transform, back up and upload each (date, hall) menu as a pipeline.
+
+        Stages are connected by bounded queues, so fetches overlap database
+        writes and a slow stage applies backpressure instead of letting
+        results pile up in memory. With ``due`` (a set of ``(date, hall_id)``)
+        only those menus, and any missing from the response cache, are
+        requested and compared with the live version; the others are carried
+        over from the cache, so the new version is still complete.
+        """
+        start_date = datetime.date.today()
+        jobs = [
+            (start_date + datetime.timedelta(days=i), hall)
+            for i in range(days_to_fetch)
+            for hall in DINING_HALLS
+        ]
+        scope = None
+        if due is not None:
+            due = {
+                (date, hall["id"]) for date, hall in jobs
+                if (date, hall["id"]) in due or self.response_cache.get(menu_api_url(hall, date)) is None
+            }
+            scope = {(weekday_name(date.weekday()), hall_id) for date, hall_id in due}
+        jobs = iter(jobs)
+        fetched = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        transformed = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        backed_up = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+
+        backup = StreamingBackupWriter(backup_timestamp(), BACKUP_DIR)
+        history = self._open_history()
+        search_index = self._begin_search_index()
+        build = await asyncio.to_thread(self.begin_streaming_publish, scope)
+        self.resilience.start_run(RUN_DEADLINE_SECONDS)
+        published = False
+
+        async def fetch_stage():
+            async def worker():
+                for date, hall in jobs:
+                    payload = await self._fetch_due_payload(fetcher, hall, date, due)
+                    await fetched.put((date, hall, payload))
+
+            with self.metrics.stage("fetch"):
+                async with self._menu_fetcher() as fetcher:
+                    await asyncio.gather(*(worker() for _ in range(API_MAX_CONCURRENCY)))
+            self._save_fetch_caches()
+            await fetched.put(None)
+
+        async def transform_stage():
+            # Several transforms in flight, so large bodies spread over the parse pool's workers
+            async def worker():
+                while (job := await fetched.get()) is not None:
+                    date, hall, payload = job
+                    menu = await self._transform_payload(hall, date, payload)
+                    if menu:
+                        await transformed.put((date, hall["id"], menu))
+                await fetched.put(None)  # pass the end marker on to the other workers
+
+            await asyncio.gather(*(worker() for _ in range(max(PARSE_WORKERS, 1))))
+            await transformed.put(None)
+
+        async def backup_stage():
+            while (job := await transformed.get()) is not None:
+                date, hall_id, menu = job
+                menu_slice = (date.weekday(), hall_id, menu)
+                with self.metrics.timer("backup", hall=hall_id):
+                    offset = backup.write_slice(*menu_slice)
+                self._record_history(history, date, hall_id, menu)
+                with self.metrics.timer("search_index", hall=hall_id):
+                    search_index.add_menu(*menu_slice)
+                await backed_up.put((*menu_slice, offset))
+            await backed_up.put(None)
+
+        async def upload_stage():
+            while (menu_slice := await backed_up.get()) is not None:
+                with self.metrics.timer("upload_slice", hall=menu_slice[1], day=weekday_name(menu_slice[0])):
+                    await asyncio.to_thread(self.publish_slice, build, backup, *menu_slice)
+
+        try:
+            async with asyncio.TaskGroup() as stages:
+                for stage in (fetch_stage, transform_stage, backup_stage, upload_stage):
+                    stages.create_task(stage())
+
+            if not backup.slices:
+                self.logger.warning("No menu data fetched. Aborting update.")
+                return False
+
+            self._finish_search_index()
+            with self.metrics.stage("publish"):
+                await asyncio.to_thread(self.finish_streaming_publish, build, backup)
+            published = True
+            backup.menu_version = build.version if build.version is not None else build.live_version
+            backup.complete = True
+            return True
+        except Exception as e:
+            # A failed stage reaches here inside the TaskGroup's ExceptionGroup; report what failed
+            while isinstance(e, ExceptionGroup):
+                e = e.exceptions[0]
+            self.logger.error(f"Error uploading to Supabase: {e}")
+            return False
+        finally:
+            if not published and build.version is not None:
+                # A failed or empty run must not leave its version 'building' for ever
+                self._fail_version(build.version, build.live_version)
+            if backup.close():
+                self.logger.info(f"Saved backup {backup.manifest_path}")
+            if history:
+                history.close()
+
+    def restore_backup(self, path=None, mode=None):
+        """Upload a saved backup without calling the menu API.
+
+        ``path`` is a manifest, a slice file or a legacy JSON backup, and
+        defaults to the newest complete manifest in ``MENU_BACKUP_DIR``. The
+        backup is published like a fresh fetch, so ``mode`` works as in
+        ``upload_to_supabase``.
+        """
+        path = path or latest_backup(BACKUP_DIR)
+        if not path:
+            self.logger.error(f"No complete backups found in {BACKUP_DIR}")
+            return False
+
+        try:
+            data = load_backup(path)
+        except Exception as e:
+            self.logger.error(f"Error loading backup {path}: {e}")
+            return False
+        if not data:
+            self.logger.warning(f"Backup {path} holds no menus. Aborting restore.")
+            return False
+
+        self.logger.info(f"Restoring {sum(len(locations) for locations in data.values())} menus from {path}")
+        success = self.upload_to_supabase(data, mode=mode)
+        if success:
+            self.logger.info("Restore completed successfully!")
+        else:
+            self.logger.error("Restore failed!")
+        return success
+
+    def run_update(self, mode=None, due=None):
+        """Run the menu update process and export its metrics.
+
+        ``due`` limits the API requests to those ``(date, hall_id)`` slices,
+        as the refresh scheduler does; None refreshes every menu.
+        """
+        success = False
+        try:
+            with self.metrics.stage("run"):
+                success = self._run_update(mode, due)
+            return success
+        finally:
+            self.parse_pool.close()
+            self.metrics.set("last_run_success", int(success))
+            self.metrics.set("last_run_timestamp_seconds", time.time())
+            self.export_metrics()
+
+    def export_metrics(self):
+        """Write the run's metrics summary as JSON and as a Prometheus textfile"""
+        try:
+            json_path, prom_path = self.metrics.export(METRICS_DIR)
+            self.logger.info(f"Saved metrics: {json_path}, {prom_path}")
+        except Exception as e:
+            self.logger.error(f"Error saving metrics: {e}")
+
+    def _run_update(self, mode=None, due=None):
         try:
             self.logger.info("Starting menu update process...")
+            if due is not None:
+                self.logger.info(f"Requesting {len(due)} due menus; the others are carried over from the cache")
+
+            if (mode or UPLOAD_MODE) == "versioned":
+                try:
+                    success = asyncio.run(self.stream_update(DAYS_TO_FETCH, due))
+                except Exception as e:
+                    self.logger.error(f"Error uploading to Supabase: {e}")
+                    success = False
+                if success:
+                    self.logger.info("Menu update completed successfully!")
+                else:
+                    self.logger.error("Menu update failed!")
+                return success
             
             # Scrape menu data
             # menu_data = self.scrape_multiple_days()
             
             # Fetch menu data from API
-            menu_data = self.fetch_data_from_api(days_to_fetch=7) # Fetch a full week of data
+            with self.metrics.stage("fetch"):
+                menu_data = self.fetch_data_from_api(DAYS_TO_FETCH, due)
 
             if not menu_data:
                 self.logger.warning("No menu data scraped. Aborting update.")
                 return False
 
             # Save backup files
-            self.save_backup_files(menu_data)
+            with self.metrics.stage("backup"):
+                self.save_backup_files(menu_data)
             
             # Upload to Supabase
-            success = self.upload_to_supabase(menu_data)
+            success = self.upload_to_supabase(menu_data, mode=mode)
             
             if success:
                 self.logger.info("Menu update completed successfully!")
@@ -632,34 +1447,115 @@ class MenuUpdater:
             self.logger.error(f"Error in run_update: {str(e)}")
             return False
 
-def run_scheduled_update():
+def run_scheduled_update(due=None):
     """Function to be called by the scheduler"""
     updater = MenuUpdater()
-    updater.run_update()
+    return updater.run_update(due=due)
+
+
+def _backfill_shard(jobs, venues):
+    """Backfill worker process entry point: fetch one shard under its share of the source limits"""
+    updater = MenuUpdater()
+    updater.venues = venues
+    updater.parse_pool = ParsePool(0)  # already one of several processes
+    return asyncio.run(updater._fetch_shard(jobs))
+
+
+def refresh_scheduler():
+    """A RefreshScheduler over DINING_HALLS that reads freshness from the response cache"""
+    response_cache = ResponseCache(CACHE_DIR, CACHE_TTL_SECONDS, CACHE_MAX_BYTES)
+    halls = {hall["id"]: hall for hall in DINING_HALLS}
+
+    def last_refreshed(date, hall_id):
+        # stored_at moves on every fetch and every successful revalidation
+        entry = response_cache.get(menu_api_url(halls[hall_id], date))
+        return entry["stored_at"] if entry else None
+
+    planner = RefreshPlanner(halls, DAYS_TO_FETCH, REFRESH_TIERS, last_refreshed)
+    return RefreshScheduler(
+        planner, run_scheduled_update,
+        jitter_seconds=REFRESH_JITTER_SECONDS, coalesce_seconds=REFRESH_COALESCE_SECONDS,
+    )
+
 
 if __name__ == "__main__":
+    import argparse
     import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == "--run-once":
-        # Run once immediately
+
+    parser = argparse.ArgumentParser(description="Fetch dining menus and publish them to Supabase")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--restore", nargs="?", const="", metavar="PATH",
+                        help="re-upload a backup (the newest one unless PATH is given)")
+    action.add_argument("--run-once", action="store_true", help="run one update immediately")
+    action.add_argument("--run-due", action="store_true",
+                        help="refresh only the menus due under the freshness tiers, then exit (for cron jobs)")
+    action.add_argument("--backfill", action="store_true",
+                        help="fetch past or future menus into the local menu history")
+    parser.add_argument("--full-reload", action="store_true", help="rewrite every row as a new menu version")
+    parser.add_argument("--days", type=int, help="days to fetch (--run-once: at most %d)" % DAYS_TO_FETCH)
+    parser.add_argument("--halls", type=lambda value: value.split(","), help="comma-separated venue ids")
+    parser.add_argument("--start-date", type=datetime.date.fromisoformat, help="first day to backfill (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=1, help="backfill worker processes")
+    args = parser.parse_args()
+
+    if (args.days is not None and args.days < 1) or args.workers < 1:
+        parser.error("--days and --workers must be at least 1")
+    if not args.backfill and (args.start_date or args.workers != 1):
+        parser.error("--start-date and --workers only apply to --backfill")
+    if not (args.backfill or args.run_once) and (args.days or args.halls):
+        parser.error("--days and --halls only apply to --run-once and --backfill")
+    if args.run_once and args.days and args.days > DAYS_TO_FETCH:
+        parser.error(f"--run-once publishes at most {DAYS_TO_FETCH} days; use --backfill for more")
+    try:
+        venues = VENUES.select(args.halls)
+    except ValueError as e:
+        parser.error(str(e))
+
+    configure_logging()
+    if args.backfill:
+        # Only writes the local history, so Supabase is not needed
+        updater = MenuUpdater()
+        recorded = updater.backfill(
+            args.start_date or datetime.date.today(), args.days or DAYS_TO_FETCH, args.halls, args.workers
+        )
+        sys.exit(0 if recorded else 1)
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        logger.error("Missing Supabase configuration. Please check your .env file.")
+        sys.exit(1)
+
+    if args.restore is not None:
+        updater = MenuUpdater()
+        ok = updater.restore_backup(args.restore or None, mode="full" if args.full_reload else None)
+        sys.exit(0 if ok else 1)
+    elif args.run_once:
+        # --days and --halls narrow the requests; other menus are carried over from the cache
         logger.info("Running menu update once...")
+        due = None
+        if args.days or args.halls:
+            today = datetime.date.today()
+            due = {
+                (today + datetime.timedelta(days=i), venue["id"])
+                for i in range(args.days or DAYS_TO_FETCH)
+                for venue in venues
+            }
         updater = MenuUpdater()
-        updater.run_update()
+        updater.run_update(mode="full" if args.full_reload else None, due=due)
+    elif args.run_due:
+        # Refresh only the menus due under the freshness tiers, then exit (for cron jobs)
+        due, _ = refresh_scheduler().plan(time.time())
+        if not due:
+            logger.info("No menus are due for a refresh")
+            sys.exit(0)
+        sys.exit(0 if run_scheduled_update(due) else 1)
     else:
-        # Run with scheduler
+        # Run with the freshness-tiered scheduler
         logger.info("Starting automated menu updater with scheduler...")
-        
-        # Schedule updates
-        schedule.every().day.at("06:00").do(run_scheduled_update)  # Daily at 6 AM
-        schedule.every().day.at("12:00").do(run_scheduled_update)  # Daily at 12 PM
-        schedule.every().day.at("18:00").do(run_scheduled_update)  # Daily at 6 PM
-        
-        logger.info("Scheduled updates for 6:00 AM, 12:00 PM, and 6:00 PM daily")
+        tiers = ", ".join(f"{days} days ahead every {seconds // 60} min" for days, seconds in REFRESH_TIERS)
+        logger.info(f"Refresh tiers: {tiers}")
         logger.info("Press Ctrl+C to stop the scheduler")
-        
+
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+            asyncio.run(refresh_scheduler().run())
         except KeyboardInterrupt:
-            logger.info("Scheduler stopped by user") 
\ No newline at end of file
+            logger.info("Scheduler stopped by user")
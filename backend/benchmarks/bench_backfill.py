@@ -0,0 +1,165 @@
+"""Sharded backfill benchmark: worker processes vs upstream rate limits.
+
+Registers ``--venues`` venues spread over ``--sources`` rate-limited
+sources, each served by its own local API stand-in, and runs
+``MenuUpdater.backfill`` over ``--days`` days with 1, 2 and 4 worker
+processes, each time into a fresh history and cache. Reports wall time,
+menus per second and the most requests any one stand-in saw in a
+``WINDOW_SECONDS`` window, and checks that
+
+* every run recorded every menu and wrote the same history (same rows in
+  the same order), whatever the number of workers;
+* no source received more than its rate over the window plus its burst.
+
+Exits with status 1 if a check fails.
+
+    python benchmarks/bench_backfill.py [--venues 12] [--sources 2] [--days 30] [--workers 1,2,4] [--rate 40] [--json]
+"""
+import argparse
+import bisect
+import contextlib
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from standin_api import MenuApiStandIn  # noqa: E402
+
+START_DATE = datetime.date(2026, 1, 5)
+BURST = 10
+MAX_CONCURRENCY = 8
+WINDOW_SECONDS = 5.0
+# Allowance for the delay between taking a token and the request reaching the stand-in
+JITTER_SECONDS = 0.1
+
+
+def _write_venues(path, venues, standins, rate):
+    config = {
+        "sources": {
+            f"standin-{s}": {"url": standin.url, "rate_per_second": rate, "burst": BURST, "max_concurrency": MAX_CONCURRENCY}
+            for s, standin in enumerate(standins)
+        },
+        "venues": [
+            {"id": f"venue-{i:03d}", "name": f"Venue {i}", "data_value": f"venue-{i}", "kind": "cafe",
+             "source": f"standin-{i % len(standins)}"}
+            for i in range(venues)
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+
+def _history_digest(path):
+    """Hash of the history's items and menu entries in row order"""
+    digest = hashlib.sha256()
+    conn = sqlite3.connect(path)
+    try:
+        for query in (
+            "select item_id, menu_item_uuid, name, labels from items order by item_id",
+            "select menu_date, hall, meal_type, item_id from menu_entries order by rowid",
+        ):
+            for row in conn.execute(query):
+                digest.update(repr(row).encode("utf-8"))
+    finally:
+        conn.close()
+    return digest.hexdigest()
+
+
+def _peak_per_window(times):
+    times = sorted(times)
+    return max((bisect.bisect_right(times, t + WINDOW_SECONDS) - i for i, t in enumerate(times)), default=0)
+
+
+def run(venues, sources, days, worker_counts, rate, latency):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, contextlib.ExitStack() as stack:
+        standins = [stack.enter_context(MenuApiStandIn(latency=latency, seed=s)) for s in range(sources)]
+        venues_file = os.path.join(workdir, "venues.json")
+        _write_venues(venues_file, venues, standins, rate)
+        # Set before the import: spawned workers read their settings from the environment
+        os.environ.update({
+            "SUPABASE_URL": "http://127.0.0.1:9",
+            "SUPABASE_KEY": "offline.benchmark.key",
+            "MENU_VENUES_FILE": venues_file,
+            "MENU_METRICS_DIR": workdir,
+            "MENU_PARSE_WORKERS": "0",
+        })
+        import automated_menu_updater as updater_module
+
+        logging.getLogger().setLevel(logging.WARNING)
+        for workers in worker_counts:
+            cache_dir = os.path.join(workdir, f"cache-{workers}")
+            history_db = os.path.join(workdir, f"history-{workers}.sqlite3")
+            os.environ["MENU_CACHE_DIR"] = updater_module.CACHE_DIR = cache_dir
+            os.environ["MENU_STATE_DIR"] = updater_module.STATE_DIR = os.path.join(workdir, f"state-{workers}")
+            updater_module.HISTORY_DB = history_db
+            updater = updater_module.MenuUpdater()
+
+            first_requests = [len(standin.request_times) for standin in standins]
+            started = time.perf_counter()
+            recorded = updater.backfill(START_DATE, days, workers=workers)
+            seconds = time.perf_counter() - started
+            results.append({
+                "workers": workers,
+                "menus": recorded,
+                "seconds": seconds,
+                "menus_per_second": recorded / seconds,
+                "requests": sum(len(standin.request_times) - first for standin, first in zip(standins, first_requests)),
+                "peak_requests_per_window": max(
+                    _peak_per_window(standin.request_times[first:]) for standin, first in zip(standins, first_requests)
+                ),
+                "history": _history_digest(history_db),
+            })
+
+    total = venues * days
+    checks = {
+        "complete": all(row["menus"] == total for row in results),
+        "deterministic": len({row["history"] for row in results}) == 1,
+        "rate_limited": all(
+            row["peak_requests_per_window"] <= rate * (WINDOW_SECONDS + JITTER_SECONDS) + BURST for row in results
+        ),
+    }
+    return {"menus": total, "rate_per_second": rate, "burst": BURST, "runs": results, "checks": checks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, default=12)
+    parser.add_argument("--sources", type=int, default=2, help="rate-limited sources the venues are spread over")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--rate", type=float, default=40.0, help="each source's requests per second")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    result = run(args.venues, args.sources, args.days, [int(w) for w in args.workers.split(",")], args.rate, args.latency_ms / 1000)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(
+            f"{result['menus']} menus from {args.sources} sources, each limited to {args.rate:g}/s"
+            f" with bursts of {BURST}"
+        )
+        for row in result["runs"]:
+            print(
+                f"{row['workers']:>2} workers  {row['menus']:>5} menus  {row['seconds']:6.2f} s"
+                f"  {row['menus_per_second']:6.1f} menus/s  peak {row['peak_requests_per_window']:>3} requests/source/{WINDOW_SECONDS:g} s"
+                f"  history {row['history'][:12]}"
+            )
+        for name, ok in result["checks"].items():
+            print(f"{name:<14} {'ok' if ok else 'FAIL'}")
+    sys.exit(0 if all(result["checks"].values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Import-time benchmark and budget for the backend modules.
+
+Imports each module in a fresh interpreter (``python -X importtime``), with
+no Supabase configuration and an empty working directory, and checks that:
+
+* the module's cumulative import time stays within its budget;
+* none of the heavy optional stacks (Supabase, Playwright, BeautifulSoup,
+  lxml, httpx, schedule) is imported;
+* importing creates no files (logs, caches).
+
+Exits with status 1 when a check fails, so CI can run it as a gate.
+
+    python benchmarks/bench_import.py [--repeat 5] [--scale 1.0] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets, in milliseconds
+BUDGETS_MS = {
+    "automated_menu_updater": 150,
+    "menu_rows": 25,
+    "menu_model": 25,
+    "menu_normalizer": 25,
+    "menu_sync": 25,
+}
+
+HEAVY_MODULES = ("supabase", "playwright", "bs4", "lxml", "httpx", "schedule")
+
+_PROBE = """
+import json, sys
+import {module}
+print(json.dumps(sorted(name for name in sys.modules if name.split(".")[0] in {heavy!r})))
+"""
+
+
+def measure_import(module):
+    """``(cumulative seconds, heavy modules imported, files created)`` for one cold import"""
+    env = {key: value for key, value in os.environ.items() if not key.startswith("SUPABASE_")}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+        created = sorted(os.listdir(workdir))
+    if result.returncode != 0:
+        # e.g. exiting at import time when configuration is missing
+        lines = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"import {module} exited with status {result.returncode}: {' '.join(lines[-1:])}")
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == module:
+            cumulative_us = int(line.split("|")[1])
+    return cumulative_us / 1e6, json.loads(result.stdout), created
+
+
+def run(repeat, scale):
+    results = []
+    for module, budget_ms in BUDGETS_MS.items():
+        try:
+            samples = [measure_import(module) for _ in range(repeat)]
+        except RuntimeError as e:
+            results.append({"module": module, "error": str(e), "ok": False})
+            continue
+        seconds = min(sample[0] for sample in samples)
+        _, heavy, created = samples[-1]
+        budget = budget_ms * scale / 1000
+        results.append({
+            "module": module,
+            "import_seconds": seconds,
+            "budget_seconds": budget,
+            "heavy_modules": heavy,
+            "files_created": created,
+            "ok": seconds <= budget and not heavy and not created,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="cold imports per module; the fastest is kept")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. for slow runners")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.scale)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for row in results:
+            if "error" in row:
+                print(f"{row['module']:<24} FAIL: {row['error']}")
+                continue
+            problems = [f"imports {', '.join(row['heavy_modules'])}"] if row["heavy_modules"] else []
+            if row["files_created"]:
+                problems.append(f"creates {', '.join(row['files_created'])}")
+            if row["import_seconds"] > row["budget_seconds"]:
+                problems.append("over budget")
+            print(
+                f"{row['module']:<24} {row['import_seconds'] * 1000:7.1f} ms / {row['budget_seconds'] * 1000:5.0f} ms  "
+                f"{'ok' if row['ok'] else 'FAIL: ' + '; '.join(problems)}"
+            )
+    sys.exit(0 if all(row["ok"] for row in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
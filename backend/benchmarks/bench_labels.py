@@ -0,0 +1,145 @@
+"""Dietary filter benchmark: label arrays vs bitmasks vs inverted indexes.
+
+Builds a catalog of N items whose label sets are drawn from the real ones
+in the API fixture, then times the same filter queries three ways:
+
+* ``arrays``: per-item ``labels`` list scans, what array-contains filtering does;
+* ``masks``: one ``label_mask`` integer per item and two bitwise tests;
+* ``index``: the per-menu ``label_index`` (label -> item positions), as set algebra.
+
+    python benchmarks/bench_labels.py [--sizes 100,1000,10000,100000] [--repeat 5] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from label_index import LabelBits, build_label_index  # noqa: E402
+from menu_normalizer import ItemNormalizer  # noqa: E402
+from standin_api import load_api_fixture  # noqa: E402
+
+QUERIES = (
+    (("Vegan",), ("Tree nuts",)),
+    (("Vegetarian",), ()),
+    (("Gluten Free", "Dairy Free"), ()),
+    ((), ("Peanuts", "Tree nuts", "Shellfish")),
+    (("Halal",), ("Soy", "Sesame")),
+)
+
+
+def build_catalog(size, seed=0):
+    """``size`` item dicts with label sets sampled from the fixture's items"""
+    fixture = load_api_fixture()
+    normalizer = ItemNormalizer()
+    label_sets = [
+        list(record.labels)
+        for meal in fixture["meals"]
+        for station in meal["stations"]
+        for item in station["menu"]
+        if (record := normalizer.normalize(item, station["station"]))
+    ]
+    rng = random.Random(seed)
+    return [{"name": f"Dish {i}", "labels": rng.choice(label_sets)} for i in range(size)]
+
+
+def filter_arrays(items, required, excluded):
+    return [
+        position for position, item in enumerate(items)
+        if all(label in item["labels"] for label in required)
+        and not any(label in item["labels"] for label in excluded)
+    ]
+
+
+def filter_masks(masks, required_mask, excluded_mask):
+    return [
+        position for position, mask in enumerate(masks)
+        if mask & required_mask == required_mask and not mask & excluded_mask
+    ]
+
+
+def filter_index(index, size, required, excluded):
+    if required:
+        matches = set(index.get(required[0], ()))
+        for label in required[1:]:
+            matches.intersection_update(index.get(label, ()))
+    else:
+        matches = set(range(size))
+    for label in excluded:
+        matches.difference_update(index.get(label, ()))
+    return sorted(matches)
+
+
+def _best_of(repeat, run):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def measure(size, repeat):
+    items = build_catalog(size)
+    label_bits = LabelBits()
+    label_bits.assign({label for item in items for label in item["labels"]})
+
+    started = time.perf_counter()
+    masks = [label_bits.mask(item["labels"]) for item in items]
+    mask_build = time.perf_counter() - started
+    started = time.perf_counter()
+    index = build_label_index(items)
+    index_build = time.perf_counter() - started
+
+    queries = [
+        (required, excluded, label_bits.mask(required), label_bits.mask(excluded))
+        for required, excluded in QUERIES
+    ]
+    timings = {}
+    results = {}
+    for name, run in (
+        ("arrays", lambda: [filter_arrays(items, r, e) for r, e, _, _ in queries]),
+        ("masks", lambda: [filter_masks(masks, rm, em) for _, _, rm, em in queries]),
+        ("index", lambda: [filter_index(index, size, r, e) for r, e, _, _ in queries]),
+    ):
+        timings[name], results[name] = _best_of(repeat, run)
+    if not results["arrays"] == results["masks"] == results["index"]:
+        raise AssertionError(f"Filters disagree at size {size}")
+
+    return {
+        "size": size,
+        "queries": len(queries),
+        "matches": sum(len(result) for result in results["arrays"]),
+        "mask_build_seconds": mask_build,
+        "index_build_seconds": index_build,
+        **{f"{name}_seconds_per_query": seconds / len(queries) for name, seconds in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement; the best is kept")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = [measure(int(size), args.repeat) for size in args.sizes.split(",")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        arrays = row["arrays_seconds_per_query"]
+        print(
+            f"{row['size']:>7} items  arrays {arrays * 1e3:8.3f} ms"
+            f"  masks {row['masks_seconds_per_query'] * 1e3:8.3f} ms ({arrays / row['masks_seconds_per_query']:4.1f}x)"
+            f"  index {row['index_seconds_per_query'] * 1e3:8.3f} ms ({arrays / row['index_seconds_per_query']:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
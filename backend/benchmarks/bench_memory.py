@@ -0,0 +1,162 @@
+"""Memory benchmark of the in-memory menu representation.
+
+Builds the same menus two ways and measures what stays allocated:
+
+* ``dicts``: today's JSON shape, nested dicts holding one fresh dict per listed item;
+* ``records``: a :class:`MenuIndex` of shared, slotted ``MenuItem`` records.
+
+Scale N means N times the current halls, over the given number of weeks.
+Before measuring, both shapes are checked against the item dicts the
+normalizer used to return, on a menu that includes a null station.
+
+    python benchmarks/bench_memory.py [--scales 1,10] [--weeks 1,4,13] [--json]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from menu_model import MenuIndex, menu_to_json  # noqa: E402
+from menu_normalizer import ItemNormalizer  # noqa: E402
+from menu_rows import menu_item_uuid  # noqa: E402
+from standin_api import build_payload, load_api_fixture  # noqa: E402
+
+BASE_HALLS = ("parkside", "village", "evk")
+
+
+def _menus(scale, weeks, transform):
+    fixture = load_api_fixture()
+    for day in range(7 * weeks):
+        for copy_index in range(scale):
+            for hall in BASE_HALLS:
+                location = f"{hall}-{copy_index}"
+                # Menus rotate weekly, like the real halls'
+                yield day, location, transform(build_payload(fixture, f"/{location}?weekday={day % 7}"))
+
+
+def _transform(normalizer):
+    def transform(api_data):
+        menu = {}
+        for meal in api_data["meals"]:
+            items = [
+                record
+                for station in meal["stations"]
+                for item in station["menu"]
+                if (record := normalizer.normalize(item, station["station"]))
+            ]
+            if items:
+                menu.setdefault(meal["name"].lower(), []).extend(items)
+        return menu
+    return transform
+
+
+def build_dicts(scale, weeks):
+    data = {}
+    for day, location, menu in _menus(scale, weeks, _transform(ItemNormalizer())):
+        data.setdefault(day, {})[location] = menu_to_json(menu)
+    return data
+
+
+def build_records(scale, weeks):
+    index = MenuIndex()
+    for day, location, menu in _menus(scale, weeks, _transform(ItemNormalizer())):
+        index.add_menu(day, location, menu)
+    return index
+
+
+def _reference_menu(api_data, normalizer):
+    """The ``{meal_type: [item dict]}`` menu as built before records existed"""
+    menu = {}
+    for meal in api_data["meals"]:
+        for station in meal["stations"]:
+            for item in station["menu"]:
+                name = item["item"].strip()
+                if not name or (name.isupper() and len(name.split()) <= 4):
+                    continue
+                labels = {normalizer.preference_label(pref) for pref in item.get("preferences", ())}
+                labels.update(normalizer.allergen_label(allergen) for allergen in item.get("allergens", ()))
+                menu.setdefault(meal["name"].lower(), []).append({
+                    "name": name,
+                    "labels": sorted(labels),
+                    "image_url": "",
+                    "category": station["station"],
+                    "featured": False,
+                })
+    return menu
+
+
+def check_equivalence():
+    """Records built from a menu with a null station match the reference dicts, uuids included"""
+    api_data = build_payload(load_api_fixture(), "/parkside-0?weekday=0")
+    api_data["meals"][0]["stations"][0]["station"] = None
+    normalizer = ItemNormalizer()
+    expected = _reference_menu(api_data, normalizer)
+    index = MenuIndex()
+    index.add_menu(0, "parkside-0", _transform(normalizer)(api_data))
+    actual = index.menu(0, "parkside-0")
+    return (
+        menu_to_json(actual) == expected
+        and any(item["category"] is None for items in expected.values() for item in items)
+        and [menu_item_uuid(item) for items in actual.values() for item in items]
+        == [menu_item_uuid(item) for items in expected.values() for item in items]
+    )
+
+
+def measure(builder, scale, weeks):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    data = builder(scale, weeks)
+    seconds = time.perf_counter() - started
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    listings = sum(len(items) for locations in data.values() for menu in locations.values() for items in menu.values())
+    del data
+    return {
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+        "listings": listings,
+        "bytes_per_listing": retained / listings if listings else 0,
+        "build_seconds": seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1,10", help="comma-separated multiples of today's halls")
+    parser.add_argument("--weeks", default="1,4,13", help="comma-separated horizons in weeks")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if not check_equivalence():
+        print("records differ from the reference item dicts")
+        sys.exit(1)
+
+    results = []
+    for scale in (int(scale) for scale in args.scales.split(",")):
+        for weeks in (int(weeks) for weeks in args.weeks.split(",")):
+            for name, builder in (("dicts", build_dicts), ("records", build_records)):
+                results.append(dict(representation=name, scale=scale, weeks=weeks, **measure(builder, scale, weeks)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        print(
+            f"{row['representation']:<8} x{row['scale']:<4} {row['weeks']:>3} wk "
+            f"{row['listings']:>9} listings {row['retained_bytes'] / 2 ** 20:9.1f} MiB "
+            f"{row['bytes_per_listing']:7.1f} B/listing"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Benchmark the scraper's HTML parsing paths on saved menu pages.
+
+Compares the original approach (BeautifulSoup ``html.parser`` over the whole
+page) with parsing only the ``.results`` subtree, for each parser backend.
+``--pool`` instead parses many subtrees from an event loop, inline and through
+the parse pool at each worker count, reporting throughput and the longest
+stall of the loop.
+
+    python benchmarks/bench_parser.py [--repeat N] [--json]
+    python benchmarks/bench_parser.py --pool [--workers 0,1,2,4] [--jobs 64] [--parser bs4]
+"""
+import asyncio
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from menu_parser import MENU_PARSERS, get_menu_parser  # noqa: E402
+from parse_pool import ParsePool  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def extract_results_html(page_html):
+    """What the scraper gets back from ``el.outerHTML`` on the results div"""
+    from lxml import etree, html
+
+    root = html.fromstring(page_html)
+    results = root.xpath("(//div[contains(concat(' ', normalize-space(@class), ' '), ' results ')])[1]")
+    return etree.tostring(results[0], encoding="unicode", method="html")
+
+
+def time_parse(parser, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parser.parse(html, "menu")
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(repeat):
+    results = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "menu_page_*.html"))):
+        with open(path, encoding="utf-8") as f:
+            page_html = f.read()
+        subtree_html = extract_results_html(page_html)
+        baseline = MENU_PARSERS["bs4"]().parse(page_html, "menu")
+
+        for parser_name, parser_class in MENU_PARSERS.items():
+            parser = parser_class()
+            for scope, html in (("full_page", page_html), ("results_subtree", subtree_html)):
+                if parser.parse(html, "menu") != baseline:
+                    raise AssertionError(f"{parser_name}/{scope} output differs on {os.path.basename(path)}")
+                results.append({
+                    "fixture": os.path.basename(path),
+                    "parser": parser_name,
+                    "scope": scope,
+                    "input_bytes": len(html.encode("utf-8")),
+                    "items": sum(len(items) for items in baseline.values()),
+                    "best_seconds": time_parse(parser, html, repeat),
+                })
+    return results
+
+
+async def _parse_from_loop(parse, html, jobs, concurrent):
+    """Parse ``html`` ``jobs`` times from the loop; returns (seconds, longest loop stall)"""
+    stalls = []
+    finished = asyncio.Event()
+
+    async def ticker():
+        while not finished.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - started - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*(parse(html, "menu") for _ in range(jobs)))
+    else:
+        for _ in range(jobs):
+            parse(html, "menu")
+            await asyncio.sleep(0)
+    seconds = time.perf_counter() - started
+    finished.set()
+    await tick
+    return seconds, max(stalls, default=0.0)
+
+
+def run_pool(worker_counts, jobs, parser_name):
+    with open(os.path.join(FIXTURES_DIR, "menu_page_all_menus.html"), encoding="utf-8") as f:
+        html = extract_results_html(f.read())
+
+    results = []
+    for workers in worker_counts:
+        if workers == 0:
+            parser = get_menu_parser(parser_name)
+            seconds, stall = asyncio.run(_parse_from_loop(parser.parse, html, jobs, concurrent=False))
+        else:
+            pool = ParsePool(workers, parser_name)
+
+            async def measure():
+                # Start every worker before timing
+                await asyncio.gather(*(pool.parse_html(html, "menu") for _ in range(workers * 2)))
+                return await _parse_from_loop(pool.parse_html, html, jobs, concurrent=True)
+
+            try:
+                seconds, stall = asyncio.run(measure())
+            finally:
+                pool.close()
+        results.append({
+            "workers": workers,
+            "parser": parser_name,
+            "jobs": jobs,
+            "seconds": seconds,
+            "pages_per_second": jobs / seconds,
+            "max_loop_stall_seconds": stall,
+        })
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    arg_parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    arg_parser.add_argument("--pool", action="store_true", help="benchmark the parse pool instead")
+    arg_parser.add_argument("--workers", default="0,1,2,4", help="comma-separated pool sizes; 0 parses inline")
+    arg_parser.add_argument("--jobs", type=int, default=64, help="pages parsed per pool measurement")
+    arg_parser.add_argument("--parser", default="bs4", choices=sorted(MENU_PARSERS))
+    args = arg_parser.parse_args()
+    # The no-containers fixture deliberately exercises the fallback path
+    logging.getLogger("menu_parser").setLevel(logging.ERROR)
+
+    if args.pool:
+        results = run_pool([int(workers) for workers in args.workers.split(",")], args.jobs, args.parser)
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return
+        for row in results:
+            print(
+                f"{row['workers']:>2} workers {row['parser']:<5} {row['pages_per_second']:8.1f} pages/s  "
+                f"longest loop stall {row['max_loop_stall_seconds'] * 1000:7.2f} ms"
+            )
+        return
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baselines = {
+        row["fixture"]: row["best_seconds"]
+        for row in results
+        if row["parser"] == "bs4" and row["scope"] == "full_page"
+    }
+    for row in results:
+        speedup = baselines[row["fixture"]] / row["best_seconds"]
+        print(
+            f"{row['fixture']:<32} {row['parser']:<5} {row['scope']:<16} "
+            f"{row['best_seconds'] * 1000:8.2f} ms  {speedup:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
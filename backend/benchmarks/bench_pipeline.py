@@ -0,0 +1,359 @@
+"""Offline benchmarks of the menu update pipeline at 1x to 100x today's load.
+
+Runs ``fetch_data_from_api`` against a local API stand-in,
+``_transform_api_data`` on the recorded API fixture, the scraper's HTML
+parser on scaled menu pages, ``upload_to_supabase`` into an in-process
+fake Supabase and ``stream_update``, the scheduled run's fetch-to-publish
+pipeline, against both. Scale N means N times the current halls, so a 7-day run at
+scale 10 fetches 210 menus. Nothing touches the real API or database.
+
+    python benchmarks/bench_pipeline.py [--scales 1,10,100] [--latency-ms 20] [--json] [--output results.json]
+    python benchmarks/bench_pipeline.py --compare baseline.json
+
+``--output`` writes the results with the git commit they were measured on;
+``--compare`` reports how much each benchmark moved against such a file.
+"""
+import argparse
+import asyncio
+import copy
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+# Placeholder Supabase settings; the benchmarks replace the client with a fake
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "offline.benchmark.key")
+# The production halls without the source's rate limit, which would bound every fetch benchmark
+os.environ.setdefault("MENU_VENUES_FILE", os.path.join(BENCHMARKS_DIR, "fixtures", "venues_unthrottled.json"))
+
+from fake_supabase import FakeSupabase  # noqa: E402
+from standin_api import MenuApiStandIn, build_payload, load_api_fixture  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, "fixtures")
+DAYS = 7
+
+
+def _load_updater(workdir):
+    """Import the updater with its log, cache and backups inside ``workdir``"""
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import automated_menu_updater
+    finally:
+        os.chdir(cwd)
+    logging.getLogger().setLevel(logging.WARNING)
+    return automated_menu_updater
+
+
+def _scaled_halls(base_halls, scale):
+    return [
+        dict(hall, id=f"{hall['id']}-{copy_index}", data_value=f"{hall['data_value']}-{copy_index}")
+        if copy_index else hall
+        for copy_index in range(scale)
+        for hall in base_halls
+    ]
+
+
+def _time(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench_fetch(updater_module, scale, latency, error_rate, repeat, workdir):
+    from http_cache import ResponseCache
+
+    halls = _scaled_halls(updater_module.DINING_HALLS, scale)
+    with MenuApiStandIn(latency=latency, error_rate=error_rate) as standin:
+        updater_module.API_BASE_URL = standin.url
+
+        def cold_fetch():
+            # A fresh cache each time, so every request is a full download
+            cache_dir = tempfile.mkdtemp(dir=workdir)
+            updater.response_cache = ResponseCache(cache_dir, 3600, 1 << 30)
+            return updater.fetch_data_from_api(days_to_fetch=DAYS)
+
+        original_halls = updater_module.DINING_HALLS
+        updater_module.DINING_HALLS = halls
+        try:
+            updater = updater_module.MenuUpdater()
+            seconds, data = _time(cold_fetch, repeat)
+            started = time.perf_counter()
+            updater.fetch_data_from_api(days_to_fetch=DAYS)  # revalidates the last cold run's cache
+            warm_seconds = time.perf_counter() - started
+        finally:
+            updater_module.DINING_HALLS = original_halls
+        requests = standin.requests
+
+    menus = sum(len(locations) for locations in data.values())
+    return {
+        "benchmark": "fetch_data_from_api",
+        "scale": scale,
+        "requests_per_run": len(halls) * DAYS,
+        "menus_fetched": menus,
+        "best_seconds": seconds,
+        "warm_cache_seconds": warm_seconds,
+        "server_requests": requests,
+    }
+
+
+def bench_transform(updater_module, scale, repeat):
+    fixture = load_api_fixture()
+    payloads = [build_payload(fixture, f"/hall?d={i}") for i in range(len(updater_module.DINING_HALLS) * DAYS * scale)]
+    updater = updater_module.MenuUpdater()
+
+    def transform_all():
+        return [updater._transform_api_data(payload) for payload in payloads]
+
+    seconds, menus = _time(transform_all, repeat)
+    return {
+        "benchmark": "_transform_api_data",
+        "scale": scale,
+        "payloads": len(payloads),
+        "items": sum(len(items) for menu in menus for items in menu.values()),
+        "best_seconds": seconds,
+    }
+
+
+def _scaled_menu_page(page_html, scale):
+    from lxml import etree, html
+
+    root = html.fromstring(page_html)
+    for stations in root.xpath("//div[contains(concat(' ', normalize-space(@class), ' '), ' stations ')]"):
+        originals = list(stations)
+        for _ in range(scale - 1):
+            for station in originals:
+                stations.append(copy.deepcopy(station))
+    return etree.tostring(root, encoding="unicode", method="html")
+
+
+def bench_parser(updater_module, scale, repeat):
+    from menu_parser import MENU_PARSERS
+
+    with open(os.path.join(FIXTURES_DIR, "menu_page_all_menus.html"), encoding="utf-8") as f:
+        page_html = _scaled_menu_page(f.read(), scale)
+
+    results = []
+    for name, parser_class in MENU_PARSERS.items():
+        parser = parser_class()
+        seconds, menu = _time(lambda: parser.parse(page_html, "menu"), repeat)
+        results.append({
+            "benchmark": f"menu_parser.{name}",
+            "scale": scale,
+            "input_bytes": len(page_html.encode("utf-8")),
+            "items": sum(len(items) for items in menu.values()),
+            "best_seconds": seconds,
+        })
+    return results
+
+
+def _scaled_menu_data(updater_module, scale):
+    fixture = load_api_fixture()
+    updater = updater_module.MenuUpdater()
+    data = {}
+    for day in range(DAYS):
+        for hall in _scaled_halls(updater_module.DINING_HALLS, scale):
+            payload = build_payload(fixture, f"/{hall['data_value']}?d={day}")
+            data.setdefault(day, {})[hall["id"]] = updater._transform_api_data(payload)
+    return data
+
+
+def _rows_written(volume):
+    return sum(
+        count for counters in volume.values()
+        for name, count in counters.items()
+        if name.startswith("rows_") and name != "rows_read"
+    )
+
+
+def _rows_read(volume):
+    return sum(counters.get("rows_read", 0) for counters in volume.values())
+
+
+def bench_upload(updater_module, scale, mode, db_latency):
+    data = _scaled_menu_data(updater_module, scale)
+    db = FakeSupabase.with_versioning(latency=db_latency)
+    updater_module.supabase = db
+    updater = updater_module.MenuUpdater()
+
+    started = time.perf_counter()
+    ok = updater.upload_to_supabase(data, mode=mode)
+    seconds = time.perf_counter() - started
+    first_run = db.write_volume()
+    if updater._gc_thread:
+        updater._gc_thread.join()
+
+    # The same menu again: measures the no-change path
+    db.reset_stats()
+    started = time.perf_counter()
+    updater.upload_to_supabase(data, mode=mode)
+    unchanged_seconds = time.perf_counter() - started
+    unchanged_run = db.write_volume()
+    if updater._gc_thread:
+        updater._gc_thread.join()
+
+    return {
+        "benchmark": f"upload_to_supabase.{mode}",
+        "scale": scale,
+        "succeeded": ok,
+        "best_seconds": seconds,
+        "rows_written": _rows_written(first_run),
+        "write_volume": first_run,
+        "unchanged_seconds": unchanged_seconds,
+        "unchanged_rows_written": _rows_written(unchanged_run),
+    }
+
+
+def bench_stream(updater_module, scale, latency, db_latency, workdir):
+    from http_cache import ResponseCache
+
+    halls = _scaled_halls(updater_module.DINING_HALLS, scale)
+    db = FakeSupabase.with_versioning(latency=db_latency)
+    updater_module.supabase = db
+    updater_module.BACKUP_DIR = os.path.join(workdir, "backups")
+    updater_module.HISTORY_DB = os.path.join(workdir, "menu_history.sqlite3")
+
+    with MenuApiStandIn(latency=latency) as standin:
+        updater_module.API_BASE_URL = standin.url
+        original_halls = updater_module.DINING_HALLS
+        updater_module.DINING_HALLS = halls
+        try:
+            updater = updater_module.MenuUpdater()
+
+            def stream(due=None):
+                if due is None:
+                    # A cold cache, so the run requests and compares every menu
+                    updater.response_cache = ResponseCache(tempfile.mkdtemp(dir=workdir), 3600, 1 << 30)
+                started = time.perf_counter()
+                ok = asyncio.run(updater.stream_update(DAYS, due))
+                seconds = time.perf_counter() - started
+                if updater._gc_thread:
+                    updater._gc_thread.join()
+                return ok, seconds
+
+            ok, seconds = stream()
+            first_run = db.write_volume()
+            # The same menus again: every slice matches the live version
+            db.reset_stats()
+            unchanged_ok, unchanged_seconds = stream()
+            unchanged_run = db.write_volume()
+            # A scheduled job refreshing only today's menus reads only their rows
+            db.reset_stats()
+            today = datetime.date.today()
+            due_ok, due_seconds = stream({(today, hall["id"]) for hall in halls})
+            due_run = db.write_volume()
+        finally:
+            updater_module.DINING_HALLS = original_halls
+        requests = standin.requests
+
+    return {
+        "benchmark": "stream_update",
+        "scale": scale,
+        "succeeded": ok and unchanged_ok and due_ok,
+        "menus": len(halls) * DAYS,
+        "best_seconds": seconds,
+        "rows_written": _rows_written(first_run),
+        "write_volume": first_run,
+        "unchanged_seconds": unchanged_seconds,
+        "unchanged_rows_written": _rows_written(unchanged_run),
+        "unchanged_rows_read": _rows_read(unchanged_run),
+        "due_today_seconds": due_seconds,
+        "due_today_rows_read": _rows_read(due_run),
+        "server_requests": requests,
+    }
+
+
+def run(scales, repeat, latency, error_rate, db_latency, upload_modes):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        updater_module = _load_updater(workdir)
+        real_client = updater_module.supabase
+        try:
+            for scale in scales:
+                results.append(bench_fetch(updater_module, scale, latency, error_rate, repeat, workdir))
+                results.append(bench_transform(updater_module, scale, repeat))
+                results.extend(bench_parser(updater_module, scale, repeat))
+                for mode in upload_modes:
+                    results.append(bench_upload(updater_module, scale, mode, db_latency))
+                results.append(bench_stream(updater_module, scale, latency, db_latency, workdir))
+        finally:
+            updater_module.supabase = real_client
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(row["benchmark"], row["scale"]): row for row in baseline["results"]}
+    for row in results:
+        before = previous.get((row["benchmark"], row["scale"]))
+        if before:
+            change = row["best_seconds"] / before["best_seconds"] - 1
+            print(f"{row['benchmark']:<34} x{row['scale']:<4} {before['best_seconds'] * 1000:10.1f} ms -> "
+                  f"{row['best_seconds'] * 1000:10.1f} ms  {change:+7.1%}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--scales", default="1,10,100", help="comma-separated multiples of today's halls")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--latency-ms", type=float, default=20.0, help="API stand-in latency per request")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of API requests that fail")
+    arg_parser.add_argument("--db-latency-ms", type=float, default=0.0, help="fake Supabase latency per request")
+    arg_parser.add_argument("--upload-modes", default="versioned,full")
+    arg_parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    arg_parser.add_argument("--output", help="also write the results to this JSON file")
+    arg_parser.add_argument("--compare", help="results file from an earlier run to compare against")
+    args = arg_parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    results = run(
+        scales, args.repeat, args.latency_ms / 1000, args.error_rate,
+        args.db_latency_ms / 1000, args.upload_modes.split(","),
+    )
+    report = {
+        "commit": _git_commit(),
+        "measured_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+    elif args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in results:
+            print(f"{row['benchmark']:<34} x{row['scale']:<4} {row['best_seconds'] * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Fault-injection harness for the resilient fetch layer.
+
+Runs ``fetch_data_from_api`` against the local API stand-in while it
+injects faults, once with retries, breakers and hedging turned off (how
+fetching used to behave) and once with the updater's resilience settings:
+
+* ``flaky``: 20% of requests answer 503 and 5% drop the connection;
+* ``tail``: 3% of requests take 2 s instead of 20 ms;
+* ``outage``: the API goes down after a successful run;
+* ``deadline``: after a successful run, every request takes 1 s against a
+  0.5 s budget for the run.
+
+Each scenario checks what the resilient run must achieve (no menus lost,
+a shorter tail, failing fast, finishing on time with requests already
+sent allowed to complete) and the harness exits with status 1 if one
+does not.
+
+    python benchmarks/bench_resilience.py [--scenarios flaky,tail,outage,deadline] [--json]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from bench_pipeline import _load_updater, _scaled_halls  # noqa: E402
+from http_cache import ResponseCache  # noqa: E402
+from resilience import Resilience  # noqa: E402
+from standin_api import MenuApiStandIn  # noqa: E402
+
+DAYS = 7
+# Measured runs in the tail scenario, so the slow requests land in both policies
+TAIL_RUNS = 4
+
+
+def _resilience(updater_module, updater, enabled):
+    if not enabled:
+        return Resilience(max_retries=0, failure_threshold=float("inf"), hedge_percentile=0, metrics=updater.metrics)
+    return Resilience(
+        updater_module.FETCH_MAX_RETRIES, 0.05,
+        failure_threshold=updater_module.BREAKER_FAILURES, reset_seconds=updater_module.BREAKER_RESET_SECONDS,
+        hedge_percentile=updater_module.HEDGE_PERCENTILE, metrics=updater.metrics,
+    )
+
+
+def _fetch(updater_module, standin, enabled, workdir, warm_runs=0, runs=1, cache_dir=None):
+    """Totals over ``runs`` measured ``fetch_data_from_api`` runs after ``warm_runs`` unmeasured ones"""
+    updater = updater_module.MenuUpdater()
+    updater.resilience = _resilience(updater_module, updater, enabled)
+    for _ in range(warm_runs):
+        updater.response_cache = ResponseCache(tempfile.mkdtemp(dir=workdir), 3600, 1 << 30)
+        updater.fetch_data_from_api(days_to_fetch=DAYS)
+    requests_before = standin.requests
+    menus = 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        updater.response_cache = ResponseCache(cache_dir or tempfile.mkdtemp(dir=workdir), 3600, 1 << 30)
+        data = updater.fetch_data_from_api(days_to_fetch=DAYS)
+        menus += sum(len(locations) for locations in data.values())
+
+    def counter(name):
+        return sum(value for (counter_name, _), value in updater.metrics._counters.items() if counter_name == name)
+
+    return {
+        "runs": runs,
+        "menus": menus,
+        "seconds": time.perf_counter() - started,
+        "requests": standin.requests - requests_before,
+        "retries": counter("request_retries"),
+        "hedged": counter("hedged_requests"),
+        "stale": counter("stale_menus_served"),
+    }
+
+
+def scenario_flaky(updater_module, enabled, workdir):
+    with MenuApiStandIn(error_rate=0.2, reset_rate=0.05, seed=1) as standin:
+        updater_module.API_BASE_URL = standin.url
+        return _fetch(updater_module, standin, enabled, workdir)
+
+
+def scenario_tail(updater_module, enabled, workdir):
+    with MenuApiStandIn(latency=0.02, slow_rate=0.03, slow_latency=2.0, seed=2) as standin:
+        updater_module.API_BASE_URL = standin.url
+        # Warm-up runs give the latency tracker enough samples to hedge
+        return _fetch(updater_module, standin, enabled, workdir, warm_runs=2, runs=TAIL_RUNS)
+
+
+def scenario_outage(updater_module, enabled, workdir):
+    with MenuApiStandIn(seed=3) as standin:
+        updater_module.API_BASE_URL = standin.url
+        cache_dir = tempfile.mkdtemp(dir=workdir)
+        updater = updater_module.MenuUpdater()
+        updater.response_cache = ResponseCache(cache_dir, 3600, 1 << 30)
+        updater.fetch_data_from_api(days_to_fetch=DAYS)
+        standin.down = True
+        return _fetch(updater_module, standin, enabled, workdir, cache_dir=cache_dir)
+
+
+def scenario_deadline(updater_module, enabled, workdir):
+    with MenuApiStandIn(seed=4) as standin:
+        updater_module.API_BASE_URL = standin.url
+        cache_dir = tempfile.mkdtemp(dir=workdir)
+        updater = updater_module.MenuUpdater()
+        updater.response_cache = ResponseCache(cache_dir, 3600, 1 << 30)
+        updater.fetch_data_from_api(days_to_fetch=DAYS)
+        standin.latency = 1.0
+        original = updater_module.RUN_DEADLINE_SECONDS
+        updater_module.RUN_DEADLINE_SECONDS = 0.5 if enabled else None
+        try:
+            return _fetch(updater_module, standin, enabled, workdir, cache_dir=cache_dir)
+        finally:
+            updater_module.RUN_DEADLINE_SECONDS = original
+
+
+# name: (scenario, what the resilient run must achieve given the baseline and the menus expected)
+SCENARIOS = {
+    "flaky": (scenario_flaky, lambda base, res, total: res["menus"] == total),
+    "tail": (scenario_tail, lambda base, res, total: res["menus"] == total and res["seconds"] < base["seconds"] / 2),
+    "outage": (scenario_outage, lambda base, res, total: res["menus"] == total and res["requests"] < total),
+    # Requests sent before the deadline finish; the menus never requested are served stale
+    "deadline": (
+        scenario_deadline,
+        lambda base, res, total: res["menus"] == total and 0 < res["stale"] < total and res["seconds"] < 1.5,
+    ),
+}
+
+
+def run(names, scale):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        updater_module = _load_updater(workdir)
+        logging.getLogger().setLevel(logging.CRITICAL)  # injected faults log an error each
+        original_halls = updater_module.DINING_HALLS
+        updater_module.DINING_HALLS = _scaled_halls(original_halls, scale)
+        total = len(updater_module.DINING_HALLS) * DAYS
+        try:
+            for name in names:
+                scenario, check = SCENARIOS[name]
+                baseline = scenario(updater_module, False, workdir)
+                resilient = scenario(updater_module, True, workdir)
+                results.append({
+                    "scenario": name,
+                    "menus_per_run": total,
+                    "baseline": baseline,
+                    "resilient": resilient,
+                    "ok": bool(check(baseline, resilient, total * resilient["runs"])),
+                })
+        finally:
+            updater_module.DINING_HALLS = original_halls
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--scale", type=int, default=3, help="multiply the dining halls, as in bench_pipeline")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.scenarios.split(","), args.scale)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for row in results:
+            for label in ("baseline", "resilient"):
+                r = row[label]
+                print(
+                    f"{row['scenario']:<9} {label:<9} {r['menus']:>4}/{row['menus_per_run'] * r['runs']} menus"
+                    f"  {r['seconds']:6.2f} s  {r['requests']:>4} requests  {r['retries']:>3} retries"
+                    f"  {r['hedged']:>3} hedged  {r['stale']:>3} stale"
+                )
+            print(f"{'':<9} {'ok' if row['ok'] else 'FAIL'}")
+    sys.exit(0 if all(row["ok"] for row in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Failed publish, then restore: the recovery path end to end.
+
+Publishes a week of menus with ``run_update`` from the API stand-in into
+the fake Supabase, then runs again against changed menus while the fake
+fails every write after ``--fail-after`` of them, and finally restores
+with a plain ``restore_backup()``. Checks that
+
+* the failed run returns False and leaves the previous version live;
+* its partial backup is not the one a restore picks;
+* the restore brings back every menu of the last good run.
+
+Exits with status 1 if a check fails.
+
+    python benchmarks/bench_restore.py [--fail-after 10] [--json]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from bench_pipeline import _load_updater  # noqa: E402
+from fake_supabase import FakeSupabase  # noqa: E402
+from menu_backup import latest_backup  # noqa: E402
+from standin_api import MenuApiStandIn  # noqa: E402
+
+
+def _live_documents(db):
+    live_version = db.tables["menu_current_version"][0]["version"]
+    return live_version, sum(row["menu_version"] == live_version for row in db.tables.get("menu_documents", []))
+
+
+def run(fail_after):
+    with tempfile.TemporaryDirectory() as workdir:
+        updater_module = _load_updater(workdir)
+        logging.getLogger().setLevel(logging.CRITICAL)  # the injected failures log an error each
+        updater_module.BACKUP_DIR = os.path.join(workdir, "backups")
+        updater_module.HISTORY_DB = os.path.join(workdir, "menu_history.sqlite3")
+        updater_module.CACHE_DIR = os.path.join(workdir, "cache")
+        updater_module.STATE_DIR = os.path.join(workdir, "state")
+        updater_module.METRICS_DIR = workdir
+        db = FakeSupabase.with_versioning()
+        real_client = updater_module.supabase
+        updater_module.supabase = db
+
+        def update(standin):
+            updater_module.API_BASE_URL = standin.url
+            updater = updater_module.MenuUpdater()
+            ok = updater.run_update()
+            if updater._gc_thread:
+                updater._gc_thread.join()
+            return ok
+
+        try:
+            with MenuApiStandIn() as standin:
+                published_ok = update(standin)
+            published = _live_documents(db)
+            good_backup = latest_backup(updater_module.BACKUP_DIR)
+
+            # Larger menus change every slice, so the second run builds a new version until writes fail
+            db.fail_after = fail_after
+            with MenuApiStandIn(payload_scale=2) as standin:
+                failed_ok = update(standin)
+            db.fail_after = None
+            after_failure = _live_documents(db)
+
+            restore_path = latest_backup(updater_module.BACKUP_DIR)
+            started = time.perf_counter()
+            restored_ok = updater_module.MenuUpdater().restore_backup()
+            restore_seconds = time.perf_counter() - started
+            restored = _live_documents(db)
+        finally:
+            updater_module.supabase = real_client
+
+    checks = {
+        "published": published_ok and published[1] > 0,
+        "failed_run_reported": failed_ok is False,
+        "previous_version_live": after_failure == published,
+        "restore_skips_partial_backup": restore_path == good_backup,
+        "restore_complete": restored_ok and restored[1] == published[1],
+    }
+    return {
+        "published_documents": published[1],
+        "restored_documents": restored[1],
+        "restore_seconds": restore_seconds,
+        "checks": checks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fail-after", type=int, default=10, help="writes the failing run gets through")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    result = run(args.fail_after)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(
+            f"published {result['published_documents']} menu documents, restored {result['restored_documents']}"
+            f" in {result['restore_seconds'] * 1000:.1f} ms"
+        )
+        for name, ok in result["checks"].items():
+            print(f"{name:<30} {'ok' if ok else 'FAIL'}")
+    sys.exit(0 if all(result["checks"].values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Refresh schedule simulation: fixed full runs vs freshness tiers.
+
+Simulates ``--days`` days on a virtual clock and compares the old
+scheduler (a full 7-day update at 06:00, 12:00 and 18:00) with the
+freshness-tiered :class:`RefreshScheduler` under the updater's default
+tiers. Reports, per day and per hall, how many menus are requested from
+the API, how many update jobs run (each reads the live version's rows for
+the menus it refreshes and writes only if one changed), and how old today's menu is
+while people look at it (sampled every 15 minutes from 07:00 to 21:00).
+
+Cached responses expire after the updater's TTL for the given tiers (see
+``refresh_schedule.cache_ttl``); a refresh that finds its slice's entry
+already expired cannot revalidate it or fall back to it, so the run exits
+1 if the tiered policy makes any.
+
+    python benchmarks/bench_schedule.py [--days 14] [--tiers 0:180,1:720,6:2880] [--cache-ttl-hours 48] [--json]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from refresh_schedule import RefreshPlanner, RefreshScheduler, cache_ttl, parse_tiers  # noqa: E402
+
+HALLS = ("parkside", "village", "evk")
+DAYS_AHEAD = 7
+FIXED_RUN_HOURS = (6, 12, 18)
+# Wall time of one update job on the virtual clock
+JOB_SECONDS = 60
+SAMPLE_SECONDS = 15 * 60
+VIEWING_HOURS = (7, 21)
+
+
+class Simulation:
+    """Virtual clock and per-slice refresh times shared by both policies"""
+
+    def __init__(self, start, ttl_seconds):
+        self.now = start
+        self.ttl_seconds = ttl_seconds
+        self.refreshed = {}
+        self.requests = 0
+        self.jobs = 0
+        self.expired_refreshes = 0
+
+    def last_refreshed(self, date, hall_id):
+        # Like the response cache, an entry past its TTL is gone
+        refreshed = self.refreshed.get((date, hall_id))
+        return refreshed if refreshed is not None and self.now - refreshed <= self.ttl_seconds else None
+
+    def refresh(self, slices):
+        self.jobs += 1
+        self.requests += len(slices)
+        for key in slices:
+            if key in self.refreshed and self.now - self.refreshed[key] > self.ttl_seconds:
+                self.expired_refreshes += 1
+            self.refreshed[key] = self.now
+        return True
+
+    def today_ages(self):
+        today = datetime.date.fromtimestamp(self.now)
+        return [
+            self.now - self.refreshed[(today, hall_id)] if (today, hall_id) in self.refreshed else None
+            for hall_id in HALLS
+        ]
+
+
+def _viewing(timestamp):
+    return VIEWING_HOURS[0] <= datetime.datetime.fromtimestamp(timestamp).hour < VIEWING_HOURS[1]
+
+
+def _all_slices(timestamp):
+    today = datetime.date.fromtimestamp(timestamp)
+    return {
+        (today + datetime.timedelta(days=offset), hall_id)
+        for offset in range(DAYS_AHEAD) for hall_id in HALLS
+    }
+
+
+def simulate_fixed(start, end, ttl_seconds):
+    sim = Simulation(start, ttl_seconds)
+    events = []
+    day = datetime.date.fromtimestamp(start)
+    while datetime.datetime.combine(day, datetime.time()).timestamp() < end:
+        for hour in FIXED_RUN_HOURS:
+            events.append(datetime.datetime.combine(day, datetime.time(hour)).timestamp())
+        day += datetime.timedelta(days=1)
+    return _replay(sim, start, end, lambda: events.pop(0) if events else end,
+                   lambda: sim.refresh(_all_slices(sim.now)))
+
+
+def simulate_tiered(start, end, tiers, ttl_seconds, seed=0):
+    sim = Simulation(start, ttl_seconds)
+    planner = RefreshPlanner(HALLS, DAYS_AHEAD, tiers, sim.last_refreshed)
+    scheduler = RefreshScheduler(planner, sim.refresh, rng=random.Random(seed))
+
+    def next_event():
+        # Jobs run until nothing is due, then the scheduler says when to look again
+        while True:
+            due, wake_at = scheduler.plan(sim.now)
+            if not due:
+                return wake_at
+            sim.refresh(due)
+            sim.now += JOB_SECONDS
+
+    return _replay(sim, start, end, next_event, lambda: None)
+
+
+def _replay(sim, start, end, next_event, run_job):
+    """Advance the clock event by event, sampling today's menu age in between"""
+    ages = []
+    sample_at = start
+    event_at = next_event()
+    while sim.now < end:
+        if sample_at <= event_at:
+            sim.now = max(sim.now, sample_at)
+            if _viewing(sim.now):
+                ages.extend(sim.today_ages())
+            sample_at += SAMPLE_SECONDS
+            continue
+        sim.now = max(sim.now, event_at)
+        run_job()
+        event_at = next_event()
+    return sim, ages
+
+
+def _summary(name, sim, ages, days):
+    known = [age for age in ages if age is not None]
+    return {
+        "policy": name,
+        "requests_per_hall_day": sim.requests / len(HALLS) / days,
+        "jobs_per_day": sim.jobs / days,
+        "today_missing_samples": len(ages) - len(known),
+        "today_mean_age_hours": sum(known) / len(known) / 3600 if known else None,
+        "today_max_age_hours": max(known) / 3600 if known else None,
+        "expired_cache_refreshes": sim.expired_refreshes,
+    }
+
+
+def run(days, tiers, ttl_seconds):
+    start = datetime.datetime.combine(datetime.date(2026, 1, 5), datetime.time(6)).timestamp()
+    end = start + days * 86400
+    results = []
+    for name, (sim, ages) in (
+        ("fixed 06/12/18", simulate_fixed(start, end, ttl_seconds)),
+        ("tiered", simulate_tiered(start, end, tiers, ttl_seconds)),
+    ):
+        results.append(_summary(name, sim, ages, days))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=14, help="simulated days")
+    parser.add_argument("--tiers", default="0:180,1:720,6:2880", help="days_ahead:minutes pairs, as MENU_REFRESH_TIERS")
+    parser.add_argument("--cache-ttl-hours", type=int, default=48, help="as MENU_CACHE_TTL_HOURS")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    tiers = parse_tiers(args.tiers)
+    results = run(args.days, tiers, cache_ttl(tiers, args.cache_ttl_hours * 3600))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for row in results:
+            print(
+                f"{row['policy']:<16} {row['requests_per_hall_day']:5.1f} requests/hall/day"
+                f"  {row['jobs_per_day']:4.1f} jobs/day"
+                f"  today's menu: mean age {row['today_mean_age_hours']:4.1f} h, max {row['today_max_age_hours']:4.1f} h"
+                f"  {row['expired_cache_refreshes']} refreshes past the cache TTL"
+            )
+    if any(row["expired_cache_refreshes"] for row in results if row["policy"] == "tiered"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Menu search benchmark: index build, incremental update and query latency.
+
+Builds a catalog of N items whose names mix the fixture's dish words with
+a synthetic vocabulary, lists each item on a few random (day, hall, meal)
+menus, then measures:
+
+* ``build``: indexing the whole catalog from scratch;
+* ``update``: a run where ``--churn`` of the items changed, applied incrementally;
+* query latency for exact, prefix, typo and multi-word queries.
+
+    python benchmarks/bench_search.py [--sizes 1000,10000,50000] [--churn 0.05] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from menu_model import MenuItem  # noqa: E402
+from menu_search import SearchIndex  # noqa: E402
+from standin_api import load_api_fixture  # noqa: E402
+
+HALLS = ("parkside", "village", "evk")
+MEALS = ("breakfast", "lunch", "dinner")
+QUERIES = ("chicken", "chick", "chiken", "tikka masala", "tika masla", "grilled veg", "salad", "rice")
+SYLLABLES = ("ka", "lo", "mi", "su", "ra", "te", "no", "chi", "ban", "pol", "ver", "dor", "gri", "sal", "pe")
+
+
+def build_catalog(size, seed=0):
+    """``size`` distinct MenuItems named from fixture words plus synthetic ones"""
+    fixture = load_api_fixture()
+    rng = random.Random(seed)
+    words = sorted({
+        word
+        for meal in fixture["meals"]
+        for station in meal["stations"]
+        for item in station["menu"]
+        for word in item["item"].split()
+        if not item["item"].isupper()
+    })
+    # Dish vocabularies grow much slower than catalogs
+    words += ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title() for _ in range(int(20 * size ** 0.5))]
+    categories = sorted({station["station"] for meal in fixture["meals"] for station in meal["stations"]})
+    return [
+        MenuItem(" ".join(rng.choice(words) for _ in range(rng.randint(2, 4))), rng.choice(categories))
+        for _ in range(size)
+    ]
+
+
+def build_menus(items, seed=0):
+    """``{(weekday, hall): {meal_type: [item]}}``, each item listed on one to three menus"""
+    rng = random.Random(seed)
+    menus = {}
+    for item in items:
+        for _ in range(rng.randint(1, 3)):
+            menu = menus.setdefault((rng.randrange(7), rng.choice(HALLS)), {})
+            menu.setdefault(rng.choice(MEALS), []).append(item)
+    return menus
+
+
+def index_run(index, menus):
+    started = time.perf_counter()
+    index.begin_run()
+    for (weekday, hall), menu in menus.items():
+        index.add_menu(weekday, hall, menu)
+    added, removed = index.finish_run()
+    return time.perf_counter() - started, added, removed
+
+
+def measure(size, churn, repeat):
+    items = build_catalog(size)
+    index = SearchIndex()
+    build_seconds, _, _ = index_run(index, build_menus(items))
+
+    # Replace a share of the catalog with new dishes, as a weekly menu change would
+    rng = random.Random(1)
+    replaced = build_catalog(int(size * churn), seed=1)
+    changed = list(items)
+    for position, item in zip(rng.sample(range(size), len(replaced)), replaced):
+        changed[position] = item
+    update_seconds, added, removed = index_run(index, build_menus(changed))
+
+    latencies = {}
+    for query in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            index.search(query, limit=20)
+            samples.append(time.perf_counter() - started)
+        latencies[query] = statistics.median(samples)
+
+    return {
+        "size": size,
+        "vocabulary": len(index._vocabulary()),
+        "build_seconds": build_seconds,
+        "update_seconds": update_seconds,
+        "update_added": added,
+        "update_removed": removed,
+        "index_bytes": len(json.dumps(index.to_json(), separators=(",", ":"))),
+        "query_seconds": latencies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma-separated catalog sizes")
+    parser.add_argument("--churn", type=float, default=0.05, help="share of items replaced between runs")
+    parser.add_argument("--repeat", type=int, default=50, help="runs per query; the median is kept")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = [measure(int(size), args.churn, args.repeat) for size in args.sizes.split(",")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        print(
+            f"{row['size']:>6} items  {row['vocabulary']:>6} tokens  build {row['build_seconds'] * 1e3:8.1f} ms  "
+            f"update {row['update_seconds'] * 1e3:7.1f} ms (+{row['update_added']} -{row['update_removed']})  "
+            f"{row['index_bytes'] / 2 ** 20:5.1f} MiB"
+        )
+        for query, seconds in row["query_seconds"].items():
+            print(f"{'':8}{query!r:<16} {seconds * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""In-process fake of the slice of the Supabase table API the updater uses.
+
+Supports ``table(name).select / insert / upsert / update / delete`` with
+``eq``, ``neq``, ``gte``, ``in_``, ``order``, ``range`` and ``limit``,
+enforces the primary and foreign keys of the menu tables, and records
+how many calls, rows and bytes each table receives. ``latency`` adds a
+fixed round-trip delay per request and ``fail_rate`` makes writes fail
+at random; ``fail_after`` lets that many more writes through and fails
+every one after them.
+"""
+import copy
+import datetime
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+
+PRIMARY_KEYS = {
+    "menu_items": ("menu_item_uuid",),
+    "dining_option_menu_items": ("day_of_week", "dining_option_string_id", "menu_item_uuid", "meal_type", "menu_version"),
+    "menu_versions": ("version",),
+    "menu_current_version": ("id",),
+    "menu_documents": ("menu_version", "menu_key"),
+    "menu_labels": ("label",),
+    "menu_search_indexes": ("menu_version",),
+}
+
+FOREIGN_KEYS = {
+    "dining_option_menu_items": (("menu_item_uuid", "menu_items", "menu_item_uuid"),),
+    "menu_documents": (("menu_version", "menu_versions", "version"),),
+    "menu_search_indexes": (("menu_version", "menu_versions", "version"),),
+}
+
+COLUMN_DEFAULTS = {
+    "menu_items": {"label_mask": 0},
+    "dining_option_menu_items": {"menu_version": 0},
+    # Callables are evaluated per written row, like a SQL default of now()
+    "menu_versions": {"created_at": lambda: datetime.datetime.now(datetime.timezone.utc).isoformat()},
+}
+
+WRITE_OPERATIONS = ("insert", "upsert", "update", "delete")
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self._db = db
+        self._table = table
+        self._operation = None
+        self._payload = None
+        self._filters = []
+        self._order = []
+        self._range = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+
+    def select(self, columns="*"):
+        self._operation = "select"
+        return self
+
+    def insert(self, rows):
+        self._operation, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self._operation, self._payload = "upsert", rows
+        self._on_conflict = tuple(on_conflict.split(",")) if on_conflict else None
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values):
+        self._operation, self._payload = "update", values
+        return self
+
+    def delete(self):
+        self._operation = "delete"
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self._filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def gte(self, column, value):
+        # day_of_week is an enum in Postgres, where every day sorts >= Monday
+        if column == "day_of_week":
+            return self
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) >= value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def limit(self, count):
+        self._range = (0, count - 1)
+        return self
+
+    def execute(self):
+        db = self._db
+        if db.latency:
+            time.sleep(db.latency)
+        with db.lock:
+            return self._execute()
+
+    def _matches(self, row):
+        return all(test(row) for test in self._filters)
+
+    def _execute(self):
+        db = self._db
+        rows = db.tables.setdefault(self._table, [])
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        stats = db.stats[self._table]
+        stats[f"{self._operation}_calls"] += 1
+
+        if self._operation in WRITE_OPERATIONS:
+            if db.fail_rate and db.rng.random() < db.fail_rate or db.fail_after == 0:
+                raise Exception(f"Injected failure writing to {self._table}")
+            if db.fail_after is not None:
+                db.fail_after -= 1
+            if self._operation in ("insert", "upsert"):
+                stats["bytes_written"] += len(json.dumps(payload, default=str))
+
+        if self._operation == "select":
+            found = [row for row in rows if self._matches(row)]
+            for column, desc in reversed(self._order):
+                found.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            if self._range:
+                found = found[self._range[0]:self._range[1] + 1]
+            stats["rows_read"] += len(found)
+            return FakeResponse(copy.deepcopy(found))
+
+        if self._operation in ("insert", "upsert"):
+            defaults = COLUMN_DEFAULTS.get(self._table, {})
+            payload = [
+                {**{column: value() if callable(value) else value for column, value in defaults.items()}, **row}
+                for row in payload
+            ]
+            db.check_foreign_keys(self._table, payload)
+            key = self._on_conflict or PRIMARY_KEYS.get(self._table)
+            index = db.index(self._table, key) if key else {}
+            for row in payload:
+                existing = index.get(tuple(row.get(column) for column in key)) if key else None
+                if existing is None:
+                    rows.append(copy.deepcopy(row))
+                    if key:
+                        index[tuple(row.get(column) for column in key)] = rows[-1]
+                elif self._operation == "insert":
+                    raise Exception(f"duplicate key value violates unique constraint on {self._table}")
+                elif not self._ignore_duplicates:
+                    existing.update(copy.deepcopy(row))
+            stats[f"rows_{self._operation}ed"] += len(payload)
+            return FakeResponse(payload)
+
+        if self._operation == "update":
+            found = [row for row in rows if self._matches(row)]
+            for row in found:
+                row.update(self._payload)
+            stats["rows_updated"] += len(found)
+            return FakeResponse(copy.deepcopy(found))
+
+        if self._operation == "delete":
+            found = [row for row in rows if self._matches(row)]
+            db.tables[self._table] = [row for row in rows if not self._matches(row)]
+            db.drop_indexes(self._table)
+            stats["rows_deleted"] += len(found)
+            return FakeResponse(found)
+
+        raise ValueError(f"No operation chosen for {self._table}")
+
+
+class FakeSupabase:
+    """Stands in for ``supabase.Client``; pass it wherever the updater expects one"""
+
+    def __init__(self, latency=0.0, fail_rate=0.0, seed=0):
+        self.tables = {}
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_after = None
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: defaultdict(int))
+        self._indexes = {}
+
+    @classmethod
+    def with_versioning(cls, **kwargs):
+        """A database initialized like ``sql/001_menu_versions.sql`` leaves it"""
+        db = cls(**kwargs)
+        db.tables["menu_versions"] = [{"version": 0, "status": "live"}]
+        db.tables["menu_current_version"] = [{"id": True, "version": 0}]
+        return db
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def index(self, table, key):
+        index = self._indexes.get((table, key))
+        if index is None:
+            index = {tuple(row.get(column) for column in key): row for row in self.tables.get(table, [])}
+            self._indexes[(table, key)] = index
+        return index
+
+    def drop_indexes(self, table):
+        for index_key in [index_key for index_key in self._indexes if index_key[0] == table]:
+            del self._indexes[index_key]
+
+    def check_foreign_keys(self, table, rows):
+        for column, parent_table, parent_column in FOREIGN_KEYS.get(table, ()):
+            parents = self.index(parent_table, (parent_column,))
+            for row in rows:
+                if (row.get(column),) not in parents:
+                    raise Exception(f"insert or update on {table} violates foreign key constraint on {column}")
+
+    def reset_stats(self):
+        self.stats.clear()
+
+    def write_volume(self):
+        """Per-table counters, e.g. ``{"menu_items": {"insert_calls": 2, "rows_inserted": 1500, ...}}``"""
+        return {table: dict(counters) for table, counters in self.stats.items()}
@@ -0,0 +1,195 @@
+"""Local stand-in for the dining menu API.
+
+Serves ``fixtures/api_menu_response.json`` at any ``/<hall>?y=&m=&d=`` URL,
+varied deterministically per hall and date so different requests return
+different menus. Latency, error rate and payload size are configurable, and
+responses carry an ETag so the updater's conditional requests work. For
+fault injection, a share of requests can also be slowed down
+(``slow_rate``, ``slow_latency``) or have the connection dropped
+(``reset_rate``), and ``down`` makes every request fail. Request arrival
+times are kept so callers can check client-side rate limits.
+
+    python benchmarks/standin_api.py --port 8765 --latency-ms 50 --error-rate 0.05 --slow-rate 0.02 --slow-ms 2000
+    MENU_API_URL=http://127.0.0.1:8765/ python automated_menu_updater.py --run-once
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+API_FIXTURE = os.path.join(FIXTURES_DIR, "api_menu_response.json")
+
+
+def load_api_fixture():
+    with open(API_FIXTURE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_payload(fixture, key, payload_scale=1):
+    """Menu for one request ``key`` (path and query), derived from ``fixture``.
+
+    Each station keeps a key-dependent subset of its items, and
+    ``payload_scale`` repeats every station's items that many times under
+    distinct names, multiplying the payload size.
+    """
+    rng = random.Random(key)
+    payload = copy.deepcopy(fixture)
+    for meal in payload.get("meals", []):
+        for station in meal.get("stations", []):
+            header, items = station["menu"][:1], station["menu"][1:]
+            kept = [item for item in items if rng.random() < 0.8] or items[:1]
+            station["menu"] = header + [
+                dict(item, item=item["item"] if copy_index == 0 else f"{item['item']} #{copy_index}")
+                for copy_index in range(payload_scale)
+                for item in kept
+            ]
+    return payload
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.request_times.append(time.monotonic())
+            fail = server.down or server.rng.random() < server.error_rate
+            reset = server.rng.random() < server.reset_rate
+            slow = server.rng.random() < server.slow_rate
+        latency = server.slow_latency if slow else server.latency
+        if latency:
+            time.sleep(latency)
+        if reset:
+            # Drop the connection without a response
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if fail:
+            self.send_error(503, "Injected failure")
+            return
+
+        body = json.dumps(build_payload(server.fixture, self.path, server.payload_scale)).encode("utf-8")
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients hang up on purpose (hedged duplicates, injected resets); say nothing
+        pass
+
+
+class MenuApiStandIn:
+    """Threaded HTTP server imitating ``MENU_API_URL``; use as a context manager"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, payload_scale=1, seed=0,
+                 slow_rate=0.0, slow_latency=0.0, reset_rate=0.0):
+        self._server = _Server((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fixture = load_api_fixture()
+        self._server.latency = latency
+        self._server.error_rate = error_rate
+        self._server.slow_rate = slow_rate
+        self._server.slow_latency = slow_latency
+        self._server.reset_rate = reset_rate
+        self._server.down = False
+        self._server.payload_scale = payload_scale
+        self._server.rng = random.Random(seed)
+        self._server.lock = threading.Lock()
+        self._server.requests = 0
+        self._server.request_times = []
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    @property
+    def request_times(self):
+        """``time.monotonic()`` arrival time of every request, in arrival order"""
+        return self._server.request_times
+
+    @property
+    def latency(self):
+        return self._server.latency
+
+    @latency.setter
+    def latency(self, value):
+        self._server.latency = value
+
+    @property
+    def down(self):
+        return self._server.down
+
+    @down.setter
+    def down(self, value):
+        self._server.down = value
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-scale", type=int, default=1)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="share of connections dropped unanswered")
+    args = parser.parse_args()
+
+    standin = MenuApiStandIn(
+        args.host, args.port, args.latency_ms / 1000, args.error_rate, args.payload_scale,
+        slow_rate=args.slow_rate, slow_latency=args.slow_ms / 1000, reset_rate=args.reset_rate,
+    )
+    print(f"Serving menu API stand-in at {standin.url}")
+    try:
+        standin._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
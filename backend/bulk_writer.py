@@ -0,0 +1,200 @@
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from metrics import Metrics
+
+
+class BulkWriteError(Exception):
+    """Raised when some writes still failed after all of their retries"""
+
+    def __init__(self, message, failed_batches=(), skipped_rows=0):
+        super().__init__(message)
+        self.failed_batches = list(failed_batches)
+        self.skipped_rows = skipped_rows
+
+
+class AdaptiveBatchSizer:
+    """Picks the next batch size from observed latency and payload size.
+
+    Grows the batch while requests finish well under ``target_latency`` and
+    halves it when they run over, never letting the estimated JSON payload
+    exceed ``max_payload_bytes``.
+    """
+
+    def __init__(self, initial=100, minimum=20, maximum=1000,
+                 target_latency=1.0, max_payload_bytes=512 * 1024):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.max_payload_bytes = max_payload_bytes
+        self.avg_row_bytes = None
+
+    def _observe_rows(self, rows):
+        if not rows:
+            return
+        row_bytes = max(1, len(json.dumps(rows)) // len(rows))
+        if self.avg_row_bytes is None:
+            self.avg_row_bytes = row_bytes
+        else:
+            self.avg_row_bytes = (self.avg_row_bytes * 3 + row_bytes) // 4
+
+    def next_size(self, queue):
+        """Size of the next batch to take from ``queue``"""
+        if self.avg_row_bytes is None:
+            self._observe_rows(list(islice(queue, 20)))
+        size = self.size
+        if self.avg_row_bytes:
+            size = min(size, max(self.minimum, self.max_payload_bytes // self.avg_row_bytes))
+        return size
+
+    def record(self, rows, latency):
+        """Feed back the latency of a committed batch"""
+        self._observe_rows(rows)
+        if latency < self.target_latency / 2:
+            self.size = min(self.maximum, int(self.size * 1.5))
+        elif latency > self.target_latency:
+            self.size = max(self.minimum, self.size // 2)
+
+
+class _Batch:
+    def __init__(self, table, method, rows, is_parent=False):
+        self.table = table
+        self.method = method
+        self.rows = rows
+        self.is_parent = is_parent
+        self.attempts = 0
+        self.error = None
+
+
+class BulkWriter:
+    """Writes rows to Supabase tables with several batches in flight at once.
+
+    Each table gets its own :class:`AdaptiveBatchSizer`. A failed batch is
+    retried on its own with exponential backoff; batches that already
+    succeeded are never resent. Batch latency, rows written and retries
+    are recorded in ``metrics``.
+    """
+
+    def __init__(self, client, max_workers=4, max_retries=3, retry_delay=1.0,
+                 target_latency=1.0, logger=None, metrics=None):
+        self.client = client
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.target_latency = target_latency
+        self.logger = logger or logging.getLogger(__name__)
+        self.metrics = metrics or Metrics()
+        self._sizers = {}
+
+    def _sizer(self, table):
+        if table not in self._sizers:
+            self._sizers[table] = AdaptiveBatchSizer(target_latency=self.target_latency)
+        return self._sizers[table]
+
+    def _take_batch(self, table, method, queue, is_parent=False):
+        size = min(self._sizer(table).next_size(queue), len(queue))
+        return _Batch(table, method, [queue.popleft() for _ in range(size)], is_parent)
+
+    def _with_retries(self, description, call, table="call"):
+        """Run ``call`` until it succeeds or runs out of retries; returns the last error or None"""
+        for attempt in range(1, self.max_retries + 2):
+            try:
+                call()
+                return None
+            except Exception as e:
+                if attempt > self.max_retries:
+                    self.logger.error(f"{description} failed after {attempt} attempts: {e}")
+                    self.metrics.inc("write_failures", table=table)
+                    return e
+                self.metrics.inc("write_retries", table=table)
+                self.logger.warning(f"{description} failed (attempt {attempt}), retrying: {e}")
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    def _send(self, batch):
+        def execute():
+            batch.attempts += 1
+            with self.metrics.timer("upload_batch", table=batch.table, method=batch.method):
+                started = time.monotonic()
+                getattr(self.client.table(batch.table), batch.method)(batch.rows).execute()
+                self._sizer(batch.table).record(batch.rows, time.monotonic() - started)
+            self.metrics.inc("rows_written", len(batch.rows), table=batch.table)
+
+        batch.error = self._with_retries(f"{batch.table} batch of {len(batch.rows)} rows", execute, batch.table)
+        return batch.error is None
+
+    def write(self, table, rows, method="insert"):
+        """Write independent rows to ``table``"""
+        self.write_dependent(table, rows, None, [], None, parent_method=method)
+
+    def write_dependent(self, parent_table, parent_rows, child_table, child_rows, key,
+                        parent_method="insert", child_method="insert"):
+        """Write parent rows and the child rows that reference them through ``key``.
+
+        A child row is sent only once the batch holding its parent has been
+        committed, so foreign keys always resolve, but children do not wait
+        for the whole parent table. Children whose parent is not among
+        ``parent_rows`` reference existing rows and are sent right away.
+        Children of a parent batch that ultimately fails are skipped.
+        """
+        parents = deque(parent_rows)
+        pending_keys = {row[key] for row in parent_rows} if key else set()
+        children = deque()
+        waiting = {}
+        for row in child_rows:
+            if row[key] in pending_keys:
+                waiting.setdefault(row[key], []).append(row)
+            else:
+                children.append(row)
+
+        failed = []
+        in_flight = {}
+        parent_batches_open = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while parents or children or in_flight:
+                while len(in_flight) < self.max_workers:
+                    if parents:
+                        batch = self._take_batch(parent_table, parent_method, parents, is_parent=True)
+                        parent_batches_open += 1
+                    elif children and (
+                        parent_batches_open == 0
+                        or len(children) >= self._sizer(child_table).next_size(children)
+                    ):
+                        # Partial child batches wait while parents can still release more rows
+                        batch = self._take_batch(child_table, child_method, children)
+                    else:
+                        break
+                    in_flight[pool.submit(self._send, batch)] = batch
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    ok = future.result()
+                    if not ok:
+                        failed.append(batch)
+                    if batch.is_parent:
+                        parent_batches_open -= 1
+                        if ok and key:
+                            for row in batch.rows:
+                                children.extend(waiting.pop(row[key], []))
+
+        skipped = sum(len(rows) for rows in waiting.values())
+        if failed:
+            tables = ", ".join(sorted({batch.table for batch in failed}))
+            raise BulkWriteError(
+                f"{len(failed)} batches failed ({tables}); {skipped} dependent rows skipped",
+                failed,
+                skipped,
+            )
+
+    def run(self, calls):
+        """Run independent zero-argument write calls concurrently, retrying each alone"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            errors = [e for e in pool.map(lambda call: self._with_retries("Write call", call), calls) if e]
+        if errors:
+            raise BulkWriteError(f"{len(errors)} of {len(calls)} write calls failed") from errors[0]
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+# Bump whenever the shape of the cached transformed menu changes so stale
+# entries are treated as misses instead of being served.
+CACHE_FORMAT_VERSION = 1
+
+# Entry files (and their temporary files) as named by ResponseCache._path
+ENTRY_NAME = re.compile(r"[0-9a-f]{64}\.json(\.tmp)?")
+
+
+class ResponseCache:
+    """On-disk cache of menu API responses keyed by request URL.
+
+    Each entry keeps the server's validators (ETag / Last-Modified), a hash of
+    the response body and the already-transformed menu, so an unchanged
+    response can skip both the download and ``_transform_api_data``.
+    """
+
+    def __init__(self, directory, ttl_seconds=48 * 3600, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def hash_body(body):
+        return hashlib.sha256(body).hexdigest()
+
+    def _path(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, url):
+        """Return the cached entry for ``url``, or None if missing, stale or unreadable"""
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        expired = time.time() - entry.get("stored_at", 0) > self.ttl_seconds
+        if expired or entry.get("version") != CACHE_FORMAT_VERSION or entry.get("url") != url:
+            self._remove(path)
+            return None
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Revalidation headers for a cached entry"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, response_headers, body_hash, transformed):
+        """Store (or refresh) the entry for ``url`` and return it"""
+        entry = {
+            "version": CACHE_FORMAT_VERSION,
+            "url": url,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "body_hash": body_hash,
+            "stored_at": time.time(),
+            "transformed": transformed,
+        }
+        path = self._path(url)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        return entry
+
+    def refresh(self, url, entry, response_headers):
+        """Record a successful revalidation, keeping any validators the server resent"""
+        etag = response_headers.get("ETag") or entry.get("etag")
+        last_modified = response_headers.get("Last-Modified") or entry.get("last_modified")
+        return self.put(
+            url,
+            {"ETag": etag, "Last-Modified": last_modified},
+            entry["body_hash"],
+            entry["transformed"],
+        )
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones until the cache fits in ``max_bytes``.
+
+        Only the cache's own entry files are considered; anything else in
+        the directory is left alone.
+        """
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not ENTRY_NAME.fullmatch(name):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not name.endswith(".json") or now - stat.st_mtime > self.ttl_seconds:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
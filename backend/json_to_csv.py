@@ -1,49 +1,87 @@
-import json
-import csv
-from uuid import uuid4
-
-weekday_strs = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-
-def json_to_csv(json_file):
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    menu_items = []
-    dining_option_menu_items = []
-
-    for weekday, locations in data.items():
-        for location, meals in locations.items():
-            for meal_type, meal_items in meals.items():
-                for item in meal_items:
-
-                    quoted_labels = [f"\"{label}\"" for label in item.get("labels", [])]
-                    labels_json_str = f"[{", ".join(quoted_labels)}]"
-                    menu_item_uuid = str(uuid4())
-
-                    menu_items.append([
-                        menu_item_uuid,
-                        item.get("name", ""),
-                        item.get("image_url", ""),
-                        item.get("category", ""),
-                        item.get("featured", False),
-                        labels_json_str,                        
-                    ])
-
-                    dining_option_menu_items.append([
-                        weekday_strs[int(weekday)],
-                        location,
-                        menu_item_uuid,
-                        meal_type,
-                    ])
-    
-    with open("menu_items.csv", 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["menu_item_uuid", "name", "image_url", "category", "featured", "labels"])
-        writer.writerows(menu_items)
-
-    with open("dining_option_menu_items.csv", 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["day_of_week", "dining_option_string_id", "menu_item_uuid", "meal_type"])
-        writer.writerows(dining_option_menu_items)
-
-json_to_csv("usc_dining_menus.json")
\ No newline at end of file
+"""Convert menu backups into menu_items / dining_option_menu_items CSVs.
+
+Usage:
+    python json_to_csv.py usc_dining_menus.json
+    python json_to_csv.py "backups/*.manifest.json" --output-dir csv --per-file
+
+Inputs may be legacy JSON backups, ``.jsonl`` / ``.jsonl.gz`` slice files
+or backup manifests, and are read one (day, hall) menu at a time, so
+memory stays bounded however large the archive is. Rows are flattened
+exactly as the updater uploads them.
+"""
+import argparse
+import glob
+import os
+
+from menu_backup import MenuCsvWriter, iter_backup_slices
+
+
+def expand_inputs(patterns):
+    """Expand glob patterns, keeping literal paths and skipping duplicates"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def _output_stem(path):
+    name = os.path.basename(path)
+    for suffix in (".manifest.json", ".jsonl.gz", ".jsonl", ".json"):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _convert(paths, menu_csv_path, dining_csv_path):
+    with open(menu_csv_path, 'w', newline='', encoding='utf-8') as menu_csv_file, \
+            open(dining_csv_path, 'w', newline='', encoding='utf-8') as dining_csv_file:
+        writer = MenuCsvWriter(menu_csv_file, dining_csv_file)
+        for path in paths:
+            for weekday, location, menu in iter_backup_slices(path):
+                writer.write_slice(weekday, location, menu)
+    print(f"Wrote {len(writer.item_ids)} menu items to {menu_csv_path} "
+          f"and {writer.links} dining option menu items to {dining_csv_path}")
+
+
+def json_to_csv(inputs, output_dir=".", per_file=False):
+    """Convert every backup matched by ``inputs`` into CSVs under ``output_dir``.
+
+    By default all inputs go into one ``menu_items.csv`` /
+    ``dining_option_menu_items.csv`` pair; ``per_file`` writes a
+    ``<input>_menu_items.csv`` / ``<input>_dining_option_menu_items.csv`` pair per input.
+    """
+    paths = expand_inputs(inputs)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if not per_file:
+        _convert(
+            paths,
+            os.path.join(output_dir, "menu_items.csv"),
+            os.path.join(output_dir, "dining_option_menu_items.csv"),
+        )
+        return
+
+    for path in paths:
+        stem = _output_stem(path)
+        _convert(
+            [path],
+            os.path.join(output_dir, f"{stem}_menu_items.csv"),
+            os.path.join(output_dir, f"{stem}_dining_option_menu_items.csv"),
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert menu backups to CSV")
+    parser.add_argument("inputs", nargs="*", default=["usc_dining_menus.json"],
+                        help="backup files or glob patterns (default: usc_dining_menus.json)")
+    parser.add_argument("-o", "--output-dir", default=".", help="directory for the CSV files")
+    parser.add_argument("--per-file", action="store_true", help="write one pair of CSVs per input")
+    args = parser.parse_args(argv)
+    json_to_csv(args.inputs, args.output_dir, args.per_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Stable label bit positions and per-menu inverted label indexes.
+
+Every distinct label gets a permanent bit in the ``menu_labels`` table, so
+an item's labels can be stored as one ``label_mask`` integer and dietary
+filters become bitwise tests:
+
+    (label_mask & required) == required and (label_mask & excluded) == 0
+"""
+
+# Masks travel through JSON to the app, where integers are exact up to 2**53
+MAX_LABEL_BITS = 53
+
+
+class LabelBits:
+    """Maps labels to their assigned bit positions"""
+
+    def __init__(self, assignments=()):
+        self.bits = {}
+        for row in assignments:
+            self.bits[row["label"]] = row["bit"]
+
+    def missing(self, labels):
+        return sorted(set(labels) - self.bits.keys())
+
+    def assign(self, labels):
+        """Give each unseen label the next free bit; returns the new ``menu_labels`` rows"""
+        rows = []
+        next_bit = max(self.bits.values(), default=-1) + 1
+        for label in self.missing(labels):
+            if next_bit >= MAX_LABEL_BITS:
+                raise ValueError(f"No label bits left for {label!r}; at most {MAX_LABEL_BITS} labels fit in a mask")
+            self.bits[label] = next_bit
+            rows.append({"label": label, "bit": next_bit})
+            next_bit += 1
+        return rows
+
+    def mask(self, labels):
+        """Bitmask of ``labels``; labels without a bit are ignored"""
+        mask = 0
+        for label in labels:
+            bit = self.bits.get(label)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def labels(self, mask):
+        return sorted(label for label, bit in self.bits.items() if mask >> bit & 1)
+
+
+def collect_labels(data):
+    """Every label used in ``data[weekday][location][meal_type]``"""
+    return {
+        label
+        for locations in data.values()
+        for meals in locations.values()
+        for items in meals.values()
+        for item in items
+        for label in item.get("labels", [])
+    }
+
+
+def build_label_index(items):
+    """Inverted index ``{label: [position in items, ...]}`` for one menu's item list"""
+    index = {}
+    for position, item in enumerate(items):
+        for label in item.get("labels", []):
+            index.setdefault(label, []).append(position)
+    return index
@@ -0,0 +1,306 @@
+import csv
+import datetime
+import glob
+import gzip
+import hashlib
+import json
+import os
+
+from menu_model import MenuIndex, menu_from_json, menu_to_json
+from menu_rows import (
+    DINING_OPTION_CSV_COLUMNS,
+    MENU_ITEM_CSV_COLUMNS,
+    build_menu_rows,
+    dining_option_csv_row,
+    menu_item_csv_row,
+)
+
+BACKUP_FORMAT_VERSION = 1
+
+
+class MenuCsvWriter:
+    """Appends flattened menu slices to a ``menu_items`` and a ``dining_option_menu_items`` CSV.
+
+    Each distinct menu item is written once, however many slices list it.
+    """
+
+    def __init__(self, menu_csv_file, dining_csv_file):
+        self._menu_csv = csv.writer(menu_csv_file)
+        self._dining_csv = csv.writer(dining_csv_file)
+        self._menu_csv.writerow(MENU_ITEM_CSV_COLUMNS)
+        self._dining_csv.writerow(DINING_OPTION_CSV_COLUMNS)
+        self.item_ids = set()
+        self.links = 0
+
+    def write_slice(self, weekday, location, menu):
+        menu_items, dining_option_menu_items = build_menu_rows({weekday: {location: menu}})
+        for row in menu_items:
+            if row["menu_item_uuid"] not in self.item_ids:
+                self.item_ids.add(row["menu_item_uuid"])
+                self._menu_csv.writerow(menu_item_csv_row(row))
+        self._dining_csv.writerows(dining_option_csv_row(row) for row in dining_option_menu_items)
+        self.links += len(dining_option_menu_items)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def backup_timestamp():
+    """Timestamp naming a new backup; microseconds keep two backups in one second apart"""
+    return datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+
+class StreamingBackupWriter:
+    """Writes compressed backup files incrementally, one (day, hall) menu slice at a time.
+
+    Each slice becomes one line of ``usc_dining_menus_<timestamp>.jsonl.gz``,
+    stored as its own gzip member so it can be read back by offset, and its
+    rows are appended to two gzipped CSVs holding the exact ``menu_item_uuid``
+    values that are uploaded. ``close`` writes
+    ``usc_dining_menus_<timestamp>.manifest.json`` describing the set, or
+    removes the files if no slice was written. The manifest records whether
+    the writer was marked ``complete``; a run that failed part-way leaves
+    an incomplete backup that ``latest_backup`` passes over.
+    """
+
+    def __init__(self, timestamp, directory="."):
+        os.makedirs(directory, exist_ok=True)
+        self.timestamp = timestamp
+        self.json_path = os.path.join(directory, f"usc_dining_menus_{timestamp}.jsonl.gz")
+        self.menu_csv_path = os.path.join(directory, f"menu_items_{timestamp}.csv.gz")
+        self.dining_csv_path = os.path.join(directory, f"dining_option_menu_items_{timestamp}.csv.gz")
+        self.manifest_path = os.path.join(directory, f"usc_dining_menus_{timestamp}.manifest.json")
+
+        self._json_file = open(self.json_path, "wb")
+        self._menu_csv_file = gzip.open(self.menu_csv_path, "wt", newline="", encoding="utf-8")
+        self._dining_csv_file = gzip.open(self.dining_csv_path, "wt", newline="", encoding="utf-8")
+        self._csv = MenuCsvWriter(self._menu_csv_file, self._dining_csv_file)
+        self._closed = False
+        self.slices = 0
+        # Set by the uploader once it knows which version holds this backup
+        self.menu_version = None
+        # Set once every menu of the run is in the backup (and, when streaming, published)
+        self.complete = False
+
+    def write_slice(self, weekday, location, menu):
+        """Append one hall's menu for one day; returns its offset in the JSONL file"""
+        offset = self._json_file.tell()
+        record = {"weekday": weekday, "location": location, "menu": menu_to_json(menu)}
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        self._json_file.write(gzip.compress(line.encode("utf-8"), compresslevel=6, mtime=0))
+        self._json_file.flush()
+
+        self._csv.write_slice(weekday, location, menu)
+        self.slices += 1
+        return offset
+
+    def read_slice(self, offset):
+        """Load a previously written slice back as ``(weekday, location, menu)``"""
+        with open(self.json_path, "rb") as f:
+            f.seek(offset)
+            with gzip.GzipFile(fileobj=f) as member:
+                record = json.loads(member.readline())
+        return record["weekday"], record["location"], menu_from_json(record["menu"])
+
+    def close(self):
+        """Close the data files and write the manifest; returns whether a backup was kept"""
+        if self._closed:
+            return self.slices > 0
+        self._closed = True
+        for f in (self._json_file, self._menu_csv_file, self._dining_csv_file):
+            f.close()
+        if not self.slices:
+            # Nothing to restore; a manifest would only shadow the last real backup
+            for path in (self.json_path, self.menu_csv_path, self.dining_csv_path):
+                os.remove(path)
+            return False
+
+        manifest = {
+            "format_version": BACKUP_FORMAT_VERSION,
+            "timestamp": self.timestamp,
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "menu_version": self.menu_version,
+            "complete": self.complete,
+            "slices": self.slices,
+            "menu_items": len(self._csv.item_ids),
+            "dining_option_menu_items": self._csv.links,
+            "files": {
+                name: {
+                    "path": os.path.basename(path),
+                    "bytes": os.path.getsize(path),
+                    "sha256": _sha256(path),
+                }
+                for name, path in (
+                    ("menus", self.json_path),
+                    ("menu_items", self.menu_csv_path),
+                    ("dining_option_menu_items", self.dining_csv_path),
+                )
+            },
+        }
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        return True
+
+
+def latest_backup(directory="."):
+    """Path of the newest complete manifest in ``directory`` that holds any menus, or None.
+
+    Manifests written before the ``complete`` flag count as complete if
+    they name the menu version they were published as.
+    """
+    for path in sorted(glob.glob(os.path.join(directory, "usc_dining_menus_*.manifest.json")), reverse=True):
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return path  # let the restore report what is wrong with it
+        if manifest.get("slices") and manifest.get("complete", manifest.get("menu_version") is not None):
+            return path
+    return None
+
+
+def _read_csv_column(path, column):
+    with gzip.open(path, "rt", newline="", encoding="utf-8") as f:
+        return {row[column] for row in csv.DictReader(f)}
+
+
+def _open_text(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, "rt", encoding="utf-8")
+
+
+class _IncrementalJSONReader:
+    """Walks a JSON document from a text stream, decoding one value at a time.
+
+    Only the value being decoded is held in memory, so the legacy
+    ``{weekday: {location: menu}}`` backups can be read one menu at a time.
+    """
+
+    def __init__(self, f, chunk_size=1 << 20):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or "" at the end of the stream"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos:self._pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON backup, found {self.peek()!r}")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Most likely cut off at the end of the buffer
+                if self._eof or not self._fill():
+                    raise
+                continue
+            if end == len(self._buf) and not self._eof and self._fill():
+                # A number may continue in the next chunk
+                continue
+            self._pos = end
+            return value
+
+    def members(self):
+        """Yield the keys of the object at the current position, leaving the reader on each value"""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def iter_backup_slices(path):
+    """Yield ``(weekday, location, menu)`` from a backup without loading it whole.
+
+    Accepts the same files as :func:`load_backup`, but does not verify manifests.
+    """
+    if path.endswith(".manifest.json"):
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        yield from iter_backup_slices(os.path.join(os.path.dirname(path), manifest["files"]["menus"]["path"]))
+        return
+
+    with _open_text(path) as f:
+        if ".jsonl" in os.path.basename(path):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield str(record["weekday"]), record["location"], record["menu"]
+            return
+
+        reader = _IncrementalJSONReader(f)
+        for weekday in reader.members():
+            for location in reader.members():
+                yield weekday, location, reader.value()
+
+
+def load_backup(path):
+    """Load a backup as a :class:`MenuIndex`, read like ``data[weekday][location][meal_type]``.
+
+    ``path`` may be a manifest, a ``.jsonl.gz`` / ``.jsonl`` slice file or a
+    legacy ``usc_dining_menus_<timestamp>.json`` backup. With a manifest the
+    file checksums are verified, and the ids rebuilt from the menus must
+    match the ids recorded at upload time; a ``ValueError`` is raised otherwise.
+    """
+    if path.endswith(".manifest.json"):
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != BACKUP_FORMAT_VERSION:
+            raise ValueError(f"Unsupported backup format version {manifest.get('format_version')}")
+
+        directory = os.path.dirname(path)
+        files = {name: os.path.join(directory, entry["path"]) for name, entry in manifest["files"].items()}
+        for name, entry in manifest["files"].items():
+            if _sha256(files[name]) != entry["sha256"]:
+                raise ValueError(f"Checksum mismatch for {files[name]}")
+
+        data = load_backup(files["menus"])
+        menu_items, dining_option_menu_items = build_menu_rows(data)
+        uploaded_ids = _read_csv_column(files["menu_items"], "menu_item_uuid")
+        if {row["menu_item_uuid"] for row in menu_items} != uploaded_ids:
+            raise ValueError("Menu item ids rebuilt from the backup do not match the uploaded ids")
+        if len(dining_option_menu_items) != manifest["dining_option_menu_items"]:
+            raise ValueError("Backup holds a different number of dining option menu items than were uploaded")
+        return data
+
+    data = MenuIndex()
+    for weekday, location, menu in iter_backup_slices(path):
+        data.add_menu(weekday, location, menu)
+    return data
@@ -0,0 +1,90 @@
+import asyncio
+import contextlib
+from urllib.parse import urlsplit
+
+import httpx
+
+from venues import TokenBucket
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _retryable(error):
+    # _get_once only raises HTTPStatusError for RETRY_STATUSES
+    return isinstance(error, (httpx.TransportError, httpx.HTTPStatusError))
+
+
+class MenuFetcher:
+    """Async HTTP client for the menu API sharing one pooled keep-alive connection set.
+
+    Concurrency is bounded twice: ``max_concurrency`` caps the total number of
+    in-flight requests and ``max_per_host`` caps how many of those may target
+    the same host, so a single upstream is never flooded. ``host_limits``
+    maps a host to its own ``max_concurrency`` and, with ``rate_per_second``
+    and ``burst``, a token bucket every request to it (retries and hedges
+    included) waits on. With a :class:`resilience.Resilience`, failed
+    requests are retried, hosts get circuit breakers and slow requests are
+    hedged; a retry waiting out its backoff holds no slot.
+    """
+
+    def __init__(self, max_concurrency=8, max_per_host=4, timeout=15, resilience=None, host_limits=None):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.host_limits = host_limits or {}
+        self.timeout = timeout
+        self.resilience = resilience
+        self._client = None
+        self._slots = None
+        self._host_slots = {}
+        self._buckets = {}
+
+    async def __aenter__(self):
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        self._client = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._client.aclose()
+        self._client = None
+
+    def _host_slot(self, host):
+        if host not in self._host_slots:
+            limits = self.host_limits.get(host, {})
+            self._host_slots[host] = asyncio.Semaphore(limits.get("max_concurrency", self.max_per_host))
+            if limits.get("rate_per_second"):
+                self._buckets[host] = TokenBucket(limits["rate_per_second"], limits.get("burst", 1))
+        return self._host_slots[host]
+
+    @contextlib.asynccontextmanager
+    async def _slot(self, url):
+        host = urlsplit(url).netloc
+        # Host slot first, so requests queued behind a busy host hold no global slot
+        async with self._host_slot(host), self._slots:
+            if host in self._buckets:
+                await self._buckets[host].acquire()
+            yield
+
+    async def _get_once(self, url, headers):
+        response = await self._client.get(url, headers=headers)
+        if self.resilience is not None and response.status_code in RETRY_STATUSES:
+            response.raise_for_status()
+        return response
+
+    async def get(self, url, headers=None):
+        """GET ``url`` once a global and a per-host slot and the host's rate limit allow; returns the response.
+
+        With ``resilience``, a response still failing with a retryable
+        status after the last retry raises ``httpx.HTTPStatusError``.
+        """
+        if self.resilience is None:
+            async with self._slot(url):
+                return await self._get_once(url, headers)
+        return await self.resilience.call(
+            urlsplit(url).netloc, lambda: self._get_once(url, headers), f"GET {url}",
+            retryable=_retryable, hedge=True, slot=lambda: self._slot(url),
+        )
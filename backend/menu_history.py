@@ -0,0 +1,269 @@
+"""Local, date-keyed history of every menu the updater has fetched.
+
+Supabase only keeps the current week keyed by day of week; this SQLite
+store keeps every (date, hall, meal) menu ever seen. Each run appends
+only what changed: new listings are inserted and listings that
+disappeared get a tombstone (``removed_run``); nothing is overwritten or
+deleted, so earlier states stay queryable.
+
+    python menu_history.py frequency "Chicken Tikka Masala"
+    python menu_history.py next "Chicken Tikka Masala" [--after 2025-02-01]
+    python menu_history.py range 2025-02-01 2025-02-07 [--hall evk]
+    python menu_history.py label Vegan [--start ...] [--end ...]
+"""
+import argparse
+import datetime
+import json
+import sqlite3
+
+from menu_rows import item_fingerprint, menu_item_uuid
+
+SCHEMA = """
+create table if not exists runs (
+    run_id integer primary key,
+    started_at text not null,
+    source text not null
+);
+
+create table if not exists items (
+    item_id integer primary key,
+    menu_item_uuid text not null unique,
+    fingerprint text not null,
+    name text not null,
+    category text not null,
+    labels text not null  -- JSON array
+);
+create index if not exists items_name_idx on items (name collate nocase);
+
+create table if not exists item_labels (
+    label text not null,
+    item_id integer not null references items (item_id),
+    primary key (label, item_id)
+) without rowid;
+
+create table if not exists menu_entries (
+    menu_date text not null,  -- ISO date
+    hall text not null,
+    meal_type text not null,
+    item_id integer not null references items (item_id),
+    added_run integer not null references runs (run_id),
+    removed_run integer references runs (run_id)
+);
+create index if not exists menu_entries_date_idx on menu_entries (menu_date, hall, meal_type);
+create index if not exists menu_entries_item_idx on menu_entries (item_id, menu_date);
+"""
+
+
+class MenuHistory:
+    """Append-only SQLite store of menus keyed by real date"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("pragma journal_mode = wal")
+        self._conn.execute("pragma synchronous = normal")
+        self._conn.executescript(SCHEMA)
+        self._item_ids = {}
+        self.run_id = None
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def begin_run(self, source="api"):
+        with self._conn:
+            cursor = self._conn.execute(
+                "insert into runs (started_at, source) values (?, ?)",
+                (datetime.datetime.now(datetime.timezone.utc).isoformat(), source),
+            )
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def _item_id(self, item):
+        item_uuid = menu_item_uuid(item)
+        item_id = self._item_ids.get(item_uuid)
+        if item_id is not None:
+            return item_id
+
+        row = self._conn.execute("select item_id from items where menu_item_uuid = ?", (item_uuid,)).fetchone()
+        if row:
+            item_id = row[0]
+        else:
+            labels = item.get("labels", [])
+            item_id = self._conn.execute(
+                "insert into items (menu_item_uuid, fingerprint, name, category, labels) values (?, ?, ?, ?, ?)",
+                (item_uuid, item_fingerprint(item), item.get("name", ""), item.get("category") or "", json.dumps(labels)),
+            ).lastrowid
+            self._conn.executemany(
+                "insert or ignore into item_labels (label, item_id) values (?, ?)",
+                [(label, item_id) for label in labels],
+            )
+        self._item_ids[item_uuid] = item_id
+        return item_id
+
+    def record_menu(self, menu_date, hall, menu):
+        """Append the changes between the stored menu for (``menu_date``, ``hall``) and ``menu``.
+
+        Returns ``(added, removed)`` listing counts; an unchanged menu writes nothing.
+        """
+        if self.run_id is None:
+            self.begin_run()
+        menu_date = menu_date.isoformat()
+
+        with self._conn:
+            desired = {
+                (meal_type.capitalize(), self._item_id(item))
+                for meal_type, items in menu.items()
+                for item in items
+            }
+            current = {
+                (meal_type, item_id): rowid
+                for rowid, meal_type, item_id in self._conn.execute(
+                    "select rowid, meal_type, item_id from menu_entries "
+                    "where menu_date = ? and hall = ? and removed_run is null",
+                    (menu_date, hall),
+                )
+            }
+            added = [
+                (menu_date, hall, meal_type, item_id, self.run_id)
+                for meal_type, item_id in desired
+                if (meal_type, item_id) not in current
+            ]
+            removed = [(self.run_id, rowid) for key, rowid in current.items() if key not in desired]
+
+            self._conn.executemany(
+                "insert into menu_entries (menu_date, hall, meal_type, item_id, added_run) values (?, ?, ?, ?, ?)",
+                added,
+            )
+            self._conn.executemany("update menu_entries set removed_run = ? where rowid = ?", removed)
+        return len(added), len(removed)
+
+    def _item_filter(self, dish):
+        """SQL matching items by menu_item_uuid or (case-insensitive) name"""
+        return "(i.menu_item_uuid = :dish or i.name = :dish collate nocase)", {"dish": dish}
+
+    def dish_frequency(self, dish, start=None, end=None):
+        """How often ``dish`` (name or menu_item_uuid) is on the menu.
+
+        Returns ``{"dates": distinct dates, "listings": (date, hall, meal) listings}``.
+        """
+        condition, params = self._item_filter(dish)
+        query = (
+            "select count(distinct e.menu_date), count(*) from items i "
+            "join menu_entries e on e.item_id = i.item_id "
+            f"where {condition} and e.removed_run is null"
+        )
+        if start:
+            query += " and e.menu_date >= :start"
+            params["start"] = start.isoformat()
+        if end:
+            query += " and e.menu_date <= :end"
+            params["end"] = end.isoformat()
+        dates, listings = self._conn.execute(query, params).fetchone()
+        return {"dates": dates, "listings": listings}
+
+    def next_served(self, dish, after=None):
+        """The first ``(date, hall, meal_type)`` on or after ``after`` (default today) serving ``dish``"""
+        condition, params = self._item_filter(dish)
+        params["after"] = (after or datetime.date.today()).isoformat()
+        row = self._conn.execute(
+            "select e.menu_date, e.hall, e.meal_type from items i "
+            "join menu_entries e on e.item_id = i.item_id "
+            f"where {condition} and e.removed_run is null and e.menu_date >= :after "
+            "order by e.menu_date, e.hall, e.meal_type limit 1",
+            params,
+        ).fetchone()
+        if not row:
+            return None
+        return datetime.date.fromisoformat(row[0]), row[1], row[2]
+
+    def menus_between(self, start, end, hall=None):
+        """``{date: {hall: {meal_type: [item dict]}}}`` for every stored menu from ``start`` to ``end``"""
+        query = (
+            "select e.menu_date, e.hall, e.meal_type, i.menu_item_uuid, i.name, i.category, i.labels "
+            "from menu_entries e join items i on i.item_id = e.item_id "
+            "where e.menu_date between ? and ? and e.removed_run is null"
+        )
+        params = [start.isoformat(), end.isoformat()]
+        if hall:
+            query += " and e.hall = ?"
+            params.append(hall)
+        query += " order by e.menu_date, e.hall, e.meal_type, e.rowid"
+
+        menus = {}
+        for menu_date, menu_hall, meal_type, item_uuid, name, category, labels in self._conn.execute(query, params):
+            menus.setdefault(datetime.date.fromisoformat(menu_date), {}).setdefault(menu_hall, {}) \
+                .setdefault(meal_type, []).append({
+                    "menu_item_uuid": item_uuid,
+                    "name": name,
+                    "category": category,
+                    "labels": json.loads(labels),
+                })
+        return menus
+
+    def served_with_label(self, label, start=None, end=None):
+        """``[(date, hall, meal_type, name)]`` for every listing of an item carrying ``label``"""
+        query = (
+            "select e.menu_date, e.hall, e.meal_type, i.name from item_labels l "
+            "join items i on i.item_id = l.item_id "
+            "join menu_entries e on e.item_id = l.item_id "
+            "where l.label = ? and e.removed_run is null"
+        )
+        params = [label]
+        if start:
+            query += " and e.menu_date >= ?"
+            params.append(start.isoformat())
+        if end:
+            query += " and e.menu_date <= ?"
+            params.append(end.isoformat())
+        query += " order by e.menu_date, e.hall, e.meal_type, i.name"
+        return [
+            (datetime.date.fromisoformat(menu_date), hall, meal_type, name)
+            for menu_date, hall, meal_type, name in self._conn.execute(query, params)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the local menu history")
+    parser.add_argument("--db", default="menu_history.sqlite3")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    frequency = commands.add_parser("frequency", help="how often a dish is served")
+    frequency.add_argument("dish")
+    frequency.add_argument("--start", type=datetime.date.fromisoformat)
+    frequency.add_argument("--end", type=datetime.date.fromisoformat)
+
+    next_date = commands.add_parser("next", help="next date a dish is served")
+    next_date.add_argument("dish")
+    next_date.add_argument("--after", type=datetime.date.fromisoformat)
+
+    date_range = commands.add_parser("range", help="menus for a date range")
+    date_range.add_argument("start", type=datetime.date.fromisoformat)
+    date_range.add_argument("end", type=datetime.date.fromisoformat)
+    date_range.add_argument("--hall")
+
+    label = commands.add_parser("label", help="listings of items carrying a label")
+    label.add_argument("label")
+    label.add_argument("--start", type=datetime.date.fromisoformat)
+    label.add_argument("--end", type=datetime.date.fromisoformat)
+
+    args = parser.parse_args()
+    with MenuHistory(args.db) as history:
+        if args.command == "frequency":
+            result = history.dish_frequency(args.dish, args.start, args.end)
+        elif args.command == "next":
+            result = history.next_served(args.dish, args.after)
+        elif args.command == "range":
+            result = {str(day): menus for day, menus in history.menus_between(args.start, args.end, args.hall).items()}
+        else:
+            result = history.served_with_label(args.label, args.start, args.end)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
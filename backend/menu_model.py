@@ -0,0 +1,208 @@
+import sys
+from array import array
+from collections.abc import Mapping
+from uuid import uuid5
+
+from menu_rows import MENU_ITEM_NAMESPACE, item_fingerprint
+
+_EMPTY = sys.intern("")
+
+
+class MenuItem:
+    """One dish as the pipeline carries it: slotted, hashable and shared.
+
+    Category and label strings are interned, and records are treated as
+    immutable so one instance can be listed by every day, hall and meal
+    that serves the dish. ``get`` mirrors the dict access used on the JSON
+    shape, so row builders accept records and plain dicts alike;
+    ``to_dict`` converts back at the edges (cache, backups, uploads).
+    """
+
+    __slots__ = ("name", "category", "labels", "image_url", "featured", "_uuid", "_hash")
+
+    def __init__(self, name, category=_EMPTY, labels=(), image_url=_EMPTY, featured=False):
+        self.name = name
+        # The API can send a null station; keep it as the dict rows did
+        self.category = sys.intern(category) if isinstance(category, str) else category
+        self.labels = tuple(sys.intern(label) for label in labels)
+        self.image_url = image_url or _EMPTY
+        self.featured = featured
+        self._uuid = None
+        self._hash = None
+
+    @classmethod
+    def from_dict(cls, item):
+        if isinstance(item, cls):
+            return item
+        return cls(
+            item.get("name", ""),
+            item.get("category", ""),
+            item.get("labels", ()),
+            item.get("image_url", ""),
+            item.get("featured", False),
+        )
+
+    @property
+    def uuid(self):
+        """The item's deterministic menu_item_uuid, computed once"""
+        if self._uuid is None:
+            self._uuid = str(uuid5(MENU_ITEM_NAMESPACE, item_fingerprint(self)))
+        return self._uuid
+
+    def get(self, key, default=None):
+        if key == "labels":
+            return list(self.labels)
+        if key in ("name", "category", "image_url", "featured"):
+            return getattr(self, key)
+        return default
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "labels": list(self.labels),
+            "image_url": self.image_url,
+            "category": self.category,
+            "featured": self.featured,
+        }
+
+    def _key(self):
+        return (self.name, self.category, self.labels, self.image_url, self.featured)
+
+    def __eq__(self, other):
+        if isinstance(other, MenuItem):
+            return self._key() == other._key()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self._key())
+        return self._hash
+
+    def __repr__(self):
+        return f"MenuItem({self.name!r}, {self.category!r}, {list(self.labels)!r})"
+
+
+def menu_from_json(menu):
+    """``{meal_type: [item dict]}`` -> ``{meal_type: [MenuItem]}``"""
+    return {
+        sys.intern(meal_type): [MenuItem.from_dict(item) for item in items]
+        for meal_type, items in menu.items()
+    }
+
+
+def menu_to_json(menu):
+    """``{meal_type: [MenuItem]}`` -> the plain JSON shape stored in caches and backups"""
+    return {
+        meal_type: [item.to_dict() if isinstance(item, MenuItem) else item for item in items]
+        for meal_type, items in menu.items()
+    }
+
+
+class MenuIndex(Mapping):
+    """Array-backed ``day -> hall -> meal_type -> [MenuItem]`` store.
+
+    Each distinct item is kept once. Hall and meal names are interned into
+    small id tables, and every (day, hall, meal) slice is a run of item ids
+    in one flat ``array``, so a listing costs four bytes instead of a dict
+    per item. Reading ``index[day]`` builds that day's nested dicts on
+    demand, which lets the index stand in wherever the nested JSON shape
+    is read. Adding a (day, hall) twice replaces the earlier menu.
+    """
+
+    def __init__(self, data=None):
+        self._halls = []
+        self._hall_ids = {}
+        self._meals = []
+        self._meal_ids = {}
+        self._items = []
+        self._item_ids = {}
+        # One entry per (day, hall, meal) slice; its items are
+        # _entries[_slice_start[i]:_slice_start[i] + _slice_length[i]]
+        self._slice_meal = array("H")
+        self._slice_start = array("I")
+        self._slice_length = array("I")
+        self._entries = array("I")
+        # (day, hall id) -> range of slice numbers, in insertion order
+        self._menus = {}
+        if data:
+            for day, locations in data.items():
+                for location, menu in locations.items():
+                    self.add_menu(day, location, menu)
+
+    @staticmethod
+    def _intern_id(name, names, ids):
+        name_id = ids.get(name)
+        if name_id is None:
+            name_id = ids[name] = len(names)
+            names.append(sys.intern(name))
+        return name_id
+
+    def _item_id(self, item):
+        record = MenuItem.from_dict(item)
+        item_id = self._item_ids.get(record)
+        if item_id is None:
+            item_id = self._item_ids[record] = len(self._items)
+            self._items.append(record)
+        return item_id
+
+    def add_menu(self, day, location, menu):
+        """Store one hall's ``{meal_type: [item]}`` menu for ``day``"""
+        hall_id = self._intern_id(location, self._halls, self._hall_ids)
+        first_slice = len(self._slice_start)
+        for meal_type, items in menu.items():
+            self._slice_meal.append(self._intern_id(meal_type, self._meals, self._meal_ids))
+            self._slice_start.append(len(self._entries))
+            self._entries.extend(self._item_id(item) for item in items)
+            self._slice_length.append(len(self._entries) - self._slice_start[-1])
+        key = (int(day), hall_id)
+        self._menus.pop(key, None)  # keep re-added menus in insertion order
+        self._menus[key] = range(first_slice, len(self._slice_start))
+
+    def _meal_items(self, slice_number):
+        start = self._slice_start[slice_number]
+        return [self._items[item_id] for item_id in self._entries[start:start + self._slice_length[slice_number]]]
+
+    def menu(self, day, location):
+        """One hall's ``{meal_type: [MenuItem]}`` for ``day``"""
+        slices = self._menus[(int(day), self._hall_ids[location])]
+        return {self._meals[self._slice_meal[i]]: self._meal_items(i) for i in slices}
+
+    def slices(self):
+        """Yield ``(day, location, menu)`` for every stored hall menu"""
+        for (day, hall_id), slices in self._menus.items():
+            yield day, self._halls[hall_id], {self._meals[self._slice_meal[i]]: self._meal_items(i) for i in slices}
+
+    @property
+    def records(self):
+        """Distinct MenuItem records across the whole index"""
+        return list(self._items)
+
+    @property
+    def link_count(self):
+        return len(self._entries)
+
+    def __getitem__(self, day):
+        day = int(day)
+        locations = {
+            self._halls[hall_id]: {self._meals[self._slice_meal[i]]: self._meal_items(i) for i in slices}
+            for (menu_day, hall_id), slices in self._menus.items()
+            if menu_day == day
+        }
+        if not locations:
+            raise KeyError(day)
+        return locations
+
+    def __iter__(self):
+        return iter(dict.fromkeys(day for day, _ in self._menus))
+
+    def __len__(self):
+        return len({day for day, _ in self._menus})
+
+    def to_data(self):
+        """The nested JSON shape, ``{day: {hall: {meal_type: [item dict]}}}``"""
+        data = {}
+        for day, location, menu in self.slices():
+            data.setdefault(day, {})[location] = menu_to_json(menu)
+        return data
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import sys
+from collections import OrderedDict
+
+from menu_model import MenuItem
+
+logger = logging.getLogger(__name__)
+
+# Bump when the normalization rules change so persisted entries are discarded
+NORMALIZER_VERSION = 1
+
+
+class ItemNormalizer:
+    """Turns raw API menu items into our item records, remembering every answer.
+
+    Two layers make repeated items cheap:
+
+    * label strings are normalized once per distinct raw preference or
+      allergen and interned, so every item shares the same label objects;
+    * an LRU cache maps an item's raw fingerprint (name, station,
+      preferences, allergens) to its normalized :class:`MenuItem`, which is
+      shared by every menu listing the dish. ``save`` persists it so later
+      runs start warm.
+    """
+
+    def __init__(self, path=None, max_entries=50000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._preferences = {}
+        self._allergens = {}
+        self._records = OrderedDict()
+        self._dirty = False
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable item normalizer cache {self.path}: {e}")
+            return
+        if stored.get("version") != NORMALIZER_VERSION:
+            return
+        for key, record in stored.get("entries", []):
+            if record is not None:
+                name, labels = record
+                record = MenuItem(name, key[1], labels)
+            self._records[tuple(key[:2]) + (tuple(key[2]), tuple(key[3]))] = record
+
+    def save(self):
+        """Write the record cache to ``path`` if anything was added"""
+        if not self.path or not self._dirty:
+            return
+        entries = [
+            [[name, station, list(preferences), list(allergens)], record and [record.name, list(record.labels)]]
+            for (name, station, preferences, allergens), record in self._records.items()
+        ]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": NORMALIZER_VERSION, "entries": entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def preference_label(self, preference):
+        label = self._preferences.get(preference)
+        if label is None:
+            label = self._preferences[preference] = sys.intern(preference.replace('-', ' ').title())
+        return label
+
+    def allergen_label(self, allergen):
+        label = self._allergens.get(allergen)
+        if label is None:
+            label = self._allergens[allergen] = sys.intern(allergen.capitalize())
+        return label
+
+    def _normalize(self, raw_name, station_name, preferences, allergens):
+        item_name = raw_name.strip()
+
+        # Station headers come through as short all-caps items
+        if not item_name or (item_name.isupper() and len(item_name.split()) <= 4):
+            return None
+
+        labels = {self.preference_label(pref) for pref in preferences}
+        labels.update(self.allergen_label(allergen) for allergen in allergens)
+        return MenuItem(item_name, station_name, sorted(labels))
+
+    def normalize(self, item, station_name):
+        """The shared :class:`MenuItem` for a raw API ``item`` served at ``station_name``, or None for headers"""
+        key = (item.get("item", ""), station_name, tuple(item.get("preferences", ())), tuple(item.get("allergens", ())))
+        record = self._records.get(key, False)
+        if record is False:
+            self.misses += 1
+            record = self._normalize(key[0], station_name, key[2], key[3])
+            self._records[key] = record
+            self._dirty = True
+            if len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+        else:
+            self.hits += 1
+            self._records.move_to_end(key)
+        return record
+
+
+def transform_api_data(api_data, normalizer):
+    """
+    Transforms the raw API JSON into ``{meal_type: [MenuItem]}``.
+    It specifically handles 'Brunch' by copying its items to both 'Breakfast' and 'Lunch'.
+    """
+    formatted_menu = {}
+    if "meals" not in api_data or not isinstance(api_data["meals"], list):
+        logger.warning("API data does not contain a 'meals' list. Skipping.")
+        return formatted_menu
+
+    for meal in api_data["meals"]:
+        meal_name = meal.get("name", "").lower()
+
+        if "stations" not in meal or not meal["stations"]:
+            continue
+
+        # Process all items for the current meal into a temporary list
+        current_meal_items = []
+        for station in meal.get("stations", []):
+            station_name = station.get("station", "General")
+
+            for item in station.get("menu", []):
+                # Skips header rows; repeated items are a cache lookup
+                formatted_item = normalizer.normalize(item, station_name)
+                if formatted_item:
+                    current_meal_items.append(formatted_item)
+
+        # If we found items, distribute them according to the new logic
+        if not current_meal_items:
+            continue
+
+        if meal_name == "brunch":
+            logger.info("Found 'Brunch' menu. Copying items to 'Breakfast' and 'Lunch'.")
+            # Use setdefault to safely create list if not exists, then extend
+            formatted_menu.setdefault("breakfast", []).extend(current_meal_items)
+            formatted_menu.setdefault("lunch", []).extend(current_meal_items)
+        else:
+            # For all other meals (dinner, etc.), add them normally.
+            # This also correctly handles if the API provides a separate "Breakfast" or "Lunch".
+            formatted_menu.setdefault(meal_name, []).extend(current_meal_items)
+
+    return formatted_menu
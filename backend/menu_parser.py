@@ -0,0 +1,229 @@
+import json
+import logging
+from functools import lru_cache
+
+from menu_model import MenuItem
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _parse_allergens(allergens_data):
+    """Decode a data-allergens attribute; the same strings repeat across items"""
+    try:
+        allergens = json.loads(allergens_data)
+    except ValueError:
+        return ()
+    return tuple(allergens) if isinstance(allergens, list) else ()
+
+
+def _clean_fallback_name(full_text):
+    # Remove price if present (usually at the end like "== $0")
+    if " == $" in full_text:
+        return full_text.split(" == $")[0].strip()
+    return full_text
+
+
+def _build_item(item_name, allergens, icon_alts, section_name):
+    labels = list(allergens)
+    for alt in icon_alts:
+        alt_text = alt.strip()
+        if alt_text and alt_text not in labels:
+            labels.append(alt_text.title())
+
+    return MenuItem(item_name.replace('"', '').strip(), section_name, labels)
+
+
+class BeautifulSoupMenuParser:
+    """Reference parser using BeautifulSoup's pure-Python ``html.parser``"""
+
+    name = "bs4"
+
+    def parse(self, html, default_meal_type):
+        """Parse the menu out of ``html``; returns ``{meal_type: [item, ...]}`` or None without a results div"""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        results_div = soup.find('div', class_='results')
+        if not results_div:
+            return None
+
+        menu = {}
+        meal_containers = results_div.find_all('div', class_='meal-container')
+
+        for meal_container in meal_containers:
+            # Get the meal type from data-meal attribute or from the header
+            meal_type = meal_container.get('data-meal', '')
+            if not meal_type:
+                meal_header = meal_container.find('p', class_='h4')
+                if meal_header:
+                    meal_type = meal_header.get_text().strip().lower()
+            if not meal_type:
+                meal_type = default_meal_type
+
+            meal_items = menu.setdefault(meal_type, [])
+
+            stations_div = meal_container.find('div', class_='stations')
+            if not stations_div:
+                continue
+
+            for station in stations_div.find_all('div', class_='station'):
+                station_title = station.find('p', class_='title')
+                section_name = station_title.get_text().strip() if station_title else "Main"
+
+                menu_items_ul = station.find('ul')
+                if not menu_items_ul:
+                    continue
+
+                for item_li in menu_items_ul.find_all('li', class_='js-menu-item'):
+                    # Extract item name (first text node)
+                    item_name = ""
+                    for content in item_li.contents:
+                        if isinstance(content, str):
+                            item_name = content.strip()
+                            break
+                    if not item_name:
+                        item_name = _clean_fallback_name(item_li.get_text().strip())
+
+                    if item_name and len(item_name) > 1:
+                        allergens_data = item_li.get('data-allergens')
+                        allergens = _parse_allergens(allergens_data) if allergens_data else ()
+                        icon_alts = [img.get('alt', '') for img in item_li.find_all('img', class_='icon')]
+                        meal_items.append(_build_item(item_name, allergens, icon_alts, section_name))
+
+        # If no meal containers found, fall back to any menu item in the results
+        if not meal_containers:
+            logger.warning("No meal containers found, trying fallback parsing...")
+            meal_items = menu.setdefault(default_meal_type, [])
+            for item_li in results_div.find_all('li', class_='js-menu-item'):
+                item_name = _clean_fallback_name(item_li.get_text().strip())
+                if item_name and len(item_name) > 1:
+                    meal_items.append(_build_item(item_name, (), (), "Main"))
+
+        return menu
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlMenuParser:
+    """Parser on lxml's C HTML parser with precompiled XPath selectors.
+
+    Produces exactly the same items as :class:`BeautifulSoupMenuParser`.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree, html
+
+        self._html = html
+        self._comment = etree._Comment
+        self._results = etree.XPath(f"(descendant-or-self::div[{_has_class('results')}])[1]")
+        self._meal_containers = etree.XPath(f".//div[{_has_class('meal-container')}]")
+        self._meal_header = etree.XPath(f"(.//p[{_has_class('h4')}])[1]")
+        self._stations_div = etree.XPath(f"(.//div[{_has_class('stations')}])[1]")
+        self._stations = etree.XPath(f".//div[{_has_class('station')}]")
+        self._station_title = etree.XPath(f"(.//p[{_has_class('title')}])[1]")
+        self._first_ul = etree.XPath("(.//ul)[1]")
+        self._menu_items = etree.XPath(f".//li[{_has_class('js-menu-item')}]")
+        self._icons = etree.XPath(f".//img[{_has_class('icon')}]")
+
+    def _get_text(self, element):
+        # Like BeautifulSoup's get_text(): all descendant text except comments
+        parts = []
+        if element.text and not isinstance(element, self._comment):
+            parts.append(element.text)
+        for child in element:
+            if not isinstance(child, self._comment):
+                parts.append(self._get_text(child))
+            if child.tail:
+                parts.append(child.tail)
+        return "".join(parts)
+
+    def _first_string(self, element):
+        # BeautifulSoup's first string child: leading text, a comment, or a child's tail
+        if element.text is not None:
+            return element.text
+        for child in element:
+            if isinstance(child, self._comment):
+                return child.text or ""
+            if child.tail is not None:
+                return child.tail
+        return None
+
+    def parse(self, html, default_meal_type):
+        """Parse the menu out of ``html``; returns ``{meal_type: [item, ...]}`` or None without a results div"""
+        if not html or not html.strip():
+            return None
+        root = self._html.fromstring(html)
+        found = self._results(root)
+        if not found:
+            return None
+        results_div = found[0]
+
+        menu = {}
+        meal_containers = self._meal_containers(results_div)
+
+        for meal_container in meal_containers:
+            meal_type = meal_container.get('data-meal', '')
+            if not meal_type:
+                meal_header = self._meal_header(meal_container)
+                if meal_header:
+                    meal_type = self._get_text(meal_header[0]).strip().lower()
+            if not meal_type:
+                meal_type = default_meal_type
+
+            meal_items = menu.setdefault(meal_type, [])
+
+            stations_div = self._stations_div(meal_container)
+            if not stations_div:
+                continue
+
+            for station in self._stations(stations_div[0]):
+                station_title = self._station_title(station)
+                section_name = self._get_text(station_title[0]).strip() if station_title else "Main"
+
+                menu_items_ul = self._first_ul(station)
+                if not menu_items_ul:
+                    continue
+
+                for item_li in self._menu_items(menu_items_ul[0]):
+                    first_string = self._first_string(item_li)
+                    item_name = first_string.strip() if first_string is not None else ""
+                    if not item_name:
+                        item_name = _clean_fallback_name(self._get_text(item_li).strip())
+
+                    if item_name and len(item_name) > 1:
+                        allergens_data = item_li.get('data-allergens')
+                        allergens = _parse_allergens(allergens_data) if allergens_data else ()
+                        icon_alts = [img.get('alt', '') for img in self._icons(item_li)]
+                        meal_items.append(_build_item(item_name, allergens, icon_alts, section_name))
+
+        if not meal_containers:
+            logger.warning("No meal containers found, trying fallback parsing...")
+            meal_items = menu.setdefault(default_meal_type, [])
+            for item_li in self._menu_items(results_div):
+                item_name = _clean_fallback_name(self._get_text(item_li).strip())
+                if item_name and len(item_name) > 1:
+                    meal_items.append(_build_item(item_name, (), (), "Main"))
+
+        return menu
+
+
+MENU_PARSERS = {
+    "lxml": LxmlMenuParser,
+    "bs4": BeautifulSoupMenuParser,
+}
+
+
+def get_menu_parser(name=None):
+    """Return the named parser, or the fastest one whose dependencies are installed"""
+    if name:
+        return MENU_PARSERS[name]()
+    try:
+        return LxmlMenuParser()
+    except ImportError:
+        logger.warning("lxml is not installed, falling back to the BeautifulSoup menu parser")
+        return BeautifulSoupMenuParser()
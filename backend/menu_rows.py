@@ -0,0 +1,151 @@
+import json
+from uuid import UUID, uuid5
+
+from label_index import build_label_index
+
+weekday_strs = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Fixed namespace for menu item ids; changing it re-keys every row in menu_items
+MENU_ITEM_NAMESPACE = UUID("6f1d3c52-8a0e-4b8e-9a55-2f6de1c0b7a4")
+
+
+def weekday_name(weekday):
+    """``0`` / ``"0"`` -> ``"Monday"``"""
+    return weekday_strs[int(weekday)]
+
+
+def item_fingerprint(item):
+    """Canonical string identifying a dish: name, category and sorted labels"""
+    return json.dumps(
+        [item.get("name", ""), item.get("category", ""), sorted(item.get("labels", []))],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def menu_item_uuid(item):
+    """Deterministic menu_item_uuid derived from the item's fingerprint"""
+    if not isinstance(item, dict):
+        return item.uuid  # menu_model.MenuItem caches its id
+    return str(uuid5(MENU_ITEM_NAMESPACE, item_fingerprint(item)))
+
+
+def build_menu_rows(data, label_bits=None):
+    """Flatten ``data[weekday][location][meal_type]`` into Supabase rows.
+
+    Returns ``(menu_items, dining_option_menu_items)``. Each distinct dish
+    appears once in ``menu_items`` however many days, halls or meals list
+    it; link rows are de-duplicated as well. Both lists keep first-seen order.
+    With ``label_bits`` (a :class:`label_index.LabelBits`) item rows also
+    carry their ``label_mask``.
+    """
+    menu_items = {}
+    dining_option_menu_items = {}
+
+    for weekday, locations in data.items():
+        day_of_week = weekday_strs[int(weekday)]
+        for location, meals in locations.items():
+            for meal_type, meal_items in meals.items():
+                # Capitalize meal type to match app expectations
+                capitalized_meal_type = meal_type.capitalize()
+
+                for item in meal_items:
+                    item_uuid = menu_item_uuid(item)
+
+                    if item_uuid not in menu_items:
+                        menu_items[item_uuid] = {
+                            "menu_item_uuid": item_uuid,
+                            "name": item.get("name", ""),
+                            "image_url": item.get("image_url", ""),
+                            "category": item.get("category", ""),
+                            "featured": item.get("featured", False),
+                            "labels": item.get("labels", []),  # Keep as proper array
+                        }
+                        if label_bits is not None:
+                            menu_items[item_uuid]["label_mask"] = label_bits.mask(item.get("labels", []))
+
+                    link_key = (day_of_week, location, item_uuid, capitalized_meal_type)
+                    if link_key not in dining_option_menu_items:
+                        dining_option_menu_items[link_key] = {
+                            "day_of_week": day_of_week,
+                            "dining_option_string_id": location,
+                            "menu_item_uuid": item_uuid,
+                            "meal_type": capitalized_meal_type,
+                        }
+
+    return list(menu_items.values()), list(dining_option_menu_items.values())
+
+
+MENU_ITEM_CSV_COLUMNS = ["menu_item_uuid", "name", "image_url", "category", "featured", "labels"]
+DINING_OPTION_CSV_COLUMNS = ["day_of_week", "dining_option_string_id", "menu_item_uuid", "meal_type"]
+
+
+def menu_item_csv_row(row):
+    """A ``menu_items`` row as written to CSV; labels become a JSON array string"""
+    return [
+        row["menu_item_uuid"],
+        row["name"],
+        row["image_url"],
+        row["category"],
+        row["featured"],
+        json.dumps(row["labels"]),
+    ]
+
+
+def dining_option_csv_row(row):
+    """A ``dining_option_menu_items`` row as written to CSV"""
+    return [row["day_of_week"], row["dining_option_string_id"], row["menu_item_uuid"], row["meal_type"]]
+
+
+def menu_document_key(day_of_week, location, meal_type):
+    """Primary key of a menu document, e.g. ``Monday:evk:Dinner``"""
+    return f"{day_of_week}:{location}:{meal_type}"
+
+
+def build_menu_documents(data, label_bits=None):
+    """One read-optimized document per (day_of_week, location, meal_type).
+
+    Each document carries the full, ordered item list for that menu so the
+    app can load it with a single primary-key lookup instead of joining
+    dining_option_menu_items and menu_items, plus ``label_index``, an
+    inverted ``{label: [item position]}`` index for dietary filters. With
+    ``label_bits`` each item also carries its ``label_mask``.
+    """
+    documents = []
+
+    for weekday, locations in data.items():
+        day_of_week = weekday_strs[int(weekday)]
+        for location, meals in locations.items():
+            for meal_type, meal_items in meals.items():
+                # Capitalize meal type to match app expectations
+                capitalized_meal_type = meal_type.capitalize()
+                items = []
+                seen = set()
+
+                for item in meal_items:
+                    item_uuid = menu_item_uuid(item)
+                    if item_uuid in seen:
+                        continue
+                    seen.add(item_uuid)
+                    document_item = {
+                        "menu_item_uuid": item_uuid,
+                        "name": item.get("name", ""),
+                        "image_url": item.get("image_url", ""),
+                        "category": item.get("category", ""),
+                        "featured": item.get("featured", False),
+                        "labels": item.get("labels", []),
+                    }
+                    if label_bits is not None:
+                        document_item["label_mask"] = label_bits.mask(document_item["labels"])
+                    items.append(document_item)
+
+                documents.append({
+                    "menu_key": menu_document_key(day_of_week, location, capitalized_meal_type),
+                    "day_of_week": day_of_week,
+                    "dining_option_string_id": location,
+                    "meal_type": capitalized_meal_type,
+                    "items": items,
+                    "label_index": build_label_index(items),
+                })
+
+    return documents
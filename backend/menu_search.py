@@ -0,0 +1,321 @@
+"""Search index over menu item names and categories.
+
+Names and categories are normalized (accents stripped, case-folded) and
+split into tokens; each token of the vocabulary is also indexed by its
+trigrams, so a query term matches exact tokens, tokens it is a prefix of
+and, for typos, tokens sharing enough trigrams. Every item remembers the
+(day, hall, meal) menus listing it, so hits come back as
+(date, hall, meal) ranked by relevance.
+
+The index is incremental: items are keyed by their content-addressed
+menu_item_uuid, so a run only tokenizes items it has not seen before and
+drops the ones no menu lists anymore. ``to_json`` is both the published
+and the on-disk form; trigrams are rebuilt from the vocabulary on load.
+
+    python menu_search.py "chiken tikka" [--index .menu_state/search_index.json] [--limit 10]
+"""
+import argparse
+import bisect
+import datetime
+import heapq
+import json
+import os
+import sys
+import unicodedata
+from collections import Counter
+
+from menu_rows import menu_document_key, menu_item_uuid, weekday_strs
+
+# Bump when tokenization or the JSON layout changes so stored indexes are rebuilt
+SEARCH_INDEX_VERSION = 1
+
+# A category match counts for less than a name match
+CATEGORY_WEIGHT = 0.5
+PREFIX_WEIGHT = 0.9
+FUZZY_WEIGHT = 0.8
+# Minimum Dice similarity of trigram sets for a typo match
+FUZZY_THRESHOLD = 0.45
+MAX_EXPANSIONS = 50
+
+
+def normalize_text(text):
+    """Case-folded, accent-free text with punctuation turned into spaces"""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(
+        char if char.isalnum() else " "
+        for char in text.casefold()
+        if not unicodedata.combining(char)
+    )
+
+
+def tokenize(text):
+    return [sys.intern(token) for token in normalize_text(text).split()]
+
+
+def trigrams(token):
+    """pg_trgm-style trigrams; padding makes short tokens and word starts count"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def date_for_weekday(weekday, today=None):
+    """The first date on or after ``today`` falling on ``weekday`` (0 = Monday)"""
+    today = today or datetime.date.today()
+    return today + datetime.timedelta(days=(int(weekday) - today.weekday()) % 7)
+
+
+class SearchIndex:
+    """Token, prefix and trigram index from menu items to the menus listing them"""
+
+    def __init__(self):
+        self._items = {}  # menu_item_uuid -> (name, category)
+        self._name_lengths = {}  # menu_item_uuid -> len(name), the tie-break between equal scores
+        self._names = {}  # token -> {menu_item_uuid}
+        self._categories = {}  # token -> {menu_item_uuid}
+        self._trigrams = {}  # trigram -> {token}
+        self._sorted_vocabulary = None
+        self._listings = {}  # menu_item_uuid -> [(weekday, hall, meal_type)]
+        self.added = 0
+        self.removed = 0
+
+    @classmethod
+    def from_json(cls, document):
+        """Rebuild an index from ``to_json`` output"""
+        index = cls()
+        if document.get("format_version") != SEARCH_INDEX_VERSION:
+            return index
+        uuids = []
+        for item_uuid, name, category in document["items"]:
+            uuids.append(item_uuid)
+            index._items[item_uuid] = (name, category)
+            index._name_lengths[item_uuid] = len(name)
+        for field, postings in (("names", index._names), ("categories", index._categories)):
+            for token, positions in document[field].items():
+                postings[sys.intern(token)] = {uuids[position] for position in positions}
+        for token in index._names.keys() | index._categories.keys():
+            index._add_trigrams(token)
+        for menu_key, positions in document["menus"].items():
+            day_of_week, hall, meal_type = menu_key.split(":", 2)
+            listing = (weekday_strs.index(day_of_week), hall, meal_type)
+            for position in positions:
+                index._listings.setdefault(uuids[position], []).append(listing)
+        return index
+
+    @classmethod
+    def load(cls, path):
+        """The index saved at ``path``, or an empty one if it is missing or outdated"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls.from_json(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return cls()
+
+    def to_json(self):
+        """Compact form: items, token postings and menus as item positions"""
+        positions = {item_uuid: position for position, item_uuid in enumerate(self._items)}
+        menus = {}
+        for item_uuid, listings in self._listings.items():
+            for weekday, hall, meal_type in listings:
+                menu_key = menu_document_key(weekday_strs[weekday], hall, meal_type)
+                menus.setdefault(menu_key, []).append(positions[item_uuid])
+        return {
+            "format_version": SEARCH_INDEX_VERSION,
+            "items": [[item_uuid, name, category] for item_uuid, (name, category) in self._items.items()],
+            "names": {token: sorted(positions[u] for u in uuids) for token, uuids in self._names.items()},
+            "categories": {token: sorted(positions[u] for u in uuids) for token, uuids in self._categories.items()},
+            "menus": {menu_key: sorted(items) for menu_key, items in menus.items()},
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _add_trigrams(self, token):
+        for trigram in trigrams(token):
+            self._trigrams.setdefault(trigram, set()).add(token)
+        self._sorted_vocabulary = None
+
+    def _remove_trigrams(self, token):
+        for trigram in trigrams(token):
+            tokens = self._trigrams.get(trigram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[trigram]
+        self._sorted_vocabulary = None
+
+    def _post(self, postings, token, item_uuid):
+        if token not in self._names and token not in self._categories:
+            self._add_trigrams(token)
+        postings.setdefault(token, set()).add(item_uuid)
+
+    def _unpost(self, postings, token, item_uuid):
+        uuids = postings.get(token)
+        if uuids is None:
+            return
+        uuids.discard(item_uuid)
+        if not uuids:
+            del postings[token]
+            if token not in self._names and token not in self._categories:
+                self._remove_trigrams(token)
+
+    def _add_item(self, item_uuid, name, category):
+        self._items[item_uuid] = (name, category)
+        self._name_lengths[item_uuid] = len(name)
+        for token in tokenize(name):
+            self._post(self._names, token, item_uuid)
+        for token in tokenize(category):
+            self._post(self._categories, token, item_uuid)
+        self.added += 1
+
+    def _remove_item(self, item_uuid):
+        name, category = self._items.pop(item_uuid)
+        del self._name_lengths[item_uuid]
+        for token in tokenize(name):
+            self._unpost(self._names, token, item_uuid)
+        for token in tokenize(category):
+            self._unpost(self._categories, token, item_uuid)
+        self.removed += 1
+
+    def begin_run(self):
+        """Forget every listing; the run re-adds the menus it publishes"""
+        self._listings = {}
+        self.added = self.removed = 0
+
+    def add_menu(self, weekday, location, menu):
+        """Index one hall's ``{meal_type: [item]}`` menu for ``weekday``"""
+        weekday = int(weekday)
+        for meal_type, items in menu.items():
+            listing = (weekday, location, meal_type.capitalize())
+            for item in items:
+                item_uuid = menu_item_uuid(item)
+                if item_uuid not in self._items:
+                    self._add_item(item_uuid, item.get("name", ""), item.get("category") or "")
+                listings = self._listings.setdefault(item_uuid, [])
+                if listing not in listings:
+                    listings.append(listing)
+
+    def finish_run(self):
+        """Drop items no menu of this run lists; returns ``(added, removed)`` since ``begin_run``"""
+        for item_uuid in [item_uuid for item_uuid in self._items if item_uuid not in self._listings]:
+            self._remove_item(item_uuid)
+        return self.added, self.removed
+
+    def _vocabulary(self):
+        if self._sorted_vocabulary is None:
+            self._sorted_vocabulary = sorted(self._names.keys() | self._categories.keys())
+        return self._sorted_vocabulary
+
+    def _expand(self, term):
+        """``{vocabulary token: weight}`` for the tokens ``term`` matches exactly or as a prefix.
+
+        Only a term that neither is nor starts any vocabulary token is
+        treated as a typo and matched against tokens sharing its trigrams.
+        """
+        matches = {}
+        vocabulary = self._vocabulary()
+        start = bisect.bisect_left(vocabulary, term)
+        for token in vocabulary[start:start + MAX_EXPANSIONS]:
+            if not token.startswith(term):
+                break
+            matches[token] = 1.0 if token == term else PREFIX_WEIGHT * (1 + len(term) / len(token)) / 2
+
+        if not matches and len(term) >= 3:
+            term_trigrams = trigrams(term)
+            shared = Counter()
+            for trigram in term_trigrams:
+                shared.update(self._trigrams.get(trigram, ()))
+            for token, count in shared.items():
+                # Dice coefficient; a token has len + 1 padded trigrams
+                similarity = 2 * count / (len(term_trigrams) + len(token) + 1)
+                if similarity >= FUZZY_THRESHOLD:
+                    weight = FUZZY_WEIGHT * similarity
+                    if weight > matches.get(token, 0):
+                        matches[token] = weight
+        return matches
+
+    def _score_term(self, term):
+        """``{menu_item_uuid: best weight}`` over every name and category token ``term`` matches"""
+        weighted = []
+        for token, weight in self._expand(term).items():
+            if token in self._names:
+                weighted.append((weight, self._names[token]))
+            if token in self._categories:
+                weighted.append((weight * CATEGORY_WEIGHT, self._categories[token]))
+        # Strongest postings first, so an item keeps the first weight it gets
+        weighted.sort(key=lambda entry: entry[0], reverse=True)
+        scores = {}
+        for weight, uuids in weighted:
+            scores.update(dict.fromkeys(uuids.difference(scores) if scores else uuids, weight))
+        return scores
+
+    def _score_items(self, terms):
+        """``{menu_item_uuid: score}`` for items matching every term"""
+        scores = None
+        for term in terms:
+            term_scores = self._score_term(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {item_uuid: score + term_scores[item_uuid]
+                          for item_uuid, score in scores.items() if item_uuid in term_scores}
+            if not scores:
+                break
+        return scores or {}
+
+    def search(self, query, limit=20, today=None):
+        """Listings of the items best matching ``query``, most relevant first.
+
+        Each hit is ``{"date", "hall", "meal_type", "name", "category",
+        "menu_item_uuid", "score"}``; dates are the next ones (from
+        ``today``) falling on the listed day of week.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores = self._score_items(terms)
+        if not scores:
+            return []
+        # Every item has at least one listing, so the best ``limit`` items cover the hits
+        cutoff = heapq.nlargest(limit, scores.values())[-1]
+        best = [item_uuid for item_uuid, score in scores.items() if score >= cutoff]
+        best.sort(key=self._name_lengths.__getitem__)
+        best.sort(key=scores.__getitem__, reverse=True)
+
+        hits = []
+        for item_uuid in best[:limit]:
+            name, category = self._items[item_uuid]
+            score = scores[item_uuid]
+            for weekday, hall, meal_type in self._listings.get(item_uuid, ()):
+                hits.append({
+                    "date": date_for_weekday(weekday, today),
+                    "hall": hall,
+                    "meal_type": meal_type,
+                    "name": name,
+                    "category": category,
+                    "menu_item_uuid": item_uuid,
+                    "score": round(score / len(terms), 3),
+                })
+        hits.sort(key=lambda hit: (-hit["score"], hit["date"], hit["hall"], hit["meal_type"]))
+        return hits[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the local menu search index")
+    parser.add_argument("query")
+    parser.add_argument("--index", default=os.path.join(os.getenv("MENU_STATE_DIR", ".menu_state"), "search_index.json"))
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = SearchIndex.load(args.index)
+    print(json.dumps(index.search(args.query, args.limit), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
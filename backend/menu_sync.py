@@ -0,0 +1,149 @@
+from menu_rows import build_menu_rows
+
+# Columns that can differ for the same menu_item_uuid; name, category and
+# labels are part of the id itself. label_mask follows from the labels, but
+# rows written before bits were assigned still carry the default 0.
+MUTABLE_ITEM_COLUMNS = ("image_url", "featured", "label_mask")
+
+
+class MenuDiff:
+    """Row-level differences between the live version and the desired menu.
+
+    ``links_to_delete`` are live links the desired menu no longer has; a new
+    version simply leaves them out. Items no version uses any more are
+    removed by the garbage collector, not by the diff.
+    """
+
+    def __init__(self):
+        self.desired_links = []
+        self.items_to_insert = []
+        self.items_to_upsert = []
+        self.links_to_insert = []
+        self.links_to_delete = []
+        self.unchanged_links = 0
+
+    def is_empty(self):
+        return not (
+            self.items_to_insert
+            or self.items_to_upsert
+            or self.links_to_insert
+            or self.links_to_delete
+        )
+
+    def summary(self):
+        return (
+            f"{len(self.items_to_insert)} item inserts, "
+            f"{len(self.items_to_upsert)} item upserts, "
+            f"{len(self.links_to_insert)} link inserts, "
+            f"{len(self.links_to_delete)} link deletes, "
+            f"{self.unchanged_links} links unchanged"
+        )
+
+
+def _link_key(link):
+    return (
+        link["day_of_week"],
+        link["dining_option_string_id"],
+        link["menu_item_uuid"],
+        link["meal_type"],
+    )
+
+
+def compute_menu_diff(data, server_items, server_links, label_bits):
+    """Diff the desired ``data`` against the rows currently stored in Supabase.
+
+    ``server_items`` are the ``menu_items`` rows and ``server_links`` the
+    live version's ``dining_option_menu_items`` rows. Because menu item ids are
+    content-addressed, rows are matched purely by key: items by
+    ``menu_item_uuid`` and links by (day, hall, item, meal). ``label_bits``
+    must already hold a bit for every label in ``data``.
+    """
+    diff = MenuDiff()
+    desired_items, desired_links = build_menu_rows(data, label_bits)
+    diff.desired_links = desired_links
+    items_by_uuid = {row["menu_item_uuid"]: row for row in server_items}
+
+    for row in desired_items:
+        current = items_by_uuid.get(row["menu_item_uuid"])
+        if current is None:
+            diff.items_to_insert.append(row)
+        elif any(current.get(column) != row[column] for column in MUTABLE_ITEM_COLUMNS):
+            diff.items_to_upsert.append(row)
+
+    server_link_keys = {_link_key(link) for link in server_links}
+    desired_link_keys = set()
+    for link in desired_links:
+        key = _link_key(link)
+        desired_link_keys.add(key)
+        if key in server_link_keys:
+            diff.unchanged_links += 1
+        else:
+            diff.links_to_insert.append(link)
+
+    diff.links_to_delete = [link for link in server_links if _link_key(link) not in desired_link_keys]
+
+    return diff
+
+
+class VersionBuild:
+    """Tracks a menu version that is streamed in one (day, hall) slice at a time.
+
+    Slices that match the live version are only remembered (by backup
+    reference) until the first changed slice arrives; the version is created
+    lazily then, so a run where nothing changed writes nothing at all.
+
+    With a ``scope`` (a set of ``(day_of_week, hall_id)``) the server state
+    was only read for those slices: slices outside it are carried over as
+    unchanged, and items not in ``server_items`` may still exist, so new
+    items are upserted rather than inserted.
+    """
+
+    def __init__(self, live_version, server_items, live_links, scope=None):
+        self.live_version = live_version
+        self.version = None
+        self.scope = scope
+        self.new_item_method = "insert" if scope is None else "upsert"
+        self.item_columns = {
+            row["menu_item_uuid"]: tuple(row.get(column) for column in MUTABLE_ITEM_COLUMNS)
+            for row in server_items
+        }
+        self.live_slices = {}
+        for link in live_links:
+            key = (link["day_of_week"], link["dining_option_string_id"])
+            self.live_slices.setdefault(key, set()).add((link["menu_item_uuid"], link["meal_type"]))
+        self.seen_slices = set()
+        self.pending = []
+        self.links_written = 0
+
+    def slice_changed(self, menu_items, dining_option_menu_items, day_of_week, location):
+        """Whether this slice differs from what the live version serves for it"""
+        self.seen_slices.add((day_of_week, location))
+        if self.scope is not None and (day_of_week, location) not in self.scope:
+            return False
+        links = {(link["menu_item_uuid"], link["meal_type"]) for link in dining_option_menu_items}
+        if links != self.live_slices.get((day_of_week, location), set()):
+            return True
+        return any(
+            self.item_columns.get(row["menu_item_uuid"]) != tuple(row[column] for column in MUTABLE_ITEM_COLUMNS)
+            for row in menu_items
+        )
+
+    def dropped_slices(self):
+        """Live (day, hall) slices that did not appear in this run"""
+        return [key for key in self.live_slices if key not in self.seen_slices]
+
+    def split_items(self, menu_items):
+        """Split a slice's items into (new rows to insert, known rows whose columns changed)"""
+        to_insert = []
+        to_upsert = []
+        for row in menu_items:
+            columns = tuple(row[column] for column in MUTABLE_ITEM_COLUMNS)
+            current = self.item_columns.get(row["menu_item_uuid"])
+            if current is None:
+                to_insert.append(row)
+            elif current != columns:
+                to_upsert.append(row)
+            else:
+                continue
+            self.item_columns[row["menu_item_uuid"]] = columns
+        return to_insert, to_upsert
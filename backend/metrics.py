@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket bounds in seconds, covering cache hits to slow page loads
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.bounds = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Metrics:
+    """Counters, gauges and latency histograms for one updater run.
+
+    Thread-safe, so the upload thread pool and the asyncio fetchers can
+    record into the same instance. ``export`` writes a JSON summary and a
+    Prometheus textfile-collector file.
+    """
+
+    def __init__(self, prefix="menu_updater", keep_slowest=20):
+        self.prefix = prefix
+        self.keep_slowest = keep_slowest
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._slowest = []
+
+    def inc(self, name, amount=1, **labels):
+        """Add ``amount`` to the counter ``name`` with ``labels``"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration in the histogram ``name``"""
+        self._observe(name, seconds, labels, track_slowest=True)
+
+    def _observe(self, name, seconds, labels, track_slowest):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+            if not track_slowest:
+                return
+            self._slowest.append((seconds, name, dict(key[1])))
+            if len(self._slowest) > self.keep_slowest * 4:
+                self._slowest.sort(key=lambda entry: entry[0], reverse=True)
+                del self._slowest[self.keep_slowest:]
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the ``with`` block into the histogram ``name``, even if it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @contextmanager
+    def stage(self, stage, **labels):
+        """Time a whole pipeline stage into the ``stage`` histogram.
+
+        Stages enclose the individual fetches and batches, so they are kept
+        out of the summary's list of slowest operations.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe("stage", time.perf_counter() - started, dict(labels, stage=stage), track_slowest=False)
+
+    def summary(self):
+        """The run's metrics as a JSON-serializable dict"""
+        with self._lock:
+            slowest = sorted(self._slowest, key=lambda entry: entry[0], reverse=True)[:self.keep_slowest]
+            return {
+                "started_at": self.started_at,
+                "duration_seconds": time.time() - self.started_at,
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._gauges.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "max": histogram.max,
+                        "buckets": dict(zip((str(bound) for bound in histogram.bounds), histogram.counts)),
+                    }
+                    for (name, labels), histogram in sorted(self._histograms.items())
+                ],
+                "slowest": [
+                    {"name": name, "labels": labels, "seconds": seconds}
+                    for seconds, name, labels in slowest
+                ],
+            }
+
+    def prometheus(self):
+        """The run's metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            typed = set()
+
+            def declare(metric, kind):
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} {kind}")
+
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}_total"
+                declare(metric, "counter")
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+            for (name, labels), value in sorted(self._gauges.items()):
+                metric = f"{self.prefix}_{name}"
+                declare(metric, "gauge")
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                metric = f"{self.prefix}_{name}_seconds"
+                declare(metric, "histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+                lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory=".", basename="menu_metrics"):
+        """Write ``<basename>.json`` and ``<basename>.prom`` atomically; returns both paths"""
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{basename}.json")
+        prom_path = os.path.join(directory, f"{basename}.prom")
+        for path, content in (
+            (json_path, json.dumps(self.summary(), indent=2)),
+            (prom_path, self.prometheus()),
+        ):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return json_path, prom_path
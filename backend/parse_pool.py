@@ -0,0 +1,104 @@
+"""Worker processes for CPU-bound menu parsing.
+
+Scraped ``.results`` HTML and large API response bodies are parsed and
+normalized in a process pool, so the event loop driving the browser and
+the HTTP client keeps running while a big page is processed. Workers send
+back menus as compact ``(name, category, labels)`` tuples, which the
+parent turns into shared :class:`MenuItem` records.
+"""
+import asyncio
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from menu_model import MenuItem
+from menu_normalizer import ItemNormalizer, transform_api_data
+from menu_parser import get_menu_parser
+
+# Per-process state, set up by _init_worker
+_parser = None
+_normalizer = None
+
+
+def _init_worker(html_parser, normalizer_path):
+    global _parser, _normalizer
+    _parser = get_menu_parser(html_parser)
+    # Read-only: only the parent saves the normalizer cache
+    _normalizer = ItemNormalizer(normalizer_path)
+
+
+def _pack(menu):
+    return {
+        meal_type: [(item.name, item.category, item.labels) for item in items]
+        for meal_type, items in menu.items()
+    }
+
+
+def _unpack(packed):
+    records = {}
+    menu = {}
+    for meal_type, entries in packed.items():
+        items = menu[sys.intern(meal_type)] = []
+        for entry in entries:
+            record = records.get(entry)
+            if record is None:
+                record = records[entry] = MenuItem(*entry)
+            items.append(record)
+    return menu
+
+
+def parse_html(html, default_meal_type):
+    """Worker entry point: parse one ``.results`` subtree"""
+    menu = _parser.parse(html, default_meal_type)
+    return None if menu is None else _pack(menu)
+
+
+def transform_body(body):
+    """Worker entry point: decode and transform one API response body"""
+    return _pack(transform_api_data(json.loads(body), _normalizer))
+
+
+class ParsePool:
+    """A lazily started process pool running the parse and transform entry points.
+
+    ``workers`` of 0 disables the pool; callers then parse inline.
+    """
+
+    def __init__(self, workers, html_parser=None, normalizer_path=None):
+        self.workers = workers
+        self.html_parser = html_parser
+        self.normalizer_path = normalizer_path
+        self._executor = None
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: the parent runs threads (uploads, GC), which fork does not mix well with
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.html_parser, self.normalizer_path),
+            )
+        return self._executor
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), function, *args)
+
+    async def parse_html(self, html, default_meal_type):
+        """``{meal_type: [MenuItem]}`` parsed from ``html`` in a worker, or None without results"""
+        packed = await self._run(parse_html, html, default_meal_type)
+        return None if packed is None else _unpack(packed)
+
+    async def transform(self, body):
+        """``{meal_type: [MenuItem]}`` from a raw API response body, decoded and transformed in a worker"""
+        return _unpack(await self._run(transform_body, body))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,147 @@
+"""Freshness-tiered refresh scheduling for (date, hall) menus.
+
+How often a menu is refetched depends on how soon it is served: today's
+menus refresh every few hours, the next days less often and past days
+never. The last refresh of each slice is whatever the caller reports
+(the updater reads it from the response cache), so the schedule survives
+restarts and is shared with one-off runs.
+
+:class:`RefreshScheduler` runs on asyncio. It sleeps until the earliest
+slice falls due, plus some jitter, then refreshes every slice due within
+the coalescing window in one job.
+"""
+import asyncio
+import datetime
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def parse_tiers(spec):
+    """``"0:180,1:720,6:2880"`` -> ``((0, 10800), (1, 43200), (6, 172800))``.
+
+    Each ``days:minutes`` pair refreshes menus up to ``days`` days ahead
+    every ``minutes``; days past the last tier are never refreshed.
+    """
+    tiers = []
+    for part in spec.split(","):
+        days, minutes = part.split(":")
+        tiers.append((int(days), int(minutes) * 60))
+    return tuple(sorted(tiers))
+
+
+def refresh_interval(days_ahead, tiers):
+    """Seconds between refreshes of a menu ``days_ahead`` days out, or None if it is never refreshed"""
+    if days_ahead < 0:
+        return None
+    for max_days, interval in tiers:
+        if days_ahead <= max_days:
+            return interval
+    return None
+
+
+def cache_ttl(tiers, ttl_seconds):
+    """``ttl_seconds``, raised to twice the longest refresh interval in ``tiers``.
+
+    A slice's cached response has to outlive its refresh interval: when the
+    slice falls due, the refresh revalidates that entry and falls back to
+    it if the API fails. An entry that expired first is gone by then.
+    """
+    return max([ttl_seconds] + [2 * interval for _, interval in tiers])
+
+
+class RefreshPlanner:
+    """Works out when each (date, hall) slice falls due.
+
+    ``last_refreshed(date, hall_id)`` returns the epoch seconds the slice
+    was last fetched or revalidated, or None if it never was.
+    """
+
+    def __init__(self, hall_ids, days, tiers, last_refreshed):
+        self.hall_ids = list(hall_ids)
+        self.days = days
+        self.tiers = tiers
+        self.last_refreshed = last_refreshed
+
+    def due_times(self, today):
+        """``{(date, hall_id): epoch seconds it falls due}``; a slice never refreshed is due at 0"""
+        due_times = {}
+        for offset in range(self.days):
+            interval = refresh_interval(offset, self.tiers)
+            if interval is None:
+                continue
+            date = today + datetime.timedelta(days=offset)
+            for hall_id in self.hall_ids:
+                refreshed = self.last_refreshed(date, hall_id)
+                due_times[(date, hall_id)] = 0 if refreshed is None else refreshed + interval
+        return due_times
+
+
+class RefreshScheduler:
+    """Runs coalesced, jittered refresh jobs as slices fall due.
+
+    ``run_job(due)`` is called in a worker thread with the set of
+    ``(date, hall_id)`` slices to refresh and returns whether it succeeded.
+    Slices a job was given are not handed out again for ``retry_seconds``,
+    so a failing source is retried on a schedule instead of in a loop.
+    """
+
+    def __init__(self, planner, run_job, jitter_seconds=600, coalesce_seconds=1800,
+                 retry_seconds=900, clock=time.time, rng=None):
+        self.planner = planner
+        self.run_job = run_job
+        self.jitter_seconds = jitter_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._retry_after = {}
+
+    def plan(self, now):
+        """``(slices to refresh now, when to plan again)``.
+
+        Nothing is refreshed until some slice is due; then every slice due
+        within the coalescing window rides along in the same job.
+        """
+        today = datetime.date.fromtimestamp(now)
+        self._retry_after = {key: at for key, at in self._retry_after.items() if key[0] >= today}
+        due_times = {
+            key: max(at, self._retry_after.get(key, 0))
+            for key, at in self.planner.due_times(today).items()
+        }
+
+        if any(at <= now for at in due_times.values()):
+            due = {key for key, at in due_times.items() if at <= now + self.coalesce_seconds}
+            return due, now
+
+        # A new day brings a new, never fetched slice into the horizon
+        midnight = datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time())
+        wake_at = min([*due_times.values(), midnight.timestamp()])
+        return set(), wake_at + self.rng.uniform(0, self.jitter_seconds)
+
+    async def run_once(self):
+        """Run one job if anything is due; returns when to plan again"""
+        now = self.clock()
+        due, wake_at = self.plan(now)
+        if due:
+            days = sorted({date for date, _ in due})
+            logger.info(f"Refreshing {len(due)} menus for {', '.join(str(date) for date in days)}")
+            for key in due:
+                self._retry_after[key] = now + self.retry_seconds
+            try:
+                if not await asyncio.to_thread(self.run_job, due):
+                    logger.error("Refresh job failed; its menus are retried later")
+            except Exception as e:
+                logger.error(f"Refresh job raised an error: {e}")
+        return wake_at
+
+    async def run(self):
+        """Refresh menus as they fall due, until cancelled"""
+        while True:
+            wake_at = await self.run_once()
+            delay = wake_at - self.clock()
+            if delay > 0:
+                logger.info(f"Next refresh check at {datetime.datetime.fromtimestamp(wake_at):%Y-%m-%d %H:%M}")
+                await asyncio.sleep(delay)
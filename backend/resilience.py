@@ -0,0 +1,248 @@
+"""Retries, circuit breakers, run deadlines and hedged requests for upstream calls.
+
+One :class:`Resilience` instance serves every call a run makes to the menu
+API or the menu website:
+
+* failed attempts are retried with exponential backoff and full jitter;
+* each host has a :class:`CircuitBreaker`; after repeated failures calls
+  to that host fail fast until a probe succeeds again;
+* a run has a deadline: once it passes no attempt is started and no
+  backoff sleep taken, while attempts already sent finish under their own
+  request timeout;
+* for idempotent requests, a duplicate is sent once the first has run past
+  a latency percentile of recent calls to the host, and the first to
+  succeed wins.
+"""
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections import deque
+
+from metrics import Metrics
+
+
+class UnavailableError(Exception):
+    """A call was not attempted, or not retried, because an upstream is unavailable"""
+
+
+class CircuitOpenError(UnavailableError):
+    """The host's circuit breaker is open"""
+
+
+class DeadlineExceeded(UnavailableError):
+    """The run's deadline passed before the call succeeded"""
+
+
+def backoff_delay(attempt, base_delay, max_delay, rng=random):
+    """Full-jitter exponential backoff: a random delay up to ``base_delay * 2 ** attempt``"""
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Closed, open or half-open circuit for one host.
+
+    ``failure_threshold`` consecutive failures open the circuit. Every
+    ``reset_seconds`` while open, one probe call is let through
+    (half-open); its success closes the circuit and its failure keeps it
+    open.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Whether a call may go ahead now"""
+        state = self.state
+        if state == "half-open":
+            # Let this call probe; everyone else waits for another reset period
+            self.opened_at = self.clock()
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        """Count a failure; returns True if it opened the circuit"""
+        self.failures += 1
+        if self.opened_at is not None:
+            self.opened_at = self.clock()
+        elif self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+            return True
+        return False
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful calls to one host"""
+
+    def __init__(self, window=200, min_samples=20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, percent):
+        """The ``percent``-th percentile, or None until enough calls were seen"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Resilience:
+    """Runs upstream calls with retries, per-host breakers, a run deadline and hedging.
+
+    ``max_retries`` of 0 and ``hedge_percentile`` of 0 turn retries and
+    hedging off. ``start_run`` begins a run's deadline and resets the
+    breakers; without it calls have no deadline.
+    """
+
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=10.0,
+                 failure_threshold=5, reset_seconds=30.0, hedge_percentile=95.0,
+                 logger=None, metrics=None, clock=time.monotonic, rng=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.hedge_percentile = hedge_percentile
+        self.logger = logger or logging.getLogger(__name__)
+        self.metrics = metrics or Metrics()
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.deadline = None
+        self._breakers = {}
+        self._latencies = {}
+
+    def start_run(self, deadline_seconds=None):
+        """Begin a run: its deadline is ``deadline_seconds`` from now (None for no deadline)"""
+        self.deadline = None if deadline_seconds is None else self.clock() + deadline_seconds
+        self._breakers = {}
+
+    def remaining(self):
+        """Seconds left before the run's deadline, or None without one"""
+        return None if self.deadline is None else self.deadline - self.clock()
+
+    def breaker(self, host):
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_seconds, self.clock)
+        return self._breakers[host]
+
+    def _latency(self, host):
+        if host not in self._latencies:
+            self._latencies[host] = LatencyTracker()
+        return self._latencies[host]
+
+    async def call(self, host, attempt, description, retryable=lambda e: True, hedge=False, slot=None):
+        """Await ``attempt()`` until it succeeds; returns its result.
+
+        ``attempt`` is a zero-argument coroutine function making one call to
+        ``host``. Errors ``retryable`` rejects are raised at once and do not
+        count against the host; otherwise the last error is raised once
+        retries run out. Raises :class:`CircuitOpenError` or
+        :class:`DeadlineExceeded` when the host or the run's time budget is
+        exhausted first. ``hedge`` is only safe for idempotent calls.
+
+        ``slot`` is an optional factory of an async context manager, such
+        as a concurrency limit, held around each attempt. The breaker and
+        the deadline are checked once it is acquired, and a retry waiting
+        out its backoff holds none.
+        """
+        breaker = self.breaker(host)
+
+        async def guarded(sent=None):
+            async with slot() if slot else contextlib.nullcontext():
+                if not breaker.allow():
+                    self.metrics.inc("circuit_rejections", host=host)
+                    raise CircuitOpenError(f"{description}: circuit for {host} is open")
+                if self.deadline is not None and self.remaining() <= 0:
+                    self.metrics.inc("deadline_exceeded", host=host)
+                    raise DeadlineExceeded(f"{description}: run deadline passed")
+                if sent is not None:
+                    sent.set()
+                started = self.clock()
+                result = await attempt()
+                self._latency(host).observe(self.clock() - started)
+                return result
+
+        for retry in range(self.max_retries + 1):
+            try:
+                # Not cut off at the deadline: a cancelled request wastes the work already done upstream
+                if hedge and self.hedge_percentile:
+                    result = await self._hedged(host, guarded)
+                else:
+                    result = await guarded()
+            except UnavailableError:
+                raise
+            except Exception as e:
+                if not retryable(e):
+                    raise
+                if breaker.record_failure():
+                    self.metrics.inc("circuit_trips", host=host)
+                    self.logger.warning(f"Circuit for {host} opened after {breaker.failures} failures")
+                if retry == self.max_retries:
+                    raise
+
+                delay = backoff_delay(retry, self.base_delay, self.max_delay, self.rng)
+                remaining = self.remaining()
+                if remaining is not None and delay >= remaining:
+                    self.metrics.inc("deadline_exceeded", host=host)
+                    raise DeadlineExceeded(f"{description}: no time left to retry after {e}") from e
+                self.metrics.inc("request_retries", host=host)
+                self.logger.warning(f"{description} failed (attempt {retry + 1}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            return result
+
+    async def _hedged(self, host, guarded):
+        """Run ``guarded``, adding a duplicate if it runs past the host's latency percentile.
+
+        The hedge timer starts once the first attempt is sent, not while it
+        waits for a slot.
+        """
+        sent = asyncio.Event()
+        first = asyncio.ensure_future(guarded(sent))
+        tasks = {first}
+        try:
+            waiter = asyncio.ensure_future(sent.wait())
+            await asyncio.wait({first, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            hedge_after = self._latency(host).percentile(self.hedge_percentile)
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    self.metrics.inc("hedged_requests", host=host)
+                    tasks.add(asyncio.ensure_future(guarded()))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.metrics.inc("hedge_wins", host=host)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,39 @@
+-- Versioned menu publishing.
+--
+-- The updater writes every dining_option_menu_items row of a new menu under a
+-- fresh menu_version, then flips menu_current_version to it in a single
+-- statement. The app reads through current_dining_option_menu_items, so it
+-- only ever sees one complete version. menu_items rows are content-addressed
+-- and shared between versions.
+--
+-- Run once in the Supabase SQL editor before running the updater; every
+-- upload mode writes versions. Existing rows become version 0.
+
+create table if not exists menu_versions (
+    version bigint primary key,
+    status text not null default 'building',  -- building | live | retired | failed
+    created_at timestamptz not null default now()
+);
+
+create table if not exists menu_current_version (
+    id boolean primary key default true check (id),  -- single-row pointer
+    version bigint not null references menu_versions (version)
+);
+
+alter table dining_option_menu_items
+    add column if not exists menu_version bigint not null default 0;
+
+create index if not exists dining_option_menu_items_version_idx
+    on dining_option_menu_items (menu_version, dining_option_string_id, meal_type, day_of_week);
+
+insert into menu_versions (version, status) values (0, 'live')
+    on conflict (version) do nothing;
+insert into menu_current_version (id, version) values (true, 0)
+    on conflict (id) do nothing;
+
+create or replace view current_dining_option_menu_items as
+    select l.day_of_week, l.dining_option_string_id, l.menu_item_uuid, l.meal_type
+    from dining_option_menu_items l
+    join menu_current_version c on l.menu_version = c.version;
+
+grant select on current_dining_option_menu_items to anon, authenticated;
@@ -0,0 +1,25 @@
+-- Read-optimized menu documents.
+--
+-- For every menu version the updater also stores one document per
+-- (day_of_week, dining_option_string_id, meal_type) holding the ordered item
+-- list, keyed by menu_key = '<Day>:<location>:<Meal>'. The app loads a menu
+-- with a single primary-key lookup on current_menu_documents.
+--
+-- Requires 001_menu_versions.sql.
+
+create table if not exists menu_documents (
+    menu_version bigint not null references menu_versions (version) on delete cascade,
+    menu_key text not null,
+    day_of_week text not null,
+    dining_option_string_id text not null,
+    meal_type text not null,
+    items jsonb not null,
+    primary key (menu_version, menu_key)
+);
+
+create or replace view current_menu_documents as
+    select d.menu_key, d.day_of_week, d.dining_option_string_id, d.meal_type, d.items
+    from menu_documents d
+    join menu_current_version c on d.menu_version = c.version;
+
+grant select on current_menu_documents to anon, authenticated;
@@ -0,0 +1,64 @@
+-- Label bitmasks for dietary filtering.
+--
+-- Every distinct label gets a permanent bit in menu_labels (assigned by the
+-- updater, never reused or renumbered), and each menu_items row stores the
+-- OR of its labels' bits in label_mask. Bits stop at 52 so masks stay exact
+-- as JavaScript numbers. Menu documents also carry label_index, an inverted
+-- {label: [item position]} index over their items array.
+--
+-- "Vegan and no tree nuts at Village dinner":
+--
+--   select * from filter_menu_items('Monday', 'village', 'Dinner',
+--                                   array['Vegan'], array['Tree nuts']);
+--
+-- Requires 002_menu_documents.sql.
+
+create table if not exists menu_labels (
+    label text primary key,
+    bit smallint not null unique check (bit between 0 and 52)
+);
+
+alter table menu_items add column if not exists label_mask bigint not null default 0;
+alter table menu_documents add column if not exists label_index jsonb not null default '{}'::jsonb;
+
+create or replace view current_menu_documents as
+    select d.menu_key, d.day_of_week, d.dining_option_string_id, d.meal_type, d.items, d.label_index
+    from menu_documents d
+    join menu_current_version c on d.menu_version = c.version;
+
+-- OR of the bits of the given labels; unknown labels contribute nothing
+create or replace function label_mask(labels text[]) returns bigint
+language sql stable as $$
+    select coalesce(bit_or(1::bigint << bit), 0) from menu_labels where label = any(labels)
+$$;
+
+create or replace function filter_menu_items(
+    p_day_of_week text,
+    p_dining_option_string_id text,
+    p_meal_type text,
+    required_labels text[] default '{}',
+    excluded_labels text[] default '{}'
+) returns setof menu_items
+language sql stable as $$
+    with masks as (
+        select label_mask(required_labels) as required,
+               label_mask(excluded_labels) as excluded,
+               -- a required label nobody carries yet matches nothing
+               (select count(*) from menu_labels where label = any(required_labels))
+                   = (select count(distinct r) from unnest(required_labels) r) as required_known
+    )
+    select i.*
+    from current_dining_option_menu_items l
+    join menu_items i on i.menu_item_uuid = l.menu_item_uuid
+    cross join masks m
+    where l.day_of_week = p_day_of_week
+      and l.dining_option_string_id = p_dining_option_string_id
+      and l.meal_type = p_meal_type
+      and m.required_known
+      and i.label_mask & m.required = m.required
+      and i.label_mask & m.excluded = 0
+$$;
+
+grant select on menu_labels to anon, authenticated;
+grant execute on function label_mask(text[]) to anon, authenticated;
+grant execute on function filter_menu_items(text, text, text, text[], text[]) to anon, authenticated;
@@ -0,0 +1,23 @@
+-- Prebuilt menu search index.
+--
+-- Every menu version gets one search index document (see menu_search.py):
+-- the version's items, token postings over their normalized names and
+-- categories, and the menus listing each item, all as item positions.
+-- Clients download current_menu_search_index once, rebuild the trigram
+-- map from its vocabulary and search locally instead of reading every
+-- menu_items row.
+--
+-- Requires 001_menu_versions.sql.
+
+create table if not exists menu_search_indexes (
+    menu_version bigint primary key references menu_versions (version) on delete cascade,
+    search_index jsonb not null,
+    created_at timestamptz not null default now()
+);
+
+create or replace view current_menu_search_index as
+    select s.menu_version, s.search_index
+    from menu_search_indexes s
+    join menu_current_version c on s.menu_version = c.version;
+
+grant select on current_menu_search_index to anon, authenticated;
@@ -0,0 +1,105 @@
+"""Registry of the venues whose menus are fetched, and the sources serving them.
+
+Loaded from a JSON config (``venues.json`` beside this module unless
+``MENU_VENUES_FILE`` points elsewhere):
+
+    {
+      "sources": {
+        "usc": {"url": null, "rate_per_second": 10, "burst": 20, "max_concurrency": 4}
+      },
+      "venues": [
+        {"id": "parkside", "name": "Parkside", "data_value": "parkside",
+         "kind": "dining_hall", "source": "usc"}
+      ]
+    }
+
+A source's ``url`` is the menu API base URL, ``null`` meaning
+``MENU_API_URL``. Its limits apply per host, to every request sent there:
+at most ``max_concurrency`` in flight and, unless ``rate_per_second`` is
+null or left out, a token bucket of ``burst`` requests refilled at
+``rate_per_second``.
+Venues are plain dicts so the rest of the updater reads ``venue["id"]``,
+``venue["name"]`` and ``venue["data_value"]`` as it always has.
+"""
+import asyncio
+import json
+import os
+import time
+
+VENUES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "venues.json")
+
+SOURCE_DEFAULTS = {"url": None, "rate_per_second": None, "burst": 1, "max_concurrency": 4}
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` requests per second on average, bursts of up to ``burst``"""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+class VenueRegistry:
+    """Venues in config order, and the sources they are fetched from"""
+
+    def __init__(self, sources, venues):
+        self.sources = {name: {**SOURCE_DEFAULTS, **source} for name, source in sources.items()}
+        self.venues = []
+        self._by_id = {}
+        for venue in venues:
+            if venue["id"] in self._by_id:
+                raise ValueError(f"Venue {venue['id']!r} is listed twice")
+            if venue.get("source") not in self.sources:
+                raise ValueError(f"Venue {venue['id']!r} uses unknown source {venue.get('source')!r}")
+            self._by_id[venue["id"]] = venue
+            self.venues.append(venue)
+
+    @classmethod
+    def load(cls, path=VENUES_FILE):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config.get("sources", {}), config.get("venues", []))
+
+    def select(self, ids=None):
+        """The venues with the given ids, in registry order; all of them for None"""
+        if ids is None:
+            return list(self.venues)
+        unknown = set(ids) - self._by_id.keys()
+        if unknown:
+            raise ValueError(f"Unknown venues: {', '.join(sorted(unknown))}")
+        return [venue for venue in self.venues if venue["id"] in ids]
+
+    def source_of(self, venue_id):
+        """Name of the source serving the venue with id ``venue_id``"""
+        return self._by_id[venue_id]["source"]
+
+    def split(self, parts):
+        """A registry whose source limits are a ``1 / parts`` share, for one of ``parts`` processes"""
+        return VenueRegistry(
+            {
+                name: dict(
+                    source,
+                    rate_per_second=source["rate_per_second"] and source["rate_per_second"] / parts,
+                    burst=max(1, source["burst"] // parts),
+                    max_concurrency=max(1, source["max_concurrency"] // parts),
+                )
+                for name, source in self.sources.items()
+            },
+            self.venues,
+        )
@@ -38,6 +38,7 @@ export interface MenuItemType {
   category: string;
   featured: boolean;
   labels?: string[];
+  label_mask?: number;
 }
 
 export interface MealPlan {
@@ -102,6 +102,8 @@ export const getTimeOfDay = () => {
 
 /**
  * Fetch menu items for a given dining option, meal type, and day of week from Supabase.
+ * Reads the precomputed menu document for the live menu version with a single
+ * primary-key lookup; items come back in menu order.
  * @param diningOptionStringId - The string_id of the dining location
  * @param mealType - One of 'Breakfast', 'Lunch', 'Dinner'
  * @param dayOfWeek - Day of week, e.g., 'Monday', 'Tuesday', etc.
@@ -113,48 +115,69 @@ export async function fetchMenuItemsFromSupabase(
   dayOfWeek: string
 ): Promise<MenuItemType[]> {
   console.log('Fetching menu items with params:', { diningOptionStringId, mealType, dayOfWeek });
-  // Step 1: Get menu_item_uuids for this dining option, meal, and day
-  const { data: linkData, error: linkError } = await supabase
-    .from('dining_option_menu_items')
-    .select('menu_item_uuid')
-    .eq('dining_option_string_id', diningOptionStringId)
-    .eq('meal_type', mealType)
-    .eq('day_of_week', dayOfWeek);
+  const menuKey = `${dayOfWeek}:${diningOptionStringId}:${mealType}`;
 
-  console.log('Link data:', linkData);
-  if (linkError) {
-    console.error('Error fetching menu item links:', linkError);
-    return [];
-  }
-  if (!linkData || linkData.length === 0) {
-    return [];
-  }
-
-  const menuItemUuids = linkData.map((row: any) => row.menu_item_uuid);
-  console.log('Menu item UUIDs:', menuItemUuids);
+  const { data: menuDocument, error: menuError } = await supabase
+    .from('current_menu_documents')
+    .select('items')
+    .eq('menu_key', menuKey)
+    .maybeSingle();
 
-  // Step 2: Fetch menu item details
-  const { data: menuItems, error: menuError } = await supabase
-    .from('menu_items')
-    .select('*')
-    .in('menu_item_uuid', menuItemUuids);
-
-  console.log('Menu items:', menuItems);
   if (menuError) {
-    console.error('Error fetching menu items:', menuError);
+    console.error('Error fetching menu document:', menuError);
     return [];
   }
-  if (!menuItems) {
+  if (!menuDocument || !menuDocument.items) {
     return [];
   }
 
-  // Step 3: Map to MenuItemType (add description as empty string for compatibility)
-  return menuItems.map((item: any) => ({
+  // Map to MenuItemType (add description as empty string for compatibility)
+  return menuDocument.items.map((item: any) => ({
     name: item.name,
     description: '', // No description in schema, so leave blank
     image_url: item.image_url,
     category: item.category,
     featured: item.featured,
     labels: item.labels || [],
+    label_mask: item.label_mask || 0,
   }));
 }
+
+/**
+ * Fetch the label -> bit assignments behind each item's label_mask.
+ * Bits are stable, so the result can be cached for the whole session.
+ * @returns Map from label (e.g. 'Vegan') to bit position
+ */
+export async function fetchLabelBits(): Promise<Record<string, number>> {
+  const { data, error } = await supabase.from('menu_labels').select('label,bit');
+  if (error) {
+    console.error('Error fetching label bits:', error);
+    return {};
+  }
+  return Object.fromEntries((data || []).map((row: any) => [row.label, row.bit]));
+}
+
+/**
+ * Keep the items carrying every required label and none of the excluded ones,
+ * e.g. filterMenuItemsByLabels(items, bits, ['Vegan'], ['Tree nuts']).
+ * Masks use up to 53 bits, past the 32 that JS bitwise operators handle, so
+ * the tests run on BigInt.
+ */
+export function filterMenuItemsByLabels(
+  items: MenuItemType[],
+  labelBits: Record<string, number>,
+  required: string[] = [],
+  excluded: string[] = []
+): MenuItemType[] {
+  if (required.some(label => labelBits[label] === undefined)) {
+    return [];
+  }
+  const toMask = (labels: string[]) =>
+    labels.reduce((mask, label) => labelBits[label] === undefined ? mask : mask | (1n << BigInt(labelBits[label])), 0n);
+  const requiredMask = toMask(required);
+  const excludedMask = toMask(excluded);
+  return items.filter(item => {
+    const mask = BigInt(item.label_mask || 0);
+    return (mask & requiredMask) === requiredMask && (mask & excludedMask) === 0n;
+  });
+}